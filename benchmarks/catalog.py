@@ -0,0 +1,65 @@
+"""Deterministic synthetic server catalogs and search queries for benchmarks."""
+import random
+from datetime import datetime, timezone
+from typing import List
+
+DOMAINS = ["math", "weather", "finance", "files", "email", "calendar", "maps", "search", "images", "audio",
+           "database", "crm", "billing", "shipping", "translation", "code", "logs", "metrics", "chat", "docs"]
+VERBS = ["get", "list", "create", "update", "delete", "search", "convert", "calculate", "summarize", "export",
+         "import", "validate", "render", "schedule", "translate", "compare", "forecast", "resize", "send", "fetch"]
+NOUNS = ["record", "report", "invoice", "event", "message", "document", "image", "forecast", "route", "order",
+         "customer", "file", "table", "chart", "payment", "ticket", "contact", "note", "task", "metric",
+         "sum", "product", "schedule", "query", "transcript", "summary", "rate", "balance", "alert", "page"]
+
+TIMESTAMP = datetime(2025, 1, 1, tzinfo=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def synthetic_tool(rng: random.Random, verb: str, noun: str, domain: str) -> dict:
+    params = rng.sample(NOUNS, 2)
+    return {
+        "name": f"{verb}_{noun}",
+        "description": f"{verb.title()} a {noun} in the {domain} system using the given {params[0]} and {params[1]}.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {param: {"type": "string", "description": f"The {param} to use"} for param in params},
+            "required": params[:1],
+        },
+    }
+
+
+def synthetic_catalog(total_tools: int, tools_per_server: int = 10, seed: int = 0) -> List[dict]:
+    """Server records, shaped like ServerMetadata.model_dump(mode="json"), holding `total_tools` tools in all."""
+    rng = random.Random(seed)
+    servers = []
+    for index in range((total_tools + tools_per_server - 1) // tools_per_server):
+        domain = DOMAINS[index % len(DOMAINS)]
+        count = min(tools_per_server, total_tools - index * tools_per_server)
+        pairs = rng.sample([(verb, noun) for verb in VERBS for noun in NOUNS], count)
+        servers.append({
+            "id": f"bench-{index:06d}",
+            "name": f"{domain.title()} {rng.choice(NOUNS).title()} Server {index}",
+            "description": f"MCP server with {domain} tools for working with {pairs[0][1]}s and {pairs[-1][1]}s",
+            "tags": [domain, rng.choice(NOUNS)],
+            # Nothing listens here; the benchmark registry runs with liveness probing disabled
+            "url": f"http://127.0.0.1:9/bench-{index:06d}",
+            "tools": [synthetic_tool(rng, verb, noun, domain) for verb, noun in pairs],
+            "resources": [],
+            "prompts": [],
+            "created_at": TIMESTAMP,
+            "updated_at": TIMESTAMP,
+            "last_heartbeat": TIMESTAMP,
+        })
+    return servers
+
+
+def synthetic_queries(count: int, seed: int = 0) -> List[str]:
+    """A mix of exact tool names (lexical fast path) and free-text queries (vector or hybrid ranking)."""
+    rng = random.Random(seed + 1)
+    queries = []
+    for index in range(count):
+        verb, noun, domain = rng.choice(VERBS), rng.choice(NOUNS), rng.choice(DOMAINS)
+        if index % 3 == 0:
+            queries.append(f"{verb}_{noun}")
+        else:
+            queries.append(f"I need to {verb} the {noun} for my {domain} workflow")
+    return queries
@@ -0,0 +1,28 @@
+"""The registry app wired to local stand-ins and seeded with a synthetic catalog, for `uvicorn registry_app:app`.
+
+In-memory DynamoDB, the deterministic local embedding backend and an in-memory Chroma index, so runs need no
+AWS or OpenAI access and are reproducible. The catalog size comes from BENCHMARK_TOOLS.
+"""
+import os
+
+os.environ.setdefault("RUN_LOCAL", "True")
+os.environ.setdefault("EMBEDDING_BACKEND", "local")
+os.environ.setdefault("LIVENESS_PROBE_INTERVAL_SECONDS", "0")
+os.environ.pop("CHROMA_PERSIST_DIRECTORY", None)
+
+from catalog import synthetic_catalog  # noqa: E402
+import main  # noqa: E402
+
+catalog = synthetic_catalog(
+    int(os.environ.get("BENCHMARK_TOOLS", "1000")),
+    tools_per_server=int(os.environ.get("BENCHMARK_TOOLS_PER_SERVER", "10")),
+    seed=int(os.environ.get("BENCHMARK_SEED", "0")),
+)
+# Storage is normally opened by the warm-up; open it now so the catalog is there for the startup sync to index
+main.open_storage()
+with main.servers_table.batch_writer() as batch:
+    for server in catalog:
+        batch.put_item(Item=server)
+print(f"🧪 Seeded {len(catalog)} synthetic servers")
+
+app = main.app
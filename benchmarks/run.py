@@ -0,0 +1,271 @@
+"""Offline load test for the registry: search and registration throughput and latency percentiles as JSON.
+
+For each catalog size the registry runs in its own process (see registry_app.py) with a synthetic catalog of
+that many tools; N copies of the example calculator server are started once as registration targets.
+
+    python benchmarks/run.py --tools 100,1000,10000,100000 --output bench.json
+    python benchmarks/run.py --tools 1000 --baseline bench.json   # exit 1 on a p95 regression
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import httpx
+
+from catalog import synthetic_queries
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.join(ROOT, "benchmarks")
+REGISTRY_APP_PATH = os.pathsep.join([BENCHMARKS, os.path.join(ROOT, "code", "app"), ROOT])
+EXAMPLE_SERVER_DIR = os.path.join(ROOT, "examples", "server", "app")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(app: str, port: int, env: Optional[dict] = None, app_dir: Optional[str] = None) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning"]
+    if app_dir:
+        command += ["--app-dir", app_dir]
+    return subprocess.Popen(command, env={**os.environ, **(env or {})}, cwd=ROOT)
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def wait_until_healthy(base_url: str, process: subprocess.Popen, timeout: float, path: str = "/health") -> float:
+    """Seconds until GET `path` succeeds (the registry's /ready only does once its index has warmed up)."""
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=2) as client:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"{base_url} exited with code {process.returncode} during startup")
+            try:
+                if (await client.get(f"{base_url}{path}")).status_code == 200:
+                    return time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"{base_url} not healthy after {timeout}s")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+async def drive(operations: List[Callable[[], Awaitable[None]]], concurrency: int) -> dict:
+    """Run operations over `concurrency` workers; each operation raises on failure."""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < len(operations):
+            operation = operations[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                await operation()
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def search_operations(client: httpx.AsyncClient, queries: List[str], top_k: int) -> List[Callable]:
+    def operation(query: str):
+        async def run():
+            response = await client.post("/search_servers", json={"query": query, "top_k": top_k})
+            response.raise_for_status()
+        return run
+    return [operation(query) for query in queries]
+
+
+def batch_search_operations(client: httpx.AsyncClient, queries: List[str], batch_size: int, top_k: int) -> List[Callable]:
+    def operation(batch: List[str]):
+        async def run():
+            response = await client.post("/search_servers/batch", json={"queries": batch, "top_k": top_k})
+            response.raise_for_status()
+        return run
+    return [operation(queries[i:i + batch_size]) for i in range(0, len(queries), batch_size)]
+
+
+def registration_operations(client: httpx.AsyncClient, server_urls: List[str], count: int) -> List[Callable]:
+    """Each operation submits a registration job and polls it to completion (tool discovery over SSE included)."""
+    def operation(index: int):
+        async def run():
+            response = await client.post("/register_server", json={
+                "id": f"calculator-{index}",
+                "name": f"Example Calculator MCP Server {index}",
+                "description": "MCP server with some math tools (arithmetic mostly)",
+                "tags": ["sum", "math", "benchmark"],
+                "url": server_urls[index % len(server_urls)],
+            })
+            response.raise_for_status()
+            status_url = response.json()["status_url"]
+            while True:
+                job = (await client.get(status_url)).json()
+                if job["status"] == "succeeded":
+                    return
+                if job["status"] == "failed":
+                    raise RuntimeError(job.get("error"))
+                await asyncio.sleep(0.01)
+        return run
+    return [operation(index) for index in range(count)]
+
+
+async def benchmark_catalog(args, tools: int, server_urls: List[str]) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        "PYTHONPATH": REGISTRY_APP_PATH,
+        "RUN_LOCAL": "True",
+        "EMBEDDING_BACKEND": "local",
+        "LIVENESS_PROBE_INTERVAL_SECONDS": "0",
+        "BENCHMARK_TOOLS": str(tools),
+        "BENCHMARK_TOOLS_PER_SERVER": str(args.tools_per_server),
+        "BENCHMARK_SEED": str(args.seed),
+    }
+    if args.no_search_cache:
+        env["SEARCH_CACHE_MAX_ENTRIES"] = "0"
+    registry = start_uvicorn("registry_app:app", port, env=env)
+    try:
+        startup_seconds = await wait_until_healthy(base_url, registry, args.startup_timeout, path="/ready")
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            queries = synthetic_queries(args.search_requests, seed=args.seed)
+            result = {
+                "catalog_tools": tools,
+                "startup_seconds": round(startup_seconds, 3),
+                "search": await drive(search_operations(client, queries, args.top_k), args.concurrency),
+                "batch_search": await drive(
+                    batch_search_operations(client, queries, args.batch_size, args.top_k), args.concurrency),
+            }
+            if args.registrations and server_urls:
+                # Registration and search run together, as they do in production
+                registration, search = await asyncio.gather(
+                    drive(registration_operations(client, server_urls, args.registrations), args.concurrency),
+                    drive(search_operations(client, synthetic_queries(args.search_requests, seed=args.seed + 1),
+                                            args.top_k), args.concurrency),
+                )
+                result["registration"] = registration
+                result["search_during_registration"] = search
+            result["cache_stats"] = (await client.get("/cache_stats")).json()
+            return result
+    finally:
+        stop(registry)
+
+
+def regressions(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """p95 latencies more than `tolerance` (a fraction) above the baseline run for the same catalog size."""
+    baseline_by_size = {run["catalog_tools"]: run for run in baseline.get("runs", [])}
+    found = []
+    for run in results:
+        previous = baseline_by_size.get(run["catalog_tools"])
+        if previous is None:
+            continue
+        for phase, stats in run.items():
+            if not isinstance(stats, dict) or "p95_ms" not in stats or phase not in previous:
+                continue
+            limit = previous[phase]["p95_ms"] * (1 + tolerance)
+            if stats["p95_ms"] > limit:
+                found.append(f"{run['catalog_tools']} tools / {phase}: p95 {stats['p95_ms']}ms > {limit:.3f}ms")
+    return found
+
+
+async def main(args) -> int:
+    ports = [free_port() for _ in range(args.example_servers)]
+    example_servers = [(port, start_uvicorn("main:app", port, app_dir=EXAMPLE_SERVER_DIR)) for port in ports]
+    server_urls = [f"http://127.0.0.1:{port}" for port, _ in example_servers]
+    try:
+        for url, (_, process) in zip(server_urls, example_servers):
+            await wait_until_healthy(url, process, args.startup_timeout)
+        runs = []
+        for tools in args.tools:
+            print(f"⏱️ Benchmarking a catalog of {tools} tools", file=sys.stderr)
+            runs.append(await benchmark_catalog(args, tools, server_urls))
+    finally:
+        for _, process in example_servers:
+            stop(process)
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(runs, json.load(f), args.max_regression)
+        for line in found:
+            print(f"❌ Regression: {line}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", type=lambda value: [int(size) for size in value.split(",")],
+                        default=[100, 1000, 10000], help="Comma-separated catalog sizes, in tools")
+    parser.add_argument("--tools-per-server", type=int, default=10)
+    parser.add_argument("--example-servers", type=int, default=4, help="Calculator servers to register against")
+    parser.add_argument("--search-requests", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=8, help="Queries per /search_servers/batch request")
+    parser.add_argument("--registrations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--no-search-cache", action="store_true", help="Measure every search uncached")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup-timeout", type=float, default=1800)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 increase over the baseline")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,148 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Optional
+
+# Monotonic time by which the current request must be answered; reads still waiting past it are dropped
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+
+class Overloaded(Exception):
+    """A request turned away to protect the ones already admitted; answered with `status_code` and Retry-After."""
+
+    def __init__(self, message: str, status_code: int = 503, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Overloaded):
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline passed before {stage}")
+
+
+def set_deadline(received_at: float, default_seconds: float, requested_seconds: Optional[str] = None) -> float:
+    """Start the current request's deadline `default_seconds` after it was received, or sooner if the client's
+    own budget (the X-Request-Timeout header, in seconds) is shorter."""
+    budget = default_seconds
+    if requested_seconds:
+        try:
+            budget = min(budget, max(0.0, float(requested_seconds)))
+        except ValueError:
+            pass
+    deadline = received_at + budget
+    current_deadline.set(deadline)
+    return deadline
+
+
+def check_deadline(stage: str) -> None:
+    deadline = current_deadline.get()
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(stage)
+
+
+def unless_expired(fn: Callable, stage: str) -> Callable:
+    """Wrap a blocking read for an executor so it is skipped if the deadline passes while it waits for a thread."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return fn
+
+    def call(*args, **kwargs):
+        if time.monotonic() >= deadline:
+            raise DeadlineExceeded(stage)
+        return fn(*args, **kwargs)
+
+    return call
+
+
+class AdmissionController:
+    """Caps how many requests of one kind run at once.
+
+    Up to `max_queue` more wait their turn in arrival order, each for at most `max_wait_seconds` (or until its
+    deadline). Anything beyond that is turned away at once with 429, and requests that waited too long with
+    503, so the latency of admitted requests holds up under overload. Must be used from the event loop.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, max_wait_seconds: float = 1.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        # Each waiter is resolved when a finishing request hands its slot over
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long a request holds its slot, for Retry-After
+        self._hold_seconds = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._hold_seconds * (len(self._waiters) + 1) / self.max_concurrency))
+
+    async def _acquire(self) -> None:
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"Too many concurrent requests ({self.name})", status_code=429,
+                             retry_after=self.retry_after())
+
+        wait = self.max_wait_seconds
+        deadline = current_deadline.get()
+        if deadline is not None:
+            wait = min(wait, deadline - time.monotonic())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait([waiter], timeout=max(wait, 0.0))
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            self.expired += 1
+            raise Overloaded(f"Timed out waiting for capacity ({self.name})", retry_after=self.retry_after())
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # A slot was handed over just as the wait ended; pass it on
+            self._release()
+        else:
+            self._waiters.remove(waiter)
+            waiter.cancel()
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        await self._acquire()
+        self.admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._hold_seconds += 0.1 * (time.monotonic() - started - self._hold_seconds)
+            self._release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "retry_after_seconds": self.retry_after(),
+        }
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from uuid import uuid4
+
+# Partition holding the change entries, and the single item holding the version counter
+FEED = "servers"
+HEAD_KEY = {"feed": "head", "version": 0}
+
+
+class Change(NamedTuple):
+    version: int
+    server_id: str
+    replica: str
+    at: float  # epoch seconds when the change was published
+
+
+class InMemoryChangeLog:
+    """Process-local change log, used when running without DynamoDB."""
+
+    def __init__(self):
+        self._changes: List[Change] = []
+        self._lock = threading.Lock()
+
+    def head(self) -> int:
+        with self._lock:
+            return len(self._changes)
+
+    def append(self, server_ids: List[str], replica: str) -> List[int]:
+        with self._lock:
+            first = len(self._changes) + 1
+            now = time.time()
+            self._changes += [Change(first + i, server_id, replica, now) for i, server_id in enumerate(server_ids)]
+            return list(range(first, first + len(server_ids)))
+
+    def read_after(self, version: int, limit: int) -> List[Change]:
+        with self._lock:
+            return self._changes[version:version + limit]
+
+
+class DynamoChangeLog:
+    """Version-ordered change log in a DynamoDB table (partition key "feed", sort key "version").
+
+    Versions come from an atomic counter item, so every replica sees one global order. Entries expire
+    through the table's TTL attribute after `retention_seconds`.
+    """
+
+    def __init__(self, dynamodb, table_name: str, retention_seconds: int = 7 * 24 * 3600):
+        self.table = dynamodb.Table(table_name)
+        self.retention_seconds = retention_seconds
+
+    def head(self) -> int:
+        item = self.table.get_item(Key=HEAD_KEY, ConsistentRead=True).get("Item")
+        return int(item["head"]) if item else 0
+
+    def append(self, server_ids: List[str], replica: str) -> List[int]:
+        # Reserve a contiguous block of versions with one counter update
+        response = self.table.update_item(
+            Key=HEAD_KEY,
+            UpdateExpression="ADD head :count",
+            ExpressionAttributeValues={":count": len(server_ids)},
+            ReturnValues="UPDATED_NEW",
+        )
+        last = int(response["Attributes"]["head"])
+        versions = list(range(last - len(server_ids) + 1, last + 1))
+        now = time.time()
+        with self.table.batch_writer() as batch:
+            for version, server_id in zip(versions, server_ids):
+                batch.put_item(Item={
+                    "feed": FEED,
+                    "version": version,
+                    "server_id": server_id,
+                    "replica": replica,
+                    "at": Decimal(str(round(now, 3))),
+                    "expires_at": int(now) + self.retention_seconds,
+                })
+        return versions
+
+    def read_after(self, version: int, limit: int) -> List[Change]:
+        from boto3.dynamodb.conditions import Key
+
+        response = self.table.query(
+            KeyConditionExpression=Key("feed").eq(FEED) & Key("version").gt(version),
+            Limit=limit,
+            ConsistentRead=True,
+        )
+        return [
+            Change(int(item["version"]), item["server_id"], item["replica"], float(item["at"]))
+            for item in response.get("Items", [])
+        ]
+
+
+class ChangeFeed:
+    """Keeps every replica's index in step: publishes this replica's server writes to the shared change log
+    and applies the other replicas' changes, in version order, by re-reading the changed records.
+
+    A version missing from the log may belong to a write still in flight on another replica, so it is waited
+    for up to `gap_grace_seconds` before being skipped. A change that fails to apply is retried on the next
+    `max_apply_attempts - 1` polls, then logged, counted and skipped so it can't stall later changes; the
+    server catches up at its next change or the next startup sync (`applied_through` keeps index snapshots
+    from claiming to be synced past it). Must be used from the event loop.
+    """
+
+    def __init__(self, change_log, executor, apply_change: Callable[[str], Awaitable[None]],
+                 replica_id: Optional[str] = None, poll_interval_seconds: float = 1.0, batch_size: int = 100,
+                 gap_grace_seconds: float = 10.0, max_apply_attempts: int = 5):
+        self.change_log = change_log
+        self.executor = executor
+        self.apply_change = apply_change
+        self.replica_id = replica_id or str(uuid4())
+        self.poll_interval_seconds = poll_interval_seconds
+        self.batch_size = batch_size
+        self.gap_grace_seconds = gap_grace_seconds
+        self.max_apply_attempts = max_apply_attempts
+        self.applied_version = 0
+        self.head_version = 0
+        # Publish time of the oldest change not yet applied (None when caught up)
+        self.behind_since: Optional[float] = None
+        # Server id -> publish time of its oldest change given up on, until a later change to it applies
+        self._given_up: Dict[str, float] = {}
+        self._pending: List[str] = []
+        self._wakeup = asyncio.Event()
+        self._gap_since: Optional[float] = None
+        # Failed attempts at applying the change after applied_version
+        self._apply_attempts = 0
+        self._tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.applied = 0
+        self.skipped_versions = 0
+        self.failed = 0
+
+    def record(self, server) -> None:
+        """ServerStore write listener: queue the server for publishing."""
+        self._pending.append(server.id)
+        self._wakeup.set()
+
+    async def publish(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            await self.executor.run(self.change_log.append, list(dict.fromkeys(pending)), self.replica_id)
+        except Exception:
+            self._pending = pending + self._pending
+            raise
+        self.published += len(pending)
+
+    async def poll(self) -> bool:
+        """Apply the next batch of changes; returns whether there may be more waiting."""
+        self.head_version = await self.executor.run(self.change_log.head)
+        changes = await self.executor.run(self.change_log.read_after, self.applied_version, self.batch_size)
+        for change in changes:
+            if change.version != self.applied_version + 1:
+                if self._gap_since is None:
+                    self._gap_since = time.monotonic()
+                if time.monotonic() - self._gap_since < self.gap_grace_seconds:
+                    self.behind_since = change.at
+                    return False
+                print(f"⚠️ Change feed versions {self.applied_version + 1}-{change.version - 1} never arrived, skipping")
+                self.skipped_versions += change.version - self.applied_version - 1
+            self._gap_since = None
+
+            if change.replica != self.replica_id:
+                try:
+                    await self.apply_change(change.server_id)
+                except Exception as e:
+                    self._apply_attempts += 1
+                    if self._apply_attempts < self.max_apply_attempts:
+                        self.behind_since = change.at
+                        raise
+                    print(f"⚠️ Giving up on change {change.version} to server {change.server_id} "
+                          f"after {self._apply_attempts} attempts: {e}")
+                    self.failed += 1
+                    self._given_up.setdefault(change.server_id, change.at)
+                else:
+                    self.applied += 1
+                    self._given_up.pop(change.server_id, None)
+                self._apply_attempts = 0
+            self.applied_version = change.version
+
+        self.behind_since = None if len(changes) < self.batch_size else changes[-1].at
+        return len(changes) == self.batch_size
+
+    @property
+    def lag_seconds(self) -> float:
+        """Age of the oldest change not yet applied (0 when caught up)."""
+        return max(0.0, time.time() - self.behind_since) if self.behind_since is not None else 0.0
+
+    def applied_through(self) -> Optional[float]:
+        """Publish time (epoch seconds) of the oldest change from other replicas that this replica has not
+        applied, whether still pending or given up on; None when there is none."""
+        outstanding = list(self._given_up.values())
+        if self.behind_since is not None:
+            outstanding.append(self.behind_since)
+        return min(outstanding) if outstanding else None
+
+    async def _run_publisher(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.publish()
+            except Exception as e:
+                print(f"⚠️ Change feed publish failed, retrying: {e}")
+                await asyncio.sleep(self.poll_interval_seconds)
+                self._wakeup.set()
+
+    async def _run_tailer(self) -> None:
+        while True:
+            more = False
+            try:
+                more = await self.poll()
+            except Exception as e:
+                print(f"⚠️ Change feed poll failed: {e}")
+            if not more:
+                await asyncio.sleep(self.poll_interval_seconds)
+
+    def start(self, from_version: int) -> None:
+        """Tail changes after `from_version` (the head read before the startup sync) and start publishing."""
+        self.applied_version = from_version
+        self._tasks = [asyncio.create_task(self._run_publisher()), asyncio.create_task(self._run_tailer())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        try:
+            await self.publish()
+        except Exception as e:
+            print(f"⚠️ Change feed final publish failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "replica_id": self.replica_id,
+            "applied_version": self.applied_version,
+            "head_version": self.head_version,
+            "versions_behind": max(0, self.head_version - self.applied_version),
+            "lag_seconds": round(self.lag_seconds, 3),
+            "published": self.published,
+            "applied": self.applied,
+            "skipped_versions": self.skipped_versions,
+            "failed": self.failed,
+            "pending_publish": len(self._pending),
+        }
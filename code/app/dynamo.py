@@ -0,0 +1,46 @@
+import time
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List
+
+# DynamoDB caps BatchGetItem at 100 keys per request
+BATCH_GET_LIMIT = 100
+
+
+def chunked(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def from_dynamo(value: Any) -> Any:
+    """Turn the Decimals boto3 returns for DynamoDB numbers back into ints and floats, recursively."""
+    if isinstance(value, dict):
+        return {key: from_dynamo(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [from_dynamo(item) for item in value]
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def batch_get_items(dynamodb, table_name: str, keys: Iterable[dict], max_retries: int = 8,
+                    consistent: bool = False) -> Iterator[dict]:
+    """Fetch items by key with BatchGetItem, retrying any UnprocessedKeys with backoff.
+
+    With `consistent`, reads are strongly consistent, so a write that has just returned is always seen.
+    """
+    keys = list(keys)
+    read_options = {"ConsistentRead": True} if consistent else {}
+    for chunk in chunked(keys, BATCH_GET_LIMIT):
+        request = {table_name: {"Keys": chunk, **read_options}}
+        attempt = 0
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            yield from response.get("Responses", {}).get(table_name, [])
+
+            unprocessed = (response.get("UnprocessedKeys") or {}).get(table_name)
+            request = {table_name: {**unprocessed, **read_options}} if unprocessed else None
+            if request:
+                attempt += 1
+                if attempt > max_retries:
+                    raise RuntimeError(f"BatchGetItem on {table_name} left keys unprocessed after {max_retries} retries")
+                time.sleep(min(0.05 * 2 ** attempt, 2.0))
@@ -0,0 +1,93 @@
+import hashlib
+from array import array
+from typing import Dict, List, Sequence
+
+from dynamo import batch_get_items
+
+# Max inputs sent to the embedding provider in a single request
+EMBED_BATCH_SIZE = 512
+
+
+def content_hash(text: str, model: str) -> str:
+    """Cache key for an embedding: the model name plus the exact document text."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob) -> List[float]:
+    vector = array("f")
+    vector.frombytes(bytes(blob))
+    return vector.tolist()
+
+
+class InMemoryEmbeddingStore:
+    """Process-local store, used when running without DynamoDB."""
+
+    def __init__(self):
+        self._vectors: Dict[str, List[float]] = {}
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        return {key: self._vectors[key] for key in keys if key in self._vectors}
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        self._vectors.update(vectors)
+
+
+class DynamoEmbeddingStore:
+    """Embeddings persisted in a DynamoDB table keyed by content hash, stored as packed float32."""
+
+    def __init__(self, dynamodb, table_name: str):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.table = dynamodb.Table(table_name)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        items = batch_get_items(self.dynamodb, self.table_name, [{"hash": key} for key in keys])
+        return {item["hash"]: unpack_vector(item["vector"]) for item in items}
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        with self.table.batch_writer(overwrite_by_pkeys=["hash"]) as batch:
+            for key, vector in vectors.items():
+                batch.put_item(Item={"hash": key, "vector": pack_vector(vector)})
+
+
+class EmbeddingCache:
+    """Embeds documents, reusing stored vectors for any text that has been embedded before."""
+
+    def __init__(self, store, backend):
+        self.store = store
+        self.embed_fn = backend.embed
+        # Keys include the backend fingerprint so vectors from different models never collide
+        self.model = backend.fingerprint
+        self.dimension = backend.dimension
+        self.enabled = backend.remote
+        self.hits = 0
+        self.misses = 0
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        if not self.enabled:
+            # Local embedding is cheaper than a cache round trip
+            return [[float(x) for x in vector] for vector in self.embed_fn(list(texts))]
+
+        keys = [content_hash(text, self.model) for text in texts]
+        vectors = self.store.get_many(list(dict.fromkeys(keys)))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            fresh = {}
+            pending = list(missing.items())
+            for start in range(0, len(pending), EMBED_BATCH_SIZE):
+                batch = pending[start:start + EMBED_BATCH_SIZE]
+                embedded = self.embed_fn([text for _, text in batch])
+                for (key, _), vector in zip(batch, embedded):
+                    fresh[key] = [float(x) for x in vector]
+            self.store.put_many(fresh)
+            vectors.update(fresh)
+
+        cached = sum(1 for key in keys if key not in missing)
+        self.hits += cached
+        self.misses += len(missing)
+        return [vectors[key] for key in keys]
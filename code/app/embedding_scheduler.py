@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from admission import DeadlineExceeded, current_deadline
+
+BatchEmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingScheduler:
+    """Coalesces query embeddings from concurrent requests into batched embedding calls.
+
+    Texts are collected for up to `max_wait_ms` (or until `max_batch_size` is reached), sent as a single
+    batch, and the vectors are fanned back out to the waiting callers. Texts whose caller has gone away or
+    whose request deadline has passed by then are left out of the batch. Must be used from the event loop.
+    """
+
+    def __init__(self, embed_batch: BatchEmbedFn, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        # (text, future, request deadline)
+        self._pending: List[Tuple[str, asyncio.Future, Optional[float]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+        self.dropped = 0
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, current_deadline.get()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts that arrived together; they are flushed right away instead of waiting out `max_wait_ms`."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future, current_deadline.get()))
+            futures.append(future)
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+        self._flush()
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future, Optional[float]]]) -> None:
+        now = time.monotonic()
+        live = []
+        for text, future, deadline in batch:
+            if future.done():
+                self.dropped += 1
+            elif deadline is not None and now >= deadline:
+                self.dropped += 1
+                future.set_exception(DeadlineExceeded("embedding"))
+            else:
+                live.append((text, future))
+        batch = live
+        if not batch:
+            return
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.texts += len(batch)
+        self.largest_batch = max(self.largest_batch, len(unique_texts))
+        try:
+            vectors = await self.embed_batch(unique_texts)
+            by_text = dict(zip(unique_texts, vectors))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "largest_batch": self.largest_batch,
+            "dropped": self.dropped,
+            "pending": len(self._pending),
+        }
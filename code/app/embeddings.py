@@ -0,0 +1,139 @@
+import asyncio
+import re
+import zlib
+from abc import ABC, abstractmethod
+from functools import cached_property
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Output dimensions of the OpenAI embedding models we support
+OPENAI_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+
+class EmbeddingBackend(ABC):
+    """Turns texts into vectors. Used for both the index build (embed) and the search hot path (aembed)."""
+
+    name: str
+    model: str
+    dimension: int
+    # Remote backends are slow and billed per call, so their vectors are worth caching
+    remote: bool = True
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the vector space. Vectors with different fingerprints must never share an index."""
+        return f"{self.name}:{self.model}:{self.dimension}"
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+    @abstractmethod
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str = "text-embedding-ada-002"):
+        if model not in OPENAI_DIMENSIONS:
+            raise ValueError(f"Unknown OpenAI embedding model: {model}")
+        self.model = model
+        self.dimension = OPENAI_DIMENSIONS[model]
+        self.api_key = api_key
+
+    # Long-lived clients keep their HTTP connection pools between calls. They (and the openai package, which
+    # is slow to import) are only loaded on the first embedding call, not at startup
+    @cached_property
+    def client(self):
+        import openai
+
+        return openai.OpenAI(api_key=self.api_key)
+
+    @cached_property
+    def async_client(self):
+        import openai
+
+        return openai.AsyncOpenAI(api_key=self.api_key)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        response = await self.async_client.embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """In-process, CPU-only embedder: signed feature hashing of words and character trigrams, L2-normalized.
+
+    No network, no model download and deterministic across processes, so it can build and query the index
+    fully offline. Quality is lexical rather than semantic; it is meant for local runs, benchmarks and
+    deployments that cannot call out to an embedding provider.
+    """
+
+    name = "local"
+    model = "hashing-v1"
+    remote = False
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+        self._features: Dict[str, Tuple[int, float]] = {}
+
+    def _feature(self, token: str) -> Tuple[int, float]:
+        feature = self._features.get(token)
+        if feature is None:
+            digest = zlib.crc32(token.encode("utf-8"))
+            feature = (digest % self.dimension, 1.0 if digest & 0x80000000 else -1.0)
+            if len(self._features) < 1_000_000:
+                self._features[token] = feature
+        return feature
+
+    def _tokens(self, text: str) -> List[str]:
+        tokens = []
+        for word in _WORD.findall(_CAMEL.sub(" ", text).lower()):
+            tokens.append(word)
+            padded = f"#{word}#"
+            tokens.extend(f"~{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return tokens
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            for token in self._tokens(text):
+                col, sign = self._feature(token)
+                rows.append(row)
+                cols.append(col)
+                values.append(sign)
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)),
+                  np.asarray(values, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+        return matrix.tolist()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        # A batch of queries is milliseconds of NumPy work; keep it off the event loop all the same
+        return await asyncio.to_thread(self.embed, texts)
+
+
+def create_embedding_backend(name: str, model: str = None, api_key: str = None, dimension: int = 512) -> EmbeddingBackend:
+    if name == "openai":
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY is required for the openai embedding backend")
+        return OpenAIEmbeddingBackend(api_key, model or "text-embedding-ada-002")
+    if name == "local":
+        return LocalEmbeddingBackend(dimension)
+    raise ValueError(f"Unknown embedding backend: {name}")
@@ -0,0 +1,63 @@
+from typing import List
+
+# Keep each Chroma write well under its max batch size
+INDEX_WRITE_BATCH_SIZE = 1000
+
+
+def tool_document(server_name: str, server_description: str, tool_name: str, tool_description: str) -> str:
+    """Text that gets embedded for a tool. Both the startup sync and registration must build it the same way."""
+    return f"[{server_name} - {server_description or ''}] - {tool_name} - {tool_description or ''}"
+
+
+def tool_metadata(server_id: str, server_name: str, tool_name: str, tool_description: str) -> dict:
+    return {
+        "server_id": server_id,
+        "server_name": server_name,
+        "tool_name": tool_name,
+        "tool_description": tool_description or ""
+    }
+
+
+def index_metadata(backend) -> dict:
+    """Which embedding backend built an index, recorded with it so vectors from different backends never mix."""
+    return {
+        "embedding_fingerprint": backend.fingerprint,
+        "embedding_backend": backend.name,
+        "embedding_model": backend.model,
+        "embedding_dimension": backend.dimension,
+    }
+
+
+def open_tools_collection(chroma_client, backend, name: str = "tools"):
+    """Open the tool collection, recording which embedding backend built it.
+
+    An existing collection built by a different backend or dimension is refused rather than mixing vectors.
+    """
+    existing = [c if isinstance(c, str) else c.name for c in chroma_client.list_collections()]
+    if name in existing:
+        collection = chroma_client.get_collection(name, embedding_function=None)
+        built_with = (collection.metadata or {}).get("embedding_fingerprint")
+        if built_with != backend.fingerprint:
+            raise RuntimeError(
+                f"Collection '{name}' was built with embeddings '{built_with}', "
+                f"refusing to mix in '{backend.fingerprint}'. Rebuild the index or switch EMBEDDING_BACKEND back."
+            )
+        return collection
+
+    return chroma_client.create_collection(name, embedding_function=None, metadata=index_metadata(backend))
+
+
+def check_dimension(vectors: List[List[float]], dimension: int):
+    for vector in vectors:
+        if len(vector) != dimension:
+            raise ValueError(f"Embedding has dimension {len(vector)}, index expects {dimension}")
+
+
+def add_tools(tools_collection, embedding_cache, ids: List[str], documents: List[str], metadatas: List[dict]):
+    """Upsert tool documents into Chroma with precomputed (cached) embeddings."""
+    embeddings = embedding_cache.embed(documents)
+    check_dimension(embeddings, embedding_cache.dimension)
+    for start in range(0, len(ids), INDEX_WRITE_BATCH_SIZE):
+        end = start + INDEX_WRITE_BATCH_SIZE
+        tools_collection.upsert(ids=ids[start:end], documents=documents[start:end],
+                                metadatas=metadatas[start:end], embeddings=embeddings[start:end])
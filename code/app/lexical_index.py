@@ -0,0 +1,168 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from ranking import ServerScore
+
+_WORD = re.compile(r"[a-z0-9]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_STOPWORDS = {"a", "an", "and", "are", "for", "i", "in", "is", "it", "me", "my", "of", "on", "or", "please",
+              "server", "servers", "the", "to", "tool", "tools", "use", "with", "what", "which"}
+
+# Field weights, applied by repeating a field's tokens
+NAME_WEIGHT = 2
+TAG_WEIGHT = 2
+TOOL_NAME_WEIGHT = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words, splitting snake_case and camelCase so `calculateSum` matches "calculate sum"."""
+    return [word for word in _WORD.findall(_CAMEL.sub(" ", text or "").lower()) if word not in _STOPWORDS]
+
+
+def normalize_phrase(text: str) -> str:
+    return " ".join(_WORD.findall(_CAMEL.sub(" ", text or "").lower()))
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over server names, descriptions, tags and tool names.
+
+    Also keeps the tag -> servers map used to prefilter searches. Thread-safe: the startup sync updates it
+    from a worker thread while searches read it on the event loop.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self._tags: Dict[str, Set[str]] = {}
+        self._tag_servers: Dict[str, Set[str]] = {}
+        self._tool_names: Dict[str, List[str]] = {}
+        # normalized server or tool name -> server ids, for exact-name lookups
+        self._names: Dict[str, Set[str]] = {}
+        self._server_names: Dict[str, List[str]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def upsert(self, server_id: str, name: str, description: str, tags: Iterable[str], tool_names: Iterable[str]) -> None:
+        tags = [tag.strip().lower() for tag in tags or [] if tag and tag.strip()]
+        tool_names = list(tool_names or [])
+        tokens = (
+            tokenize(name) * NAME_WEIGHT
+            + tokenize(description)
+            + [token for tag in tags for token in tokenize(tag)] * TAG_WEIGHT
+            + [token for tool_name in tool_names for token in tokenize(tool_name)] * TOOL_NAME_WEIGHT
+        )
+        terms = Counter(tokens)
+
+        with self._lock:
+            self.remove(server_id)
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[server_id] = count
+            self._doc_terms[server_id] = terms
+            self._doc_len[server_id] = len(tokens)
+            self._total_len += len(tokens)
+            self._tags[server_id] = set(tags)
+            for tag in tags:
+                self._tag_servers.setdefault(tag, set()).add(server_id)
+            self._tool_names[server_id] = tool_names
+            self._server_names[server_id] = [normalize_phrase(phrase) for phrase in [name] + tool_names]
+            for phrase in self._server_names[server_id]:
+                self._names.setdefault(phrase, set()).add(server_id)
+
+    def remove(self, server_id: str) -> None:
+        with self._lock:
+            terms = self._doc_terms.pop(server_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(server_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_len -= self._doc_len.pop(server_id, 0)
+            for tag in self._tags.pop(server_id, set()):
+                servers = self._tag_servers.get(tag)
+                if servers is not None:
+                    servers.discard(server_id)
+                    if not servers:
+                        del self._tag_servers[tag]
+            for phrase in self._server_names.pop(server_id, []):
+                servers = self._names.get(phrase)
+                if servers is not None:
+                    servers.discard(server_id)
+                    if not servers:
+                        del self._names[phrase]
+            self._tool_names.pop(server_id, None)
+
+    def servers_with_tags(self, tags: Iterable[str]) -> Set[str]:
+        """Servers carrying every one of the given tags."""
+        with self._lock:
+            result: Optional[Set[str]] = None
+            for tag in tags:
+                servers = self._tag_servers.get(tag.strip().lower(), set())
+                result = set(servers) if result is None else result & servers
+            return result or set()
+
+    def exact_matches(self, query: str) -> Set[str]:
+        """Servers whose name or one of whose tool names is exactly the query (ignoring case and separators)."""
+        with self._lock:
+            return set(self._names.get(normalize_phrase(query), set()))
+
+    def search(self, query: str, limit: int = 10, allowed: Optional[Set[str]] = None) -> List[ServerScore]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            doc_count = len(self._doc_len)
+            if not terms or not doc_count:
+                return []
+            avg_len = self._total_len / doc_count
+
+            scores: Dict[str, float] = {}
+            matched: Dict[str, Set[str]] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for server_id, tf in postings.items():
+                    if allowed is not None and server_id not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[server_id] / avg_len)
+                    scores[server_id] = scores.get(server_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                    matched.setdefault(server_id, set()).add(term)
+
+            ranked = sorted(scores, key=lambda server_id: -scores[server_id])[:limit]
+            results = []
+            for server_id in ranked:
+                matched_tools = [
+                    tool_name for tool_name in self._tool_names.get(server_id, [])
+                    if matched[server_id] & set(tokenize(tool_name))
+                ]
+                results.append(ServerScore(
+                    server_id=server_id,
+                    score=round(scores[server_id], 6),
+                    best_distance=None,
+                    hit_count=len(matched_tools),
+                    matched_tools=matched_tools,
+                    score_kind="bm25",
+                ))
+            return results
+
+    def covers_query(self, query: str, server_id: str) -> bool:
+        """Whether every query term occurs in the server's indexed text."""
+        terms = set(tokenize(query))
+        with self._lock:
+            doc_terms = self._doc_terms.get(server_id)
+            return bool(terms) and doc_terms is not None and all(term in doc_terms for term in terms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"servers": len(self._doc_len), "terms": len(self._postings), "tags": len(self._tag_servers)}
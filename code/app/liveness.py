@@ -0,0 +1,165 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+class LivenessTable:
+    """In-memory view of which registered servers are up, fed by heartbeats and the background prober.
+
+    Servers not seen since boot are "unknown" and treated as alive, so nothing is hidden before the first probe.
+    Only `track` may be called off the event loop (by the startup sync).
+    """
+
+    def __init__(self, stale_after_seconds: float = 120.0, failure_threshold: int = 3):
+        self.stale_after_seconds = stale_after_seconds
+        self.failure_threshold = failure_threshold
+        # server_id -> base URL, for probing
+        self.targets: Dict[str, str] = {}
+        self._last_ok: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._stale: Dict[str, bool] = {}
+        # Called with the server id whenever a server flips between alive and stale
+        self.listeners: List[Callable[[str], None]] = []
+
+    def track(self, server_id: str, url: str) -> None:
+        self.targets[server_id] = url
+
+    def record_heartbeat(self, server_id: str) -> None:
+        self._last_ok[server_id] = time.monotonic()
+        self._failures[server_id] = 0
+        self._update(server_id)
+
+    def record_probe(self, server_id: str, ok: bool) -> None:
+        if ok:
+            self.record_heartbeat(server_id)
+        else:
+            self._failures[server_id] = self._failures.get(server_id, 0) + 1
+            self._update(server_id)
+
+    def is_stale(self, server_id: str) -> bool:
+        if self._failures.get(server_id, 0) >= self.failure_threshold:
+            return True
+        last_ok = self._last_ok.get(server_id)
+        return last_ok is not None and time.monotonic() - last_ok > self.stale_after_seconds
+
+    def status(self, server_id: str) -> str:
+        if server_id not in self._last_ok and not self._failures.get(server_id):
+            return "unknown"
+        return "stale" if self.is_stale(server_id) else "alive"
+
+    def _update(self, server_id: str) -> None:
+        stale = self.is_stale(server_id)
+        if self._stale.get(server_id, False) != stale:
+            self._stale[server_id] = stale
+            print(f"{'💀' if stale else '💚'} Server {server_id} is now {'stale' if stale else 'alive'}")
+            for listener in self.listeners:
+                listener(server_id)
+
+    def refresh(self) -> None:
+        """Re-evaluate age-based staleness for every tracked server."""
+        for server_id in list(self.targets):
+            self._update(server_id)
+
+    def stats(self) -> dict:
+        counts = {"alive": 0, "stale": 0, "unknown": 0}
+        for server_id in self.targets:
+            counts[self.status(server_id)] += 1
+        return counts
+
+
+class HeartbeatWriter:
+    """Coalesces heartbeats into periodic last_heartbeat writes.
+
+    A server heartbeating every few seconds costs at most one DynamoDB write per `flush_interval_seconds`.
+    """
+
+    def __init__(self, server_store, flush_interval_seconds: float = 60.0):
+        self.server_store = server_store
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.received = 0
+        self.written = 0
+
+    def record(self, server_id: str) -> None:
+        self.received += 1
+        self._pending[server_id] = datetime.now(timezone.utc)
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        if pending:
+            await self.server_store.touch_heartbeats(pending)
+            self.written += len(pending)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ Heartbeat flush failed: {e}")
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+
+
+class LivenessProber:
+    """Periodically checks every tracked server's /health concurrently over one pooled HTTP client."""
+
+    def __init__(self, liveness: LivenessTable, interval_seconds: float = 30.0, concurrency: int = 32,
+                 timeout_seconds: float = 3.0):
+        self.liveness = liveness
+        self.interval_seconds = interval_seconds
+        self.concurrency = concurrency
+        self.timeout_seconds = timeout_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._client = None
+
+    async def probe(self, server_id: str, url: str) -> None:
+        try:
+            response = await self._client.get(f"{url.rstrip('/')}/health")
+            # Redirects are not followed; a 3xx still comes from a running server. 4xx means /health is missing
+            # or refused, which is no evidence the server works
+            ok = 200 <= response.status_code < 400
+        except Exception:
+            ok = False
+        self.liveness.record_probe(server_id, ok)
+
+    async def probe_all(self) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(server_id: str, url: str):
+            async with semaphore:
+                await self.probe(server_id, url)
+
+        await asyncio.gather(*(bounded(server_id, url) for server_id, url in list(self.liveness.targets.items())))
+        self.liveness.refresh()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"⚠️ Liveness probe round failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        import httpx
+
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self._client = httpx.AsyncClient(timeout=self.timeout_seconds, limits=limits)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._client:
+            await self._client.aclose()
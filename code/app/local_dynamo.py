@@ -0,0 +1,119 @@
+"""In-memory stand-in for the boto3 DynamoDB resource, used for RUN_LOCAL and tests."""
+import copy
+import threading
+import zlib
+from typing import Dict, List, Optional
+
+# Items returned per scan page. Real DynamoDB pages by 1 MB; a count keeps pagination exercised locally.
+DEFAULT_PAGE_SIZE = 100
+
+
+class ConditionalCheckFailed(Exception):
+    pass
+
+
+class InMemoryTable:
+    def __init__(self, name: str = "local", key_name: str = "id", page_size: int = DEFAULT_PAGE_SIZE):
+        self.name = name
+        self.table_name = name
+        self.key_name = key_name
+        self.page_size = page_size
+        self._items: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def put_item(self, Item: dict, **kwargs):
+        with self._lock:
+            self._items[Item[self.key_name]] = copy.deepcopy(Item)
+        return {}
+
+    def get_item(self, Key: dict, **kwargs):
+        with self._lock:
+            item = self._items.get(Key[self.key_name])
+        return {"Item": copy.deepcopy(item)} if item is not None else {}
+
+    def update_item(self, Key: dict, UpdateExpression: str, ExpressionAttributeValues: dict,
+                    ConditionExpression: Optional[str] = None, **kwargs):
+        """Supports the plain `SET a = :x, b = :y` updates and `attribute_exists(key)` conditions the registry uses."""
+        with self._lock:
+            item = self._items.get(Key[self.key_name])
+            if item is None:
+                if ConditionExpression and "attribute_exists" in ConditionExpression:
+                    raise ConditionalCheckFailed("The conditional request failed")
+                item = dict(Key)
+                self._items[Key[self.key_name]] = item
+            assignments = UpdateExpression.strip()[len("SET"):].split(",")
+            for assignment in assignments:
+                name, placeholder = (part.strip() for part in assignment.split("="))
+                item[name] = copy.deepcopy(ExpressionAttributeValues[placeholder])
+        return {}
+
+    def delete_item(self, Key: dict, **kwargs):
+        with self._lock:
+            self._items.pop(Key[self.key_name], None)
+        return {}
+
+    def scan(self, Segment: int = 0, TotalSegments: int = 1, ExclusiveStartKey: Optional[dict] = None,
+             Limit: Optional[int] = None, **kwargs):
+        with self._lock:
+            keys = sorted(
+                key for key in self._items
+                if zlib.crc32(key.encode("utf-8")) % TotalSegments == Segment
+            )
+            if ExclusiveStartKey is not None:
+                start = ExclusiveStartKey[self.key_name]
+                keys = [key for key in keys if key > start]
+            page_size = min(Limit or self.page_size, self.page_size)
+            page = keys[:page_size]
+            items = [copy.deepcopy(self._items[key]) for key in page]
+
+        response = {"Items": items, "Count": len(items)}
+        if len(keys) > page_size:
+            response["LastEvaluatedKey"] = {self.key_name: page[-1]}
+        return response
+
+    def batch_writer(self, **kwargs):
+        return _BatchWriter(self)
+
+    def get_many(self, keys: List[str]) -> List[dict]:
+        with self._lock:
+            return [copy.deepcopy(self._items[key]) for key in keys if key in self._items]
+
+
+class _BatchWriter:
+    def __init__(self, table: InMemoryTable):
+        self.table = table
+
+    def put_item(self, Item: dict):
+        self.table.put_item(Item=Item)
+
+    def delete_item(self, Key: dict):
+        self.table.delete_item(Key=Key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class InMemoryDynamoDB:
+    """Mimics the parts of boto3.resource("dynamodb") the registry uses."""
+
+    def __init__(self, page_size: int = DEFAULT_PAGE_SIZE):
+        self.page_size = page_size
+        self._tables: Dict[str, InMemoryTable] = {}
+        self._lock = threading.Lock()
+
+    def Table(self, name: str, key_name: str = "id") -> InMemoryTable:
+        with self._lock:
+            if name not in self._tables:
+                self._tables[name] = InMemoryTable(name, key_name=key_name, page_size=self.page_size)
+            return self._tables[name]
+
+    def batch_get_item(self, RequestItems: dict, **kwargs):
+        responses = {}
+        for table_name, request in RequestItems.items():
+            table = self.Table(table_name)
+            keys = [key[table.key_name] for key in request["Keys"]]
+            responses[table_name] = table.get_many(keys)
+        return {"Responses": responses, "UnprocessedKeys": {}}
@@ -1,21 +1,106 @@
-from fastapi import FastAPI, HTTPException
+import time
+# Startup phases are timed from here, before the imports below
+STARTED_AT = time.perf_counter()
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-import boto3
+import asyncio
 import os
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
 from uuid import uuid4
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import json
-import openai
-from chromadb.config import Settings
-import chromadb
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
-from routes import register_server, find_best_server_for_query
+from collections import Counter
+from routes import (register_server, register_servers, find_best_server_for_query, find_best_servers_for_queries,
+                    reindex_server, RegistrationTimeouts)
+from change_feed import ChangeFeed, DynamoChangeLog, InMemoryChangeLog
+from registration_jobs import RegistrationQueue, RegistrationQueueFull
+from liveness import LivenessTable, HeartbeatWriter, LivenessProber
+from lexical_index import LexicalIndex
+from embedding_cache import EmbeddingCache, DynamoEmbeddingStore, InMemoryEmbeddingStore
+from sync import sync_index, load_sync_state, save_sync_state
+from local_dynamo import InMemoryDynamoDB
+from server_cache import ServerMetadataCache
+from executors import BoundedExecutor
+from storage import ServerStore, ToolIndex
+from search_cache import SearchCache, search_key
+from embedding_scheduler import EmbeddingScheduler
+from embeddings import create_embedding_backend
+from indexing import open_tools_collection
+from snapshot_index import SnapshotWriter, open_snapshot_index
+from payloads import ServerPayloads, etag_matches
+from startup import StartupTracker
+from admission import AdmissionController, Overloaded, set_deadline
+from metrics import SEARCH_STAGE_SECONDS, REQUEST_SECONDS, RequestProfiler, hit_rate, render_metrics
 from models.server_meta_data import ServerMetadata
+startup = StartupTracker(STARTED_AT)
+startup.checkpoint("imports")
 # Load environment variables
 load_dotenv()
-OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "text-embedding-ada-002")
+LOCAL_EMBEDDING_DIM = int(os.environ.get("LOCAL_EMBEDDING_DIM", "512"))
+# When set, the Chroma index lives on disk there and boots by catching up from its sync watermark
+CHROMA_PERSIST_DIRECTORY = os.environ.get("CHROMA_PERSIST_DIRECTORY")
+# Records written this close to the start of a sync are re-applied next time, to absorb clock skew
+SYNC_WATERMARK_SKEW_SECONDS = float(os.environ.get("SYNC_WATERMARK_SKEW_SECONDS", "60"))
+# When set, tools are searched in a NumPy index memory-mapped from this snapshot file instead of Chroma,
+# re-snapshotted every INDEX_SNAPSHOT_INTERVAL_SECONDS it has changed (0: only after the startup sync)
+INDEX_SNAPSHOT_PATH = os.environ.get("INDEX_SNAPSHOT_PATH")
+INDEX_SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get("INDEX_SNAPSHOT_INTERVAL_SECONDS", "900"))
+SYNC_SCAN_SEGMENTS = int(os.environ.get("SYNC_SCAN_SEGMENTS", "4"))
+SYNC_BATCH_SIZE = int(os.environ.get("SYNC_BATCH_SIZE", "256"))
+SERVER_CACHE_MAX_ENTRIES = int(os.environ.get("SERVER_CACHE_MAX_ENTRIES", "1024"))
+SERVER_CACHE_TTL_SECONDS = float(os.environ.get("SERVER_CACHE_TTL_SECONDS", "60"))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "16"))
+INDEX_POOL_SIZE = int(os.environ.get("INDEX_POOL_SIZE", "8"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+SEARCH_CACHE_TTL_SECONDS = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", "30"))
+SERVER_PAYLOAD_CACHE_MAX_ENTRIES = int(os.environ.get("SERVER_PAYLOAD_CACHE_MAX_ENTRIES", "4096"))
+QUERY_EMBED_MAX_BATCH = int(os.environ.get("QUERY_EMBED_MAX_BATCH", "64"))
+QUERY_EMBED_MAX_WAIT_MS = float(os.environ.get("QUERY_EMBED_MAX_WAIT_MS", "5"))
+REGISTRATION_CONCURRENCY = int(os.environ.get("REGISTRATION_CONCURRENCY", "4"))
+REGISTRATION_MAX_PENDING = int(os.environ.get("REGISTRATION_MAX_PENDING", "1000"))
+BULK_REGISTRATION_MAX_SERVERS = int(os.environ.get("BULK_REGISTRATION_MAX_SERVERS", "500"))
+BULK_DISCOVERY_CONCURRENCY = int(os.environ.get("BULK_DISCOVERY_CONCURRENCY", "32"))
+HEARTBEAT_FLUSH_SECONDS = float(os.environ.get("HEARTBEAT_FLUSH_SECONDS", "60"))
+LIVENESS_PROBE_INTERVAL_SECONDS = float(os.environ.get("LIVENESS_PROBE_INTERVAL_SECONDS", "30"))  # 0 disables probing
+LIVENESS_PROBE_CONCURRENCY = int(os.environ.get("LIVENESS_PROBE_CONCURRENCY", "32"))
+LIVENESS_STALE_AFTER_SECONDS = float(os.environ.get("LIVENESS_STALE_AFTER_SECONDS", "120"))
+LIVENESS_FAILURE_THRESHOLD = int(os.environ.get("LIVENESS_FAILURE_THRESHOLD", "3"))
+STALE_SERVER_POLICY = os.environ.get("STALE_SERVER_POLICY", "exclude")  # or "downrank"
+# Keyword queries with at most this many terms, fully matched lexically, skip the embedding call (0 disables)
+LEXICAL_FAST_PATH_MAX_TERMS = int(os.environ.get("LEXICAL_FAST_PATH_MAX_TERMS", "3"))
+BATCH_SEARCH_MAX_QUERIES = int(os.environ.get("BATCH_SEARCH_MAX_QUERIES", "32"))
+# Fraction of requests run under cProfile (0 disables); reports are served from /debug/profiles
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+# How often each replica checks the change feed for other replicas' registrations
+CHANGE_FEED_POLL_SECONDS = float(os.environ.get("CHANGE_FEED_POLL_SECONDS", "1"))
+CHANGE_FEED_GAP_GRACE_SECONDS = float(os.environ.get("CHANGE_FEED_GAP_GRACE_SECONDS", "10"))
+# "background": serve at once and warm the index in a background task (/ready turns green when it is done);
+# "blocking": sync the index before serving anything
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "background")
+INDEX_WARMUP_RETRY_SECONDS = float(os.environ.get("INDEX_WARMUP_RETRY_SECONDS", "10"))
+# Admission control: searches (and bulk registrations) beyond the concurrency limit wait in a bounded queue for
+# at most the queue wait; beyond that they get 429/503 with Retry-After. Deadlines (shortened by a client's
+# X-Request-Timeout header) drop queued reads and embeddings that could no longer be answered in time
+SEARCH_MAX_CONCURRENCY = int(os.environ.get("SEARCH_MAX_CONCURRENCY", "16"))
+SEARCH_MAX_QUEUE = int(os.environ.get("SEARCH_MAX_QUEUE", "64"))
+SEARCH_MAX_QUEUE_WAIT_SECONDS = float(os.environ.get("SEARCH_MAX_QUEUE_WAIT_SECONDS", "0.5"))
+SEARCH_DEADLINE_SECONDS = float(os.environ.get("SEARCH_DEADLINE_SECONDS", "5"))
+BULK_REGISTRATION_MAX_CONCURRENCY = int(os.environ.get("BULK_REGISTRATION_MAX_CONCURRENCY", "2"))
+BULK_REGISTRATION_MAX_QUEUE = int(os.environ.get("BULK_REGISTRATION_MAX_QUEUE", "4"))
+BULK_REGISTRATION_MAX_QUEUE_WAIT_SECONDS = float(os.environ.get("BULK_REGISTRATION_MAX_QUEUE_WAIT_SECONDS", "5"))
+BULK_REGISTRATION_DEADLINE_SECONDS = float(os.environ.get("BULK_REGISTRATION_DEADLINE_SECONDS", "120"))
+REGISTRATION_TIMEOUTS = RegistrationTimeouts(
+    connect=float(os.environ.get("REGISTRATION_CONNECT_TIMEOUT", "10")),
+    list_tools=float(os.environ.get("REGISTRATION_LIST_TOOLS_TIMEOUT", "15")),
+    db_write=float(os.environ.get("REGISTRATION_DB_WRITE_TIMEOUT", "10")),
+    index=float(os.environ.get("REGISTRATION_INDEX_TIMEOUT", "60")),
+)
 
 # Setup FastAPI
 app = FastAPI(
@@ -30,53 +115,219 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+profiler = RequestProfiler(sample_rate=PROFILE_SAMPLE_RATE)
+search_admission = AdmissionController("search", SEARCH_MAX_CONCURRENCY, SEARCH_MAX_QUEUE,
+                                       max_wait_seconds=SEARCH_MAX_QUEUE_WAIT_SECONDS)
+registration_admission = AdmissionController("bulk_registration", BULK_REGISTRATION_MAX_CONCURRENCY,
+                                             BULK_REGISTRATION_MAX_QUEUE,
+                                             max_wait_seconds=BULK_REGISTRATION_MAX_QUEUE_WAIT_SECONDS)
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    started = time.perf_counter()
+    # Deadlines count from arrival, not from when the handler gets to run
+    request.state.received_at = time.monotonic()
+    with profiler.maybe_profile(f"{request.method} {request.url.path}"):
+        response = await call_next(request)
+    # Label by route template, not the raw path, so ids in paths don't create new series
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(f"{request.method} {route.path if route else 'unmatched'}", time.perf_counter() - started)
+    return response
+
+# DynamoDB clients and the tool index are opened by warm_index, off the event loop, so that importing this
+# module (and answering /health) never waits on boto3, Chroma or the index files
+dynamodb = None
+servers_table = None
+change_log = None
+tools_collection = None
+sync_state_path = None
+snapshot_writer = None
+
+embedding_backend = create_embedding_backend(EMBEDDING_BACKEND, model=EMBEDDING_MODEL,
+                                             api_key=OPENAI_API_KEY, dimension=LOCAL_EMBEDDING_DIM)
+print(f"🧩 Embedding backend: {embedding_backend.fingerprint}")
+server_cache = ServerMetadataCache(None, None, max_entries=SERVER_CACHE_MAX_ENTRIES, ttl_seconds=SERVER_CACHE_TTL_SECONDS)
+embedding_cache = EmbeddingCache(None, embedding_backend)
+
+# Blocking storage/index calls run on bounded pools, off the event loop
+db_executor = BoundedExecutor("dynamodb", DB_POOL_SIZE)
+index_executor = BoundedExecutor("index", INDEX_POOL_SIZE)
+index_write_executor = BoundedExecutor("index-writes", REGISTRATION_CONCURRENCY)
+server_store = ServerStore(None, server_cache, db_executor)
+query_embedder = EmbeddingScheduler(embedding_backend.aembed,
+                                     max_batch_size=QUERY_EMBED_MAX_BATCH, max_wait_ms=QUERY_EMBED_MAX_WAIT_MS)
+tool_index = ToolIndex(None, embedding_cache, index_executor, query_embedder, write_executor=index_write_executor)
+
+# Search results are cached until the registry changes
+search_cache = SearchCache(max_entries=SEARCH_CACHE_MAX_ENTRIES, ttl_seconds=SEARCH_CACHE_TTL_SECONDS)
+server_store.listeners.append(search_cache.invalidate)
+tool_index.listeners.append(search_cache.invalidate)
+# Serialized server records, reused across responses until the record changes
+server_payloads = ServerPayloads(max_entries=SERVER_PAYLOAD_CACHE_MAX_ENTRIES)
+server_store.listeners.append(server_payloads.invalidate)
+
+# Lexical index over names, descriptions, tags and tool names, for keyword queries, hybrid ranking and tag filters
+lexical_index = LexicalIndex()
+
+def index_server_text(server: dict):
+    lexical_index.upsert(server["id"], server.get("name", ""), server.get("description", ""),
+                         server.get("tags", []), [tool["name"] for tool in server.get("tools", [])])
+
+server_store.listeners.append(lambda server: index_server_text(server.model_dump()))
+
+# Liveness: heartbeats + background probes keep dead servers out of search results
+liveness = LivenessTable(stale_after_seconds=LIVENESS_STALE_AFTER_SECONDS, failure_threshold=LIVENESS_FAILURE_THRESHOLD)
+liveness.listeners.append(search_cache.invalidate)
+server_store.listeners.append(lambda server: liveness.track(server.id, server.url))
+heartbeat_writer = HeartbeatWriter(server_store, flush_interval_seconds=HEARTBEAT_FLUSH_SECONDS)
+liveness_prober = LivenessProber(liveness, interval_seconds=LIVENESS_PROBE_INTERVAL_SECONDS,
+                                 concurrency=LIVENESS_PROBE_CONCURRENCY)
+
+# Replicas share registrations through the change feed: local writes are published, other replicas' applied
+change_feed = ChangeFeed(None, db_executor, lambda server_id: reindex_server(server_id, server_store, tool_index),
+                         poll_interval_seconds=CHANGE_FEED_POLL_SECONDS, gap_grace_seconds=CHANGE_FEED_GAP_GRACE_SECONDS)
+server_store.write_listeners.append(change_feed.record)
+
+# Registrations run as background jobs with bounded concurrency
+registration_queue = RegistrationQueue(
+    lambda server, on_stage: register_server(server, server_store, tool_index,
+                                             timeouts=REGISTRATION_TIMEOUTS, on_stage=on_stage),
+    concurrency=REGISTRATION_CONCURRENCY,
+    max_pending=REGISTRATION_MAX_PENDING,
+)
 
-# Setup DynamoDB
-if os.environ.get("RUN_LOCAL") == "True":
-    print("⚠️ MOCKING DYNAMODB")
-    from unittest.mock import MagicMock
-    servers_table = MagicMock()
-else:
-    region = os.environ.get("AWS_REGION", "us-east-2")
-    table_name = os.environ["DYNAMODB_TABLE_NAME"]
-    dynamodb = boto3.resource("dynamodb", region_name=region)
-    servers_table = dynamodb.Table(table_name)
-
-# Setup Chroma
-chroma_client = chromadb.Client(Settings(persist_directory="./chroma_index"))
-embedding_function = OpenAIEmbeddingFunction(api_key=OPENAI_API_KEY)
-tools_collection = chroma_client.get_or_create_collection("tools", embedding_function=embedding_function)
-
-# Load all tools into Chroma
+def open_storage():
+    """Blocking: create the DynamoDB clients (importing boto3) and hand them to the components using them."""
+    global dynamodb, servers_table, change_log
+    if os.environ.get("RUN_LOCAL") == "True":
+        print("⚠️ MOCKING DYNAMODB")
+        dynamodb = InMemoryDynamoDB()
+        servers_table = dynamodb.Table("servers")
+        embedding_store = InMemoryEmbeddingStore()
+        change_log = InMemoryChangeLog()
+    else:
+        import boto3
+
+        region = os.environ.get("AWS_REGION", "us-east-2")
+        dynamodb = boto3.resource("dynamodb", region_name=region)
+        servers_table = dynamodb.Table(os.environ["DYNAMODB_TABLE_NAME"])
+        embedding_store = DynamoEmbeddingStore(dynamodb, os.environ["EMBEDDING_CACHE_TABLE_NAME"])
+        change_log = DynamoChangeLog(dynamodb, os.environ["CHANGE_FEED_TABLE_NAME"])
+    server_cache.dynamodb, server_cache.table_name = dynamodb, servers_table.name
+    server_store.servers_table = servers_table
+    embedding_cache.store = embedding_store
+    change_feed.change_log = change_log
+
+def open_index():
+    """Blocking: map the index snapshot, or open Chroma (importing chromadb), and hand it to the tool index."""
+    global tools_collection, sync_state_path, snapshot_writer
+    if INDEX_SNAPSHOT_PATH:
+        tools_collection = open_snapshot_index(INDEX_SNAPSHOT_PATH, embedding_backend)
+        snapshot_writer = SnapshotWriter(tools_collection, INDEX_SNAPSHOT_PATH, index_write_executor,
+                                         interval_seconds=INDEX_SNAPSHOT_INTERVAL_SECONDS,
+                                         watermark_skew_seconds=SYNC_WATERMARK_SKEW_SECONDS,
+                                         applied_through=change_feed.applied_through)
+    else:
+        import chromadb
+
+        if CHROMA_PERSIST_DIRECTORY:
+            chroma_client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIRECTORY)
+            sync_state_path = os.path.join(CHROMA_PERSIST_DIRECTORY, "sync_state.json")
+        else:
+            chroma_client = chromadb.EphemeralClient()
+        tools_collection = open_tools_collection(chroma_client, embedding_backend)
+    tool_index.tools_collection = tools_collection
+
+def track_server(server: dict):
+    index_server_text(server)
+    liveness.track(server["id"], server["url"])
+
+# Load all tools into the index (or catch a persisted index or snapshot up from its watermark)
 def sync_chroma_from_dynamodb():
-    response = servers_table.scan()
-    servers = response.get("Items", [])
-    print(f"🔄 Syncing {len(servers)} servers into Chroma")
-
-    documents, ids, metadatas = [], [], []
-
-    for server in servers:
-        for tool in server.get("tools", []):
-            tool_id = f"{server['id']}:{tool['name']}"
-            text = f"[{server['name']} - {server.get('description', '')}] - {tool['name']} - {tool.get('description', '')}"
-            metadata = {
-                "server_id": server["id"],
-                "server_name": server["name"],
-                "tool_name": tool["name"],
-                "tool_description": tool.get("description", "")
-            }
-            documents.append(text)
-            ids.append(tool_id)
-            metadatas.append(metadata)
-
-    if documents:
-        tools_collection.add(documents=documents, ids=ids, metadatas=metadatas)
-        print(f"✅ Indexed {len(documents)} tools in Chroma.")
+    since = None
+    if snapshot_writer:
+        state = tools_collection.sync_state()
+    else:
+        state = load_sync_state(sync_state_path) if sync_state_path else None
+    if state and state.get("fingerprint") == embedding_backend.fingerprint and tools_collection.count() > 0:
+        since = datetime.fromisoformat(state["watermark"].replace("Z", "+00:00"))
+        print(f"💾 Loaded {tools_collection.count()} tools from disk, catching up from {state['watermark']}")
+
+    started_at = datetime.now(timezone.utc)
+    startup.progress = {}
+    stats = sync_index(servers_table, tools_collection, embedding_cache,
+                       total_segments=SYNC_SCAN_SEGMENTS, batch_size=SYNC_BATCH_SIZE, since=since,
+                       on_server=track_server, stats=startup.progress)
+    print(f"✅ Indexed {stats['tools']} tools from {stats['servers']} servers "
+          f"({stats['pages']} pages, {stats['batches']} batches) in the tool index.")
+
+    if snapshot_writer:
+        snapshot_writer.save(synced_at=started_at)
+    elif sync_state_path:
+        save_sync_state(sync_state_path, started_at - timedelta(seconds=SYNC_WATERMARK_SKEW_SECONDS),
+                        embedding_backend.fingerprint)
+
+startup.checkpoint("setup")
+
+async def warm_index(retry: bool = True):
+    """Open storage and the index, sync it, then start everything that needs it.
+    Retried until it succeeds unless `retry` is off."""
+    startup.warming()
+    while True:
+        try:
+            if servers_table is None:
+                await db_executor.run(open_storage)
+                startup.checkpoint("storage_clients")
+            if tools_collection is None:
+                await index_executor.run(open_index)
+                startup.checkpoint("index_open")
+            # Changes published during the sync are replayed from the feed afterwards
+            feed_version = await db_executor.run(change_log.head)
+            await index_executor.run(sync_chroma_from_dynamodb)
+            break
+        except Exception as e:
+            startup.failed(e)
+            if not retry:
+                raise
+            print(f"⚠️ Index warm-up failed, retrying in {INDEX_WARMUP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(INDEX_WARMUP_RETRY_SECONDS)
+            startup.warming()
+    startup.checkpoint("index_sync")
+    change_feed.start(feed_version)
+    if snapshot_writer:
+        snapshot_writer.start()
+    # Registrations wait for the sync, which would otherwise re-apply records older than theirs
+    registration_queue.start()
+    heartbeat_writer.start()
+    if LIVENESS_PROBE_INTERVAL_SECONDS > 0:
+        liveness_prober.start()
+    startup.set_ready()
+
+warm_up_task = None
 
 # Startup logic
 @app.on_event("startup")
 async def startup_event():
-    sync_chroma_from_dynamodb()
+    global warm_up_task
+    startup.checkpoint("app_start")
+    if STARTUP_MODE == "blocking":
+        await warm_index(retry=False)
+    else:
+        warm_up_task = asyncio.create_task(warm_index())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if warm_up_task:
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+    await registration_queue.stop()
+    await change_feed.stop()
+    if snapshot_writer:
+        await snapshot_writer.stop()
+    await liveness_prober.stop()
+    await heartbeat_writer.stop()
+    for executor in (db_executor, index_executor, index_write_executor):
+        executor.shutdown()
 
 # === Models ===
 
@@ -85,20 +336,250 @@ async def startup_event():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up and serving. See /ready for whether the index can answer searches."""
     return {"status": "ok"}
 
-@app.post("/register_server")
+@app.get("/ready")
+async def readiness_check():
+    """Readiness (the load balancer health check): 200 once the index is warm, 503 with progress until then."""
+    return JSONResponse(status_code=200 if startup.ready else 503, content=startup.report())
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+def start_deadline(http_request: Request, default_seconds: float) -> None:
+    set_deadline(http_request.state.received_at, default_seconds, http_request.headers.get("X-Request-Timeout"))
+
+def not_ready() -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": "Index is warming up", **startup.report()},
+                        headers={"Retry-After": str(int(INDEX_WARMUP_RETRY_SECONDS))})
+
+@app.get("/pool_stats")
+async def pool_stats():
+    stats = {executor.name: executor.stats() for executor in (db_executor, index_executor, index_write_executor)}
+    stats["registration"] = registration_queue.stats()
+    stats["change_feed"] = change_feed.stats()
+    stats["admission"] = {controller.name: controller.stats() for controller in (search_admission, registration_admission)}
+    return stats
+
+@app.get("/cache_stats")
+async def cache_stats():
+    return {
+        "search": search_cache.stats(),
+        "query_embeddings": query_embedder.stats(),
+        "lexical": lexical_index.stats(),
+        "server_payloads": server_payloads.stats(),
+        **({"index_snapshot": tools_collection.stats()} if snapshot_writer else {}),
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition: per-stage latency histograms, cache hit rates, index size and pool usage."""
+    indexed_tools = await index_executor.run(tools_collection.count) if tools_collection is not None else 0
+    executors = (db_executor, index_executor, index_write_executor)
+    registration_stats = registration_queue.stats()
+    feed_stats = change_feed.stats()
+    admission = (search_admission, registration_admission)
+    gauges = [
+        ("mcp_registry_ready", "1 once the index has warmed up and searches are served.", int(startup.ready)),
+        ("mcp_registry_startup_phase_seconds", "Duration of each startup phase.",
+         {(("phase", phase),): seconds for phase, seconds in startup.phases.items()}),
+        ("mcp_registry_cache_hit_ratio", "Fraction of lookups served from cache since startup.", {
+            (("cache", "search"),): hit_rate(search_cache.hits, search_cache.misses),
+            (("cache", "server_metadata"),): hit_rate(server_cache.hits, server_cache.misses),
+            (("cache", "embeddings"),): hit_rate(embedding_cache.hits, embedding_cache.misses),
+            (("cache", "server_payloads"),): hit_rate(server_payloads.hits, server_payloads.misses),
+        }),
+        ("mcp_registry_search_cache_entries", "Cached search results.", search_cache.stats()["entries"]),
+        ("mcp_registry_indexed_tools", "Tools in the vector index.", indexed_tools),
+        ("mcp_registry_indexed_servers", "Servers in the lexical index.", len(lexical_index)),
+        ("mcp_registry_change_feed_lag_seconds", "Age of the oldest change from other replicas not yet applied.",
+         feed_stats["lag_seconds"]),
+        ("mcp_registry_change_feed_versions_behind", "Change feed entries not yet applied by this replica.",
+         feed_stats["versions_behind"]),
+        ("mcp_registry_pool_active", "Busy worker threads per pool.",
+         {(("pool", executor.name),): executor.stats()["active"] for executor in executors}),
+        ("mcp_registry_pool_queued", "Calls waiting for a worker thread per pool.",
+         {(("pool", executor.name),): executor.stats()["queued"] for executor in executors}),
+        ("mcp_registry_admission_active", "Requests holding an admission slot, by kind.",
+         {(("kind", controller.name),): controller.active for controller in admission}),
+        ("mcp_registry_admission_queued", "Requests waiting for an admission slot, by kind.",
+         {(("kind", controller.name),): controller.stats()["queued"] for controller in admission}),
+        ("mcp_registry_registration_jobs", "Retained registration jobs by status.",
+         {(("status", status),): registration_stats[status] for status in ("queued", "running", "succeeded", "failed")}),
+    ]
+    counters = [
+        ("mcp_registry_admission_shed_total", "Requests turned away since startup, by kind and reason.", {
+            **{(("kind", controller.name), ("reason", "queue_full")): controller.rejected for controller in admission},
+            **{(("kind", controller.name), ("reason", "queue_timeout")): controller.expired for controller in admission},
+        }),
+    ]
+    return PlainTextResponse(render_metrics(gauges, counters=counters), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profiles")
+async def debug_profiles(route: Optional[str] = None):
+    """Most recent sampled request profiles (enable with PROFILE_SAMPLE_RATE)."""
+    return {"sample_rate": profiler.sample_rate, "profiles": profiler.latest(route)}
+
+@app.post("/register_server", status_code=202)
 async def register_server_endpoint(server_metadata: dict):
     server = ServerMetadata.model_validate(server_metadata)
-    return await register_server(server, servers_table, tools_collection)
+    try:
+        job = registration_queue.submit(server)
+    except RegistrationQueueFull as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "5"})
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/register_server/jobs/{job.job_id}",
+    }
+
+class BulkRegistrationRequest(BaseModel):
+    servers: List[ServerMetadata] = Field(..., min_length=1)
+
+    @field_validator("servers")
+    @classmethod
+    def unique_ids(cls, servers: List[ServerMetadata]) -> List[ServerMetadata]:
+        # Both copies would be written and their tools upserted twice in one index call, failing the batch
+        counts = Counter(server.id for server in servers if server.id)
+        duplicates = sorted(server_id for server_id, count in counts.items() if count > 1)
+        if duplicates:
+            raise ValueError(f"Duplicate server ids: {', '.join(duplicates)}")
+        return servers
+
+@app.post("/register_servers")
+async def register_servers_endpoint(request: BulkRegistrationRequest, http_request: Request):
+    if not startup.ready:
+        return not_ready()
+    if len(request.servers) > BULK_REGISTRATION_MAX_SERVERS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_REGISTRATION_MAX_SERVERS} servers per request")
+    # Each admitted request holds up to BULK_DISCOVERY_CONCURRENCY outbound SSE sessions
+    start_deadline(http_request, BULK_REGISTRATION_DEADLINE_SECONDS)
+    async with registration_admission.admit():
+        results = await register_servers(request.servers, server_store, tool_index, timeouts=REGISTRATION_TIMEOUTS,
+                                         discovery_concurrency=BULK_DISCOVERY_CONCURRENCY)
+    return {
+        "registered": sum(1 for result in results if result["status"] == "registered"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "results": results,
+    }
+
+@app.get("/register_server/jobs/{job_id}")
+async def registration_job_status(job_id: str):
+    job = registration_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown registration job: {job_id}")
+    return job
+
+@app.post("/servers/{server_id}/heartbeat")
+async def heartbeat_endpoint(server_id: str):
+    if servers_table is None:
+        return not_ready()
+    if server_id not in liveness.targets and await server_store.get(server_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown server: {server_id}")
+    liveness.record_heartbeat(server_id)
+    heartbeat_writer.record(server_id)
+    return {"status": "ok"}
 
-class ServerSearchRequest(BaseModel):
+@app.get("/liveness")
+async def liveness_stats():
+    return {
+        **liveness.stats(),
+        "heartbeats_received": heartbeat_writer.received,
+        "heartbeats_written": heartbeat_writer.written,
+    }
+
+class SearchOptions(BaseModel):
+    top_k: int = Field(10, ge=1, le=100, description="Number of servers to return")
+    offset: int = Field(0, ge=0, le=1000, description="Number of ranked servers to skip (pagination)")
+    n_results: int = Field(10, ge=1, le=500, description="Number of nearest tools to aggregate into server scores")
+    fusion: Literal["max", "sum", "rrf"] = Field("max", description="How tool-level hits are fused into a server score")
+    tags: List[str] = Field(default_factory=list, description="Only return servers carrying all of these tags")
+    mode: Literal["hybrid", "vector", "lexical"] = Field("hybrid", description="Which indexes rank the results")
+    view: Literal["summary", "full"] = Field(
+        "summary", description="summary: id, name, url, score and matched tools (ServerSummary); full: ServerMatch"
+    )
+
+class ServerSearchRequest(SearchOptions):
     query: str
-    
+
+class BatchServerSearchRequest(SearchOptions):
+    queries: List[str] = Field(..., min_length=1, description="Queries ranked independently with the same options")
+
 @app.post("/search_servers")
-async def search_servers_endpoint(request: ServerSearchRequest):
+async def search_servers_endpoint(request: ServerSearchRequest, http_request: Request):
+    # A half-synced index would give (and cache) incomplete results
+    if not startup.ready:
+        return not_ready()
+    start_deadline(http_request, SEARCH_DEADLINE_SECONDS)
     try:
-        return await find_best_server_for_query(request.query, servers_table, tools_collection)
+        params = request.model_dump(exclude={"query", "view"})
+
+        async def search() -> bytes:
+            # Only cache misses take an admission slot; hits and coalesced duplicates cost next to nothing
+            async with search_admission.admit():
+                results = await find_best_server_for_query(request.query, tool_index, server_store, liveness=liveness,
+                                                           stale_policy=STALE_SERVER_POLICY, lexical_index=lexical_index,
+                                                           fast_path_max_terms=LEXICAL_FAST_PATH_MAX_TERMS, **params)
+                with SEARCH_STAGE_SECONDS.time("serialize"):
+                    return server_payloads.matches(results, request.view)
+
+        # Cached as the encoded response body, so repeated queries skip serialization too
+        body = await search_cache.get_or_compute(search_key(request.query, view=request.view, **params), search)
+        return Response(content=body, media_type="application/json")
 
+    except Overloaded:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@app.post("/search_servers/batch")
+async def search_servers_batch_endpoint(request: BatchServerSearchRequest, http_request: Request):
+    """Rank servers for several queries in one round trip (one embedding batch, one index query, one lookup)."""
+    if len(request.queries) > BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_SEARCH_MAX_QUERIES} queries per request")
+    if not startup.ready:
+        return not_ready()
+    start_deadline(http_request, SEARCH_DEADLINE_SECONDS)
+    try:
+        params = request.model_dump(exclude={"queries", "view"})
+        async with search_admission.admit():
+            results = await find_best_servers_for_queries(request.queries, tool_index, server_store, liveness=liveness,
+                                                          stale_policy=STALE_SERVER_POLICY, lexical_index=lexical_index,
+                                                          fast_path_max_terms=LEXICAL_FAST_PATH_MAX_TERMS, **params)
+        with SEARCH_STAGE_SECONDS.time("serialize"):
+            body = server_payloads.batch(request.queries, results, request.view)
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+    return Response(content=body, media_type="application/json")
+
+@app.get("/servers/{server_id}")
+async def server_detail_endpoint(server_id: str):
+    """Full server record, tools and input schemas included."""
+    if servers_table is None:
+        return not_ready()
+    server = await server_store.get(server_id)
+    if server is None:
+        raise HTTPException(status_code=404, detail=f"Unknown server: {server_id}")
+    return Response(content=server_payloads.full(server), media_type="application/json")
+
+@app.get("/servers/{server_id}/tools")
+async def server_tools_endpoint(server_id: str, if_none_match: Optional[str] = Header(None)):
+    """The server's tools in OpenAI function-calling format, ready to pass as `tools`.
+
+    Versioned by ETag: clients holding a cached copy send If-None-Match and get 304 while it is current.
+    """
+    if servers_table is None:
+        return not_ready()
+    server = await server_store.get(server_id)
+    if server is None:
+        raise HTTPException(status_code=404, detail=f"Unknown server: {server_id}")
+    body, tools_etag = server_payloads.tools(server)
+    headers = {"ETag": tools_etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, tools_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
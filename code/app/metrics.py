@@ -0,0 +1,169 @@
+"""Per-stage latency histograms, gauges and counters, rendered in the Prometheus text exposition format."""
+import bisect
+import cProfile
+import io
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Seconds; spans sub-millisecond cache hits up to slow registrations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Histogram:
+    """Latency histogram with one series per value of a single label (e.g. the stage). Thread-safe."""
+
+    def __init__(self, name: str, documentation: str, label: str = "stage", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        # label value -> (per-bucket counts, with a final +Inf bucket, sum)
+        self._series: Dict[str, Tuple[List[int], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts, total = self._series.get(label_value) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._series[label_value] = (counts, total + seconds)
+
+    @contextmanager
+    def time(self, label_value: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(label_value, time.perf_counter() - started)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {label_value: (list(counts), total) for label_value, (counts, total) in self._series.items()}
+        for label_value, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels({self.label: label_value, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels({self.label: label_value})
+            lines.append(f"{self.name}_sum{labels} {total!r}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+SEARCH_STAGE_SECONDS = Histogram(
+    "mcp_registry_search_stage_seconds",
+    "Time spent in each stage of a server search.",
+)
+REGISTRATION_STAGE_SECONDS = Histogram(
+    "mcp_registry_registration_stage_seconds",
+    "Time spent in each stage of a server registration.",
+)
+REQUEST_SECONDS = Histogram(
+    "mcp_registry_request_seconds",
+    "End-to-end request latency by route.",
+    label="route",
+)
+HISTOGRAMS = (SEARCH_STAGE_SECONDS, REGISTRATION_STAGE_SECONDS, REQUEST_SECONDS)
+
+GaugeValue = Union[float, Dict[Tuple[Tuple[str, str], ...], float]]
+
+
+def render_gauge(name: str, documentation: str, value: GaugeValue, kind: str = "gauge") -> List[str]:
+    """A gauge with a single value, or one value per label set given as a tuple of (name, value) pairs."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    values = value if isinstance(value, dict) else {(): value}
+    for labels, sample in values.items():
+        lines.append(f"{name}{_format_labels(dict(labels))} {_format_value(sample)}")
+    return lines
+
+
+def render_counter(name: str, documentation: str, value: GaugeValue) -> List[str]:
+    """Like render_gauge, for a monotonic count since startup; `name` must end in _total."""
+    return render_gauge(name, documentation, value, kind="counter")
+
+
+def hit_rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+def render_metrics(gauges: Iterable[Tuple[str, str, GaugeValue]] = (),
+                   histograms: Iterable[Histogram] = HISTOGRAMS,
+                   counters: Iterable[Tuple[str, str, GaugeValue]] = ()) -> str:
+    lines: List[str] = []
+    for histogram in histograms:
+        lines += histogram.render()
+    for name, documentation, value in gauges:
+        lines += render_gauge(name, documentation, value)
+    for name, documentation, value in counters:
+        lines += render_counter(name, documentation, value)
+    return "\n".join(lines) + "\n"
+
+
+class RequestProfiler:
+    """Opt-in sampling profiler: runs cProfile over a random `sample_rate` fraction of requests.
+
+    Only one request is profiled at a time (the interpreter allows a single active profiler). The profile
+    covers everything the event loop thread ran meanwhile, so it can include other concurrent requests;
+    work done on the executor pools is not captured. The most recent `max_profiles` reports are kept.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, max_profiles: int = 20, top_functions: int = 40):
+        self.sample_rate = sample_rate
+        self.top_functions = top_functions
+        self.profiles: deque = deque(maxlen=max_profiles)
+        self._active = False
+
+    @contextmanager
+    def maybe_profile(self, route: str):
+        if self._active or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            yield
+            return
+
+        self._active = True
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._active = False
+            self.profiles.append(self._report(route, time.perf_counter() - started, profile))
+
+    def _report(self, route: str, seconds: float, profile: cProfile.Profile) -> dict:
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(self.top_functions)
+        return {
+            "route": route,
+            "at": datetime.now(timezone.utc).isoformat(),
+            "seconds": round(seconds, 6),
+            "profile": output.getvalue(),
+        }
+
+    def latest(self, route: Optional[str] = None) -> List[dict]:
+        return [profile for profile in reversed(self.profiles) if route is None or profile["route"] == route]
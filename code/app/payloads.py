@@ -0,0 +1,144 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from dynamo import from_dynamo
+from models.server_meta_data import ServerMetadata
+from ranking import ServerScore
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder produces the same JSON, just slower
+    orjson = None
+
+SEARCH_VIEWS = ("summary", "full")
+# Fields of ServerMetadata included in the summary projection
+SUMMARY_FIELDS = ("id", "name", "url")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def function_tool(tool: dict) -> dict:
+    """An MCP tool (as serialized in a server record) in OpenAI function-calling format."""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool["name"],
+            "description": tool.get("description") or "",
+            "parameters": {**(tool.get("inputSchema") or {"type": "object", "properties": {}}),
+                           "additionalProperties": False},
+        },
+    }
+
+
+def etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], current: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return "*" in candidates or any(candidate.removeprefix("W/") == current for candidate in candidates)
+
+
+def tool_dicts(server: ServerMetadata) -> List[dict]:
+    """The server's tools as JSON-ready dicts. Records read from DynamoDB hold schema numbers as Decimals, which
+    model_dump(mode="json") would emit as strings, so they are turned back into numbers first."""
+    return [from_dynamo(tool.model_dump()) for tool in server.tools]
+
+
+def _with_fields(record_json: bytes, fields: dict) -> bytes:
+    """Append fields to an already-serialized JSON object."""
+    return record_json[:-1] + b"," + dumps(fields)[1:]
+
+
+class _Payload:
+    __slots__ = ("server", "full", "summary", "tools", "tools_etag")
+
+    def __init__(self, server: ServerMetadata):
+        record = server.model_dump(mode="json")
+        record["tools"] = tool_dicts(server)
+        self.server = server
+        self.full = dumps(record)
+        self.summary = dumps({field: record[field] for field in SUMMARY_FIELDS})
+        # Built on first request; most records are only ever seen in search results
+        self.tools: Optional[bytes] = None
+        self.tools_etag: Optional[str] = None
+
+
+class ServerPayloads:
+    """Serialized JSON for server records, computed once per record rather than on every response.
+
+    An entry is reused only while the metadata cache hands back the very same record object, so a reloaded
+    or re-registered record is re-serialized; `invalidate` (a ServerStore listener) drops it eagerly.
+    Must only be used from the event loop thread.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Payload]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, server: ServerMetadata) -> _Payload:
+        entry = self._entries.get(server.id)
+        if entry is not None and entry.server is server:
+            self._entries.move_to_end(server.id)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = _Payload(server)
+        self._entries[server.id] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def full(self, server: ServerMetadata) -> bytes:
+        return self._get(server).full
+
+    def tools(self, server: ServerMetadata) -> Tuple[bytes, str]:
+        """The server's tools in function-calling format, and their ETag."""
+        entry = self._get(server)
+        if entry.tools is None:
+            entry.tools = dumps([function_tool(tool) for tool in tool_dicts(server)])
+            entry.tools_etag = etag(entry.tools)
+        return entry.tools, entry.tools_etag
+
+    def match(self, entry: ServerScore, server: ServerMetadata, view: str = "summary") -> bytes:
+        """One search result: the record (or its summary) plus the match fields of ServerMatch/ServerSummary."""
+        payload = self._get(server)
+        if view == "full":
+            return _with_fields(payload.full, {
+                "score": entry.score,
+                "score_kind": entry.score_kind,
+                "best_distance": entry.best_distance,
+                "hit_count": entry.hit_count,
+                "matched_tools": entry.matched_tools,
+            })
+        return _with_fields(payload.summary, {"score": entry.score, "score_kind": entry.score_kind,
+                                              "matched_tools": entry.matched_tools})
+
+    def matches(self, results: Sequence[Tuple[ServerScore, ServerMetadata]], view: str = "summary") -> bytes:
+        return b"[" + b",".join(self.match(entry, server, view) for entry, server in results) + b"]"
+
+    def batch(self, queries: List[str], results: List[Sequence[Tuple[ServerScore, ServerMetadata]]],
+              view: str = "summary") -> bytes:
+        items = [
+            b'{"query":' + dumps(query) + b',"servers":' + self.matches(matches, view) + b"}"
+            for query, matches in zip(queries, results)
+        ]
+        return b'{"results":[' + b",".join(items) + b"]}"
+
+    def invalidate(self, server: ServerMetadata) -> None:
+        self._entries.pop(server.id, None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,107 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+FUSION_METHODS = ("max", "sum", "rrf")
+# Standard reciprocal-rank-fusion damping constant
+RRF_K = 60
+# What a ServerScore.score measures, by how it was ranked. Scores are only comparable within one kind:
+#   similarity      best tool's 1 / (1 + distance), in (0, 1]   (vector, fusion "max")
+#   similarity_sum  sum of the matching tools' similarities      (vector, fusion "sum")
+#   rrf             reciprocal rank fusion, at most ~0.033 per ranking fused (vector "rrf", hybrid)
+#   bm25            BM25 of the query against the server's text, unbounded (lexical and the fast path)
+FUSION_SCORE_KINDS = {"max": "similarity", "sum": "similarity_sum", "rrf": "rrf"}
+
+
+class ServerScore(NamedTuple):
+    server_id: str
+    score: float
+    best_distance: Optional[float]  # None for purely lexical matches
+    hit_count: int
+    matched_tools: List[str]
+    score_kind: str = "similarity"
+
+
+def distance_to_similarity(distance: float) -> float:
+    """Map a Chroma distance (smaller is closer) onto (0, 1], higher is better."""
+    return 1.0 / (1.0 + max(distance, 0.0))
+
+
+def rank_servers(tool_metadatas: Sequence[dict], distances: Sequence[float], fusion: str = "max") -> List[ServerScore]:
+    """Aggregate tool-level hits (in Chroma's nearest-first order) into a ranked list of servers.
+
+    fusion:
+      - "max": score is the similarity of the server's best tool.
+      - "sum": similarities of all matching tools are summed, rewarding servers with many relevant tools.
+      - "rrf": reciprocal rank fusion over the tool ranks, robust to distance scale.
+    Ties break on hit count, then on the rank of the server's best tool.
+    """
+    if fusion not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {fusion}")
+    if not distances:
+        distances = [0.0] * len(tool_metadatas)
+
+    scores: Dict[str, float] = {}
+    best_distance: Dict[str, float] = {}
+    matched_tools: Dict[str, List[str]] = {}
+    first_rank: Dict[str, int] = {}
+
+    for rank, (meta, distance) in enumerate(zip(tool_metadatas, distances)):
+        server_id = meta.get("server_id")
+        if not server_id:
+            continue
+        similarity = distance_to_similarity(distance)
+        if server_id not in scores:
+            first_rank[server_id] = rank
+            best_distance[server_id] = distance
+            matched_tools[server_id] = []
+            scores[server_id] = 0.0
+
+        if fusion == "max":
+            scores[server_id] = max(scores[server_id], similarity)
+        elif fusion == "sum":
+            scores[server_id] += similarity
+        else:
+            scores[server_id] += 1.0 / (RRF_K + rank + 1)
+
+        best_distance[server_id] = min(best_distance[server_id], distance)
+        tool_name = meta.get("tool_name")
+        if tool_name and tool_name not in matched_tools[server_id]:
+            matched_tools[server_id].append(tool_name)
+
+    ranked = sorted(
+        scores,
+        key=lambda server_id: (-scores[server_id], -len(matched_tools[server_id]), first_rank[server_id]),
+    )
+    return [
+        ServerScore(
+            server_id=server_id,
+            score=round(scores[server_id], 6),
+            best_distance=best_distance[server_id],
+            hit_count=len(matched_tools[server_id]),
+            matched_tools=matched_tools[server_id],
+            score_kind=FUSION_SCORE_KINDS[fusion],
+        )
+        for server_id in ranked
+    ]
+
+
+def fuse_rankings(vector: List[ServerScore], lexical: List[ServerScore], lexical_weight: float = 1.0) -> List[ServerScore]:
+    """Hybrid ranking: reciprocal rank fusion of the vector and lexical server rankings."""
+    scores: Dict[str, float] = {}
+    entries: Dict[str, ServerScore] = {}
+    for ranking, weight in ((vector, 1.0), (lexical, lexical_weight)):
+        for rank, entry in enumerate(ranking):
+            scores[entry.server_id] = scores.get(entry.server_id, 0.0) + weight / (RRF_K + rank + 1)
+            previous = entries.get(entry.server_id)
+            if previous is None:
+                entries[entry.server_id] = entry
+            else:
+                entries[entry.server_id] = previous._replace(
+                    best_distance=previous.best_distance if previous.best_distance is not None else entry.best_distance,
+                    hit_count=max(previous.hit_count, entry.hit_count),
+                    matched_tools=previous.matched_tools + [
+                        tool for tool in entry.matched_tools if tool not in previous.matched_tools
+                    ],
+                )
+
+    ranked = sorted(scores, key=lambda server_id: -scores[server_id])
+    return [entries[server_id]._replace(score=round(scores[server_id], 6), score_kind="rrf") for server_id in ranked]
@@ -0,0 +1,118 @@
+import asyncio
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Literal, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel, Field
+
+from models.server_meta_data import ServerMetadata
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class RegistrationJob(BaseModel):
+    job_id: str
+    status: JobStatus = "queued"
+    stage: Optional[str] = Field(None, description="Registration stage currently (or last) running")
+    server_name: str
+    server_url: str
+    server_id: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class RegistrationQueueFull(Exception):
+    pass
+
+
+# Handler receives the server to register and a callback to report the stage it enters
+RegistrationHandler = Callable[[ServerMetadata, Callable[[str], None]], Awaitable[dict]]
+
+
+class RegistrationQueue:
+    """Runs server registrations in the background with bounded concurrency and a bounded backlog.
+
+    Job state is kept in-process; finished jobs beyond `max_retained_jobs` are forgotten oldest first.
+    """
+
+    def __init__(self, handler: RegistrationHandler, concurrency: int = 4, max_pending: int = 1000,
+                 max_retained_jobs: int = 10000):
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_retained_jobs = max_retained_jobs
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._jobs: "OrderedDict[str, RegistrationJob]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, server: ServerMetadata) -> RegistrationJob:
+        job = RegistrationJob(
+            job_id=str(uuid4()),
+            server_name=server.name,
+            server_url=server.url,
+            server_id=server.id,
+            created_at=datetime.now(timezone.utc),
+        )
+        try:
+            self._queue.put_nowait((job, server))
+        except asyncio.QueueFull:
+            raise RegistrationQueueFull(f"Registration backlog is full ({self._queue.maxsize} pending)")
+        self._jobs[job.job_id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[RegistrationJob]:
+        return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        if len(self._jobs) <= self.max_retained_jobs:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in ("succeeded", "failed")]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_retained_jobs:
+                return
+
+    async def _worker(self) -> None:
+        while True:
+            job, server = await self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+
+            def on_stage(stage: str):
+                job.stage = stage
+
+            try:
+                job.result = await self.handler(server, on_stage)
+                job.server_id = job.result.get("server_id", job.server_id)
+                job.status = "succeeded"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "Registry shutting down"
+                raise
+            except Exception as e:
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+                print(f"❌ Registration job {job.job_id} failed in stage {job.stage}: {job.error}")
+                traceback.print_exc()
+            finally:
+                job.finished_at = datetime.now(timezone.utc)
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {**counts, "pending": self._queue.qsize(), "concurrency": self.concurrency}
@@ -1,110 +1,371 @@
 from fastapi import FastAPI, HTTPException
 from mcp import ClientSession
 from mcp.types import Tool
-from mcp.client.sse import sse_client
 from contextlib import AsyncExitStack
+from typing import Callable, Optional
+import asyncio
 from uuid import uuid4
 from datetime import datetime, timezone
 import json
 from models.server_meta_data import ServerMetadata
+from indexing import tool_document, tool_metadata
+from ranking import ServerScore, rank_servers, fuse_rankings
+from lexical_index import tokenize
+from tool_diff import ToolDiff, diff_server
+from metrics import SEARCH_STAGE_SECONDS, REGISTRATION_STAGE_SECONDS
 from fastapi import Query
 from pydantic import BaseModel
-import openai
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-async def embed_text(text: str) -> list[float]:
-    response = await openai.AsyncOpenAI(api_key=OPENAI_API_KEY).embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
-    )
-    return response.data[0].embedding
+def tag_prefilter(lexical_index, tags: Optional[list[str]]) -> Optional[set[str]]:
+    """Servers allowed by the tag filter, or None when there is no filter."""
+    if not tags:
+        return None
+    return lexical_index.servers_with_tags(tags) if lexical_index is not None else set()
 
-async def find_best_server_for_query(query: str, servers_table, tools_collection) -> list[ServerMetadata]:
-    result = tools_collection.query(query_texts=[query], n_results=10)
-    print(f"result: {result}")
-    tool_metadatas = result.get("metadatas", [[]])[0]
 
-    # Get unique server IDs
-    unique_server_ids = {meta["server_id"] for meta in tool_metadatas if "server_id" in meta}
+def lexical_ranking(query: str, lexical_index, allowed: Optional[set[str]], n_results: int, mode: str,
+                    fast_path_max_terms: int) -> tuple[list[ServerScore], bool]:
+    """Lexical ranking for a query, and whether it is final (no vector search needed)."""
+    if lexical_index is None or mode == "vector":
+        return [], False
+    lexical = lexical_index.search(query, limit=n_results, allowed=allowed)
+    exact = lexical_index.exact_matches(query)
+    if allowed is not None:
+        exact &= allowed
+    # Exact name matches go first, otherwise BM25 order
+    lexical.sort(key=lambda entry: entry.server_id not in exact)
 
-    matched_servers = []
-    for server_id in unique_server_ids:
-        ddb_result = servers_table.get_item(Key={"id": server_id})
-        server_item = ddb_result.get("Item")
-        if server_item:
-            matched_servers.append(ServerMetadata.model_validate(server_item))
+    keyword_query = 0 < len(tokenize(query)) <= fast_path_max_terms
+    final = mode == "lexical" or bool(lexical and (
+        exact or (keyword_query and lexical_index.covers_query(query, lexical[0].server_id))
+    ))
+    return lexical, final
 
-    return matched_servers
 
+def vector_ranking(result: dict, row: int, fusion: str, lexical: list[ServerScore]) -> list[ServerScore]:
+    """Rank servers from one query's row of a Chroma query result, fused with its lexical ranking if any."""
+    tool_metadatas = result["metadatas"][row]
+    distances = result["distances"][row] if result.get("distances") else []
+    vector = rank_servers(tool_metadatas, distances, fusion=fusion)
+    return fuse_rankings(vector, lexical) if lexical else vector
 
-async def register_server(server: ServerMetadata, servers_table, tools_collection):
-    """Register a new MCP server and store it in DynamoDB."""
-    server_id = server.id or str(uuid4())
-    now = datetime.now(timezone.utc)
 
-    # Normalize URL and extract /sse endpoint
-    server_url = server.url.rstrip("/")
+def server_filter(allowed: Optional[set[str]]) -> Optional[dict]:
+    return {"server_id": {"$in": sorted(allowed)}} if allowed is not None else None
+
+
+async def rank_for_query(query: str, tool_index, lexical_index=None, n_results: int = 10, fusion: str = "max",
+                         tags: Optional[list[str]] = None, mode: str = "hybrid",
+                         fast_path_max_terms: int = 3) -> list[ServerScore]:
+    """Rank servers for a query from the vector index, the lexical index, or both (hybrid).
+
+    Tags prefilter both indexes. In hybrid mode, a query naming a server or tool exactly, or a short
+    keyword query fully covered by the best lexical match, is answered without an embedding call.
+    """
+    return (await rank_for_queries([query], tool_index, lexical_index, n_results=n_results, fusion=fusion,
+                                   tags=tags, mode=mode, fast_path_max_terms=fast_path_max_terms))[0]
+
+
+async def rank_for_queries(queries: list[str], tool_index, lexical_index=None, n_results: int = 10,
+                           fusion: str = "max", tags: Optional[list[str]] = None, mode: str = "hybrid",
+                           fast_path_max_terms: int = 3) -> list[list[ServerScore]]:
+    """`rank_for_query` for several queries at once: every query that needs the vector index is embedded
+    in one batch and answered by one multi-query against the collection."""
+    allowed = tag_prefilter(lexical_index, tags)
+    if allowed is not None and not allowed:
+        return [[] for _ in queries]
+
+    rankings: list[Optional[list[ServerScore]]] = [None] * len(queries)
+    lexical: dict[int, list[ServerScore]] = {}
+    with SEARCH_STAGE_SECONDS.time("lexical"):
+        for i, query in enumerate(queries):
+            ranking, final = lexical_ranking(query, lexical_index, allowed, n_results, mode, fast_path_max_terms)
+            if final:
+                rankings[i] = ranking
+            else:
+                lexical[i] = ranking
+
+    if lexical:
+        pending = list(lexical)
+        if len(pending) == 1:
+            result = await tool_index.search(queries[pending[0]], n_results=n_results, where=server_filter(allowed))
+        else:
+            result = await tool_index.search_many([queries[i] for i in pending], n_results=n_results,
+                                                  where=server_filter(allowed))
+        for row, i in enumerate(pending):
+            rankings[i] = vector_ranking(result, row, fusion, lexical[i])
+    return rankings
+
+
+def select_page(ranked: list[ServerScore], offset: int, top_k: int, liveness=None,
+                stale_policy: str = "exclude") -> list[ServerScore]:
+    if liveness is not None:
+        if stale_policy == "exclude":
+            ranked = [entry for entry in ranked if not liveness.is_stale(entry.server_id)]
+        else:
+            # Down-rank: stale servers keep their relative order but go after every live one
+            ranked = sorted(ranked, key=lambda entry: liveness.is_stale(entry.server_id))
+    return ranked[offset:offset + top_k]
+
+
+async def find_best_server_for_query(query: str, tool_index, server_store, top_k: int = 10, offset: int = 0,
+                                     n_results: int = 10, fusion: str = "max", liveness=None,
+                                     stale_policy: str = "exclude", lexical_index=None,
+                                     tags: Optional[list[str]] = None, mode: str = "hybrid",
+                                     fast_path_max_terms: int = 3) -> list[tuple[ServerScore, ServerMetadata]]:
+    return (await find_best_servers_for_queries([query], tool_index, server_store, top_k=top_k, offset=offset,
+                                                n_results=n_results, fusion=fusion, liveness=liveness,
+                                                stale_policy=stale_policy, lexical_index=lexical_index, tags=tags,
+                                                mode=mode, fast_path_max_terms=fast_path_max_terms))[0]
+
+
+async def find_best_servers_for_queries(queries: list[str], tool_index, server_store, top_k: int = 10,
+                                        offset: int = 0, n_results: int = 10, fusion: str = "max", liveness=None,
+                                        stale_policy: str = "exclude", lexical_index=None,
+                                        tags: Optional[list[str]] = None, mode: str = "hybrid",
+                                        fast_path_max_terms: int = 3) -> list[list[tuple[ServerScore, ServerMetadata]]]:
+    """Ranked (score, server record) pairs for each query, with records fetched in one lookup for all of them."""
+    # Pull at least one tool hit per server on the requested page
+    n_results = max(n_results, offset + top_k)
+    rankings = await rank_for_queries(queries, tool_index, lexical_index, n_results=n_results, fusion=fusion,
+                                      tags=tags, mode=mode, fast_path_max_terms=fast_path_max_terms)
+    pages = [select_page(ranked, offset, top_k, liveness, stale_policy) for ranked in rankings]
+
+    server_ids = list(dict.fromkeys(entry.server_id for page in pages for entry in page))
+    with SEARCH_STAGE_SECONDS.time("metadata_fetch"):
+        servers_by_id = await server_store.get_many(server_ids)
+    return [
+        [(entry, servers_by_id[entry.server_id]) for entry in page if entry.server_id in servers_by_id]
+        for page in pages
+    ]
+
+
+class RegistrationTimeouts(BaseModel):
+    """Per-stage timeouts (seconds) for registering a server."""
+    connect: float = 10.0
+    list_tools: float = 15.0
+    db_write: float = 10.0
+    index: float = 60.0
+
+
+class RegistrationStageTimeout(Exception):
+    def __init__(self, stage: str, seconds: float):
+        super().__init__(f"Registration stage '{stage}' timed out after {seconds}s")
+        self.stage = stage
+
+
+async def run_stage(stage: str, timeout: float, awaitable, on_stage: Optional[Callable[[str], None]] = None):
+    if on_stage:
+        on_stage(stage)
+    try:
+        with REGISTRATION_STAGE_SECONDS.time(stage):
+            return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise RegistrationStageTimeout(stage, timeout)
+
+
+def normalize_server_url(url: str) -> tuple[str, str]:
+    """Return (base URL, /sse endpoint) for a server URL given with or without the /sse suffix."""
+    server_url = url.rstrip("/")
     if server_url.endswith("/sse"):
-        server_url_sse = server_url
-        server_url = server_url[:-4]  # remove '/sse'
-    else:
-        server_url_sse = f"{server_url}/sse"
+        return server_url[:-4], server_url
+    return server_url, f"{server_url}/sse"
 
-    print(f"Server URL: {server_url}")
-    print(f"Server URL SSE: {server_url_sse}")
 
-    # Use MCP SDK to open an SSE connection and list tools
+async def discover_tools(server_url_sse: str, timeouts: RegistrationTimeouts,
+                         on_stage: Optional[Callable[[str], None]] = None) -> list[Tool]:
+    """Open an SSE session to the MCP server and list its tools. The session is closed before returning."""
+    # Only registrations need the SSE client, so it isn't imported at startup
+    from mcp.client.sse import sse_client
+
     async with AsyncExitStack() as exit_stack:
-        read, write = await exit_stack.enter_async_context(sse_client(server_url_sse))
-        session = await exit_stack.enter_async_context(ClientSession(read, write))
-        await session.initialize()
+        async def connect():
+            read, write = await exit_stack.enter_async_context(sse_client(server_url_sse))
+            session = await exit_stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            return session
 
-        response = await session.list_tools()
+        session = await run_stage("connect", timeouts.connect, connect(), on_stage)
+        response = await run_stage("list_tools", timeouts.list_tools, session.list_tools(), on_stage)
         tools = response.tools  # already list[Tool]
         print("Connected to remote MCP server with tools:", [tool.name for tool in tools])
 
         # Validate tool list
-        parsed_tools = [Tool.model_validate(tool) for tool in tools]
-
-        # Save server record
-        server_record = server.copy(update={
-            "id": server_id,
-            "created_at": now,
-            "last_heartbeat": now,
-            "tools": parsed_tools,
-            "url": server_url,  # clean base URL
-        })
-
-        servers_table.put_item(Item=server_record.model_dump(mode="json"))
-        
-        documents, ids, metadatas = [], [], []
-        for tool in parsed_tools:
-            doc_id = f"{server_id}:{tool.name}"
-            text = f"[{server.name} - {server.description or ''}] - {tool.name} - {tool.description or ''}"
-            metadata = {
-                "server_id": server_id,
-                "server_name": server.name,
-                "tool_name": tool.name,
-                "tool_description": tool.description or ""
-            }
-            documents.append(text)
-            ids.append(doc_id)
-            metadatas.append(metadata)
+        return [Tool.model_validate(tool) for tool in tools]
+
+
+def build_server_record(server: ServerMetadata, tools: list[Tool], now: datetime,
+                        existing: Optional[ServerMetadata] = None) -> ServerMetadata:
+    server_url, _ = normalize_server_url(server.url)
+    return server.copy(update={
+        "id": server.id or str(uuid4()),
+        "created_at": existing.created_at if existing and existing.created_at else now,
+        "updated_at": now,
+        "last_heartbeat": now,
+        "tools": tools,
+        "url": server_url,  # clean base URL
+    })
+
+
+def tool_entries(server: ServerMetadata, tools: Optional[list[Tool]] = None) -> tuple[list[str], list[str], list[dict]]:
+    """Index ids, documents and metadata for the given tools (default: all tools) of a stored server record."""
+    documents, ids, metadatas = [], [], []
+    for tool in server.tools if tools is None else tools:
+        ids.append(f"{server.id}:{tool.name}")
+        documents.append(tool_document(server.name, server.description, tool.name, tool.description))
+        metadatas.append(tool_metadata(server.id, server.name, tool.name, tool.description))
+    return ids, documents, metadatas
 
+
+def registration_result(record: ServerMetadata, diff: ToolDiff, is_new: bool) -> dict:
+    return {
+        "server_id": record.id,
+        "status": "unchanged" if diff.unchanged else ("registered" if is_new else "updated"),
+        "tool_count": len(record.tools),
+        "tools_upserted": len(diff.upserted),
+        "tools_removed": len(diff.removed),
+    }
+
+
+async def register_server(server: ServerMetadata, server_store, tool_index,
+                          timeouts: Optional[RegistrationTimeouts] = None,
+                          on_stage: Optional[Callable[[str], None]] = None):
+    """Register a new MCP server, or re-register an existing one, and store it in DynamoDB.
+
+    Re-registration only writes what changed: new or edited tools are upserted into the index, removed
+    tools are deleted from it, and nothing is written at all when the server is unchanged.
+
+    The index is updated before the record is stored, so a registration that fails part way still differs
+    from the stored record and its retry indexes the tools again.
+    """
+    timeouts = timeouts or RegistrationTimeouts()
+
+    # Normalize URL and extract /sse endpoint
+    server_url, server_url_sse = normalize_server_url(server.url)
+
+    print(f"Server URL: {server_url}")
+    print(f"Server URL SSE: {server_url_sse}")
+
+    # Use MCP SDK to open an SSE connection and list tools
+    parsed_tools = await discover_tools(server_url_sse, timeouts, on_stage)
+
+    existing = None
+    if server.id:
+        existing = await run_stage("diff", timeouts.db_write, server_store.get(server.id, fresh=True), on_stage)
+    server_record = build_server_record(server, parsed_tools, datetime.now(timezone.utc), existing)
+    diff = diff_server(existing, server_record)
+    if diff.unchanged:
+        print(f"⏭️ Server {server_record.id} unchanged, skipping write and indexing.")
+        return registration_result(server_record, diff, is_new=False)
+
+    ids, documents, metadatas = tool_entries(server_record, diff.upserted)
+    if documents:
+        await run_stage("index", timeouts.index, tool_index.add(ids, documents, metadatas), on_stage)
+        print(f"✅ Upserted {len(documents)} tools in Chroma.")
+    if diff.removed:
+        removed_ids = [f"{server_record.id}:{name}" for name in diff.removed]
+        await run_stage("index", timeouts.index, tool_index.delete(removed_ids), on_stage)
+        print(f"🗑️ Removed {len(removed_ids)} tools from Chroma.")
+
+    # Save server record. Shielded: a write that outlives its timeout still lands on its thread, and must
+    # then still notify the store's listeners (search cache, lexical index, change feed)
+    await run_stage("db_write", timeouts.db_write, asyncio.shield(server_store.put(server_record)), on_stage)
+
+    return registration_result(server_record, diff, is_new=existing is None)
+
+
+async def reindex_server(server_id: str, server_store, tool_index) -> None:
+    """Bring this replica's view of a server in line with its stored record, after another replica changed it.
+
+    Every tool is upserted (embeddings come from the shared cache), and indexed tools the record no longer
+    has are deleted.
+    """
+    record = await server_store.get(server_id, fresh=True)
+    indexed = set(await tool_index.ids_for_server(server_id))
+    ids, documents, metadatas = tool_entries(record) if record is not None else ([], [], [])
+    if documents:
+        await tool_index.add(ids, documents, metadatas)
+    stale = indexed - set(ids)
+    if stale:
+        await tool_index.delete(sorted(stale))
+    if record is not None:
+        server_store.notify(record)
+    print(f"🔄 Applied change to server {server_id} from another replica")
+
+
+async def register_servers(servers: list[ServerMetadata], server_store, tool_index,
+                           timeouts: Optional[RegistrationTimeouts] = None,
+                           discovery_concurrency: int = 32) -> list[dict]:
+    """Register many servers at once.
+
+    Tool discovery runs concurrently over at most `discovery_concurrency` SSE sessions; every server whose
+    discovery succeeded and whose record changed is then indexed in one large batch and written with one
+    DynamoDB batch writer (in that order, as in register_server). Returns one result per input server, in
+    input order, including failures.
+    """
+    timeouts = timeouts or RegistrationTimeouts()
+    semaphore = asyncio.Semaphore(discovery_concurrency)
+
+    async def discover(server: ServerMetadata):
+        async with semaphore:
+            _, server_url_sse = normalize_server_url(server.url)
+            return await discover_tools(server_url_sse, timeouts)
+
+    discovered = await asyncio.gather(*(discover(server) for server in servers), return_exceptions=True)
+
+    known_ids = [server.id for server, tools in zip(servers, discovered)
+                 if server.id and not isinstance(tools, BaseException)]
+    existing_by_id = {}
+    if known_ids:
+        existing_by_id = await run_stage("diff", timeouts.db_write, server_store.get_many(known_ids, fresh=True))
+
+    now = datetime.now(timezone.utc)
+    results: list[dict] = []
+    records: list[ServerMetadata] = []
+    ids, documents, metadatas, removed_ids = [], [], [], []
+    for server, tools in zip(servers, discovered):
+        if isinstance(tools, BaseException):
+            results.append({"name": server.name, "server_id": server.id, "status": "failed",
+                            "error": f"{type(tools).__name__}: {tools}"})
+            continue
+        existing = existing_by_id.get(server.id) if server.id else None
+        record = build_server_record(server, tools, now, existing)
+        diff = diff_server(existing, record)
+        results.append({"name": server.name, **registration_result(record, diff, is_new=existing is None)})
+        if diff.unchanged:
+            continue
+
+        records.append(record)
+        record_ids, record_documents, record_metadatas = tool_entries(record, diff.upserted)
+        ids += record_ids
+        documents += record_documents
+        metadatas += record_metadatas
+        removed_ids += [f"{record.id}:{name}" for name in diff.removed]
+
+    if not records:
+        return results
+
+    try:
         if documents:
-            tools_collection.add(documents=documents, ids=ids, metadatas=metadatas)
-            print(f"✅ Added {len(documents)} tools to Chroma.")
-        
-        return {
-            "server_id": server_id,
-            "status": "registered",
-            "tool_count": len(parsed_tools)
-        }
-            
+            await run_stage("index", timeouts.index, tool_index.add(ids, documents, metadatas))
+            print(f"✅ Upserted {len(documents)} tools from {len(records)} servers in Chroma.")
+        if removed_ids:
+            await run_stage("index", timeouts.index, tool_index.delete(removed_ids))
+            print(f"🗑️ Removed {len(removed_ids)} tools from Chroma.")
+        await run_stage("db_write", timeouts.db_write, asyncio.shield(server_store.put_many(records)))
+    except Exception as e:
+        written = {record.id for record in records}
+        for result in results:
+            if result["server_id"] in written:
+                result.update(status="failed", error=f"{type(e).__name__}: {e}")
+
+    return results
+
 
 class ToolSearchRequest(BaseModel):
     query: str
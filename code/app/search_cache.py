@@ -0,0 +1,124 @@
+import asyncio
+import contextvars
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from admission import DeadlineExceeded, current_deadline
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    return _WHITESPACE.sub(" ", query).strip().casefold()
+
+
+def search_key(query: str, **params) -> Tuple:
+    return (normalize_query(query),) + tuple(
+        (name, tuple(sorted(value)) if isinstance(value, (list, set)) else value)
+        for name, value in sorted(params.items())
+    )
+
+
+class _Flight:
+    """One in-flight computation shared by every caller of the same key.
+
+    It runs as its own task, in its own context, so no single caller's cancellation or deadline fails the
+    others; `current_deadline` in that context is the latest of the waiting callers' deadlines.
+    """
+
+    def __init__(self, compute: Callable[[], Awaitable[Any]], deadline: Optional[float]):
+        self.deadline = deadline
+        self.waiters = 0
+        self.context = contextvars.copy_context()
+        self.task = asyncio.get_running_loop().create_task(compute(), context=self.context)
+
+    def extend_deadline(self, deadline: Optional[float]) -> None:
+        # None is no deadline at all, the latest there is
+        if self.deadline is None or (deadline is not None and deadline <= self.deadline):
+            return
+        self.deadline = deadline
+        # The task is not running while this (event loop) code is, so its context can be entered here
+        self.context.run(current_deadline.set, deadline)
+
+
+class SearchCache:
+    """LRU + TTL cache of search results with single-flight coalescing of identical in-flight queries.
+
+    The shared computation runs under the latest deadline among the callers waiting for it, and is cancelled
+    once all of them have given up; each caller waits for it only until its own deadline.
+    Must only be used from the event loop thread.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        # Bumped on every invalidation so computations that started against the old index are not cached
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        flight = self._inflight.get(key)
+        if flight is None:
+            self.misses += 1
+            flight = _Flight(compute, current_deadline.get())
+            self._inflight[key] = flight
+            generation = self._generation
+            flight.task.add_done_callback(lambda done: self._finish(key, generation, flight))
+        else:
+            self.coalesced += 1
+            flight.extend_deadline(current_deadline.get())
+
+        deadline = current_deadline.get()
+        flight.waiters += 1
+        try:
+            if deadline is None:
+                return await asyncio.shield(flight.task)
+            done, _ = await asyncio.wait([flight.task], timeout=max(deadline - time.monotonic(), 0.0))
+            if not done:
+                raise DeadlineExceeded("search result")
+            return flight.task.result()
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Everyone waiting for it has given up; nobody would get the result in time
+                flight.task.cancel()
+
+    def _finish(self, key: Hashable, generation: int, flight: "_Flight") -> None:
+        task = flight.task
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or generation != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *args) -> None:
+        """Drop every cached result. Accepts and ignores arguments so it can be used as a change listener."""
+        self._generation += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from models.server_meta_data import ServerMetadata
+from dynamo import batch_get_items
+
+
+class ServerMetadataCache:
+    """Validated ServerMetadata kept in an in-process LRU with TTL; misses are fetched with one BatchGetItem."""
+
+    def __init__(self, dynamodb, table_name: str, max_entries: int = 1024, ttl_seconds: float = 60.0):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, ServerMetadata]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, server_ids: Iterable[str], consistent: bool = False) -> Dict[str, ServerMetadata]:
+        """Return the servers that exist, keyed by id. Unknown ids are simply absent.
+
+        `consistent` skips cached entries and reads the table with strongly consistent reads, for callers
+        that must see the latest write (diffing a registration, applying a change from the feed).
+        """
+        server_ids = list(dict.fromkeys(server_ids))
+        found: Dict[str, ServerMetadata] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+
+        with self._lock:
+            for server_id in server_ids:
+                entry = self._entries.get(server_id)
+                if entry and entry[0] > now and not consistent:
+                    self._entries.move_to_end(server_id)
+                    found[server_id] = entry[1]
+                else:
+                    missing.append(server_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            items = batch_get_items(self.dynamodb, self.table_name, [{"id": server_id} for server_id in missing],
+                                    consistent=consistent)
+            fetched = {item["id"]: ServerMetadata.model_validate(item) for item in items}
+            for server in fetched.values():
+                self.put(server)
+            found.update(fetched)
+
+        return found
+
+    def put(self, server: ServerMetadata) -> None:
+        with self._lock:
+            self._entries[server.id] = (time.monotonic() + self.ttl_seconds, server)
+            self._entries.move_to_end(server.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, server_id: str) -> None:
+        with self._lock:
+            self._entries.pop(server_id, None)
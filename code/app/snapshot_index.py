@@ -0,0 +1,378 @@
+import asyncio
+import json
+import os
+import struct
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from indexing import index_metadata
+from sync import format_timestamp
+
+MAGIC = b"MCPTIDX\0"
+FORMAT_VERSION = 1
+# Magic, format version, JSON header length
+PREAMBLE = struct.Struct("<8sII")
+# The matrix starts on an aligned offset so it can be mapped and multiplied as float32 in place
+ALIGNMENT = 64
+# Rows scored per matrix product; bounds a query's scratch memory to queries x rows floats
+BLOCK_ROWS = 16384
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(path: str, header: dict, ids: List[str], metadatas: List[dict],
+                   blocks: Iterable[np.ndarray]) -> int:
+    """Atomically write a snapshot file and return its size.
+
+    Layout: preamble, JSON header, padding, the float32 (count x dimension) matrix, the float32 row norms,
+    then a JSON table of ids and metadatas. `blocks` yields the matrix rows in order, a piece at a time,
+    so the whole matrix never has to be in memory.
+    """
+    dimension = header["dimension"]
+    header_bytes = json.dumps({**header, "count": len(ids)}).encode("utf-8")
+    norms = []
+    rows = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+        for block in blocks:
+            block = np.ascontiguousarray(block, dtype="<f4").reshape(-1, dimension)
+            f.write(block.tobytes())
+            norms.append(np.einsum("ij,ij->i", block, block))
+            rows += len(block)
+        if rows != len(ids):
+            raise ValueError(f"Snapshot has {rows} vectors for {len(ids)} ids")
+        f.write(np.concatenate(norms or [np.empty(0)]).astype("<f4").tobytes())
+        f.write(json.dumps({"ids": ids, "metadatas": metadatas}).encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+def read_snapshot(path: str) -> Tuple[dict, np.ndarray, np.ndarray, List[str], List[dict]]:
+    """Header, memory-mapped matrix and norms, ids and metadatas of a snapshot file."""
+    with open(path, "rb") as f:
+        magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} tool index snapshot")
+        header = json.loads(f.read(header_length))
+        count, dimension = header["count"], header["dimension"]
+        matrix_offset = _aligned(PREAMBLE.size + header_length)
+        norms_offset = matrix_offset + count * dimension * 4
+        f.seek(norms_offset + count * 4)
+        tables = json.loads(f.read())
+    if not count:
+        return header, np.empty((0, dimension), "<f4"), np.empty(0, "<f4"), [], []
+    matrix = np.memmap(path, dtype="<f4", mode="r", offset=matrix_offset, shape=(count, dimension))
+    norms = np.memmap(path, dtype="<f4", mode="r", offset=norms_offset, shape=(count,))
+    return header, matrix, norms, tables["ids"], tables["metadatas"]
+
+
+def _filter_servers(where: Optional[dict]) -> Optional[set]:
+    """Server ids allowed by a Chroma-style `{"server_id": id}` or `{"server_id": {"$in": ids}}` filter."""
+    if where is None:
+        return None
+    condition = where.get("server_id") if set(where) == {"server_id"} else None
+    if isinstance(condition, str):
+        return {condition}
+    if isinstance(condition, dict) and set(condition) == {"$in"}:
+        return set(condition["$in"])
+    raise ValueError(f"Unsupported filter: {where}")
+
+
+def _merge_top_k(best, distances: np.ndarray, offset: int, k: int):
+    """Fold a block of distances (queries x rows) into the running per-query k smallest (distances, positions)."""
+    positions = np.broadcast_to(np.arange(offset, offset + distances.shape[1]), distances.shape)
+    if best is not None:
+        distances = np.concatenate([best[0], distances], axis=1)
+        positions = np.concatenate([best[1], positions], axis=1)
+    if distances.shape[1] > k:
+        keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        distances = np.take_along_axis(distances, keep, axis=1)
+        positions = np.take_along_axis(positions, keep, axis=1)
+    return distances, positions
+
+
+class SnapshotIndex:
+    """Tool vectors searched by NumPy brute force: rows memory-mapped from a snapshot file, plus an in-memory
+    overlay holding the tools written since. Stands in for the Chroma collection (upsert, delete, get, query,
+    count) with the same squared L2 distances; documents are not kept.
+
+    Mapped rows live in the page cache rather than the process heap, so the kernel can drop and re-read them
+    under memory pressure. Thread-safe; `save` folds the overlay into a new snapshot.
+    """
+
+    def __init__(self, dimension: int, metadata: Optional[dict] = None):
+        self.dimension = dimension
+        self.metadata = metadata or {}
+        # Header of the snapshot currently mapped, if any
+        self.header: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._map(np.empty((0, dimension), "<f4"), np.empty(0, "<f4"), [], [])
+        # tool id -> (vector, metadata) for tools written after the mapped snapshot
+        self._overlay: Dict[str, Tuple[np.ndarray, dict]] = {}
+        self._overlay_arrays = None
+        # Ids written while a snapshot is being saved, replayed on top of it
+        self._touched: Optional[set] = None
+        self.changes = 0
+
+    @classmethod
+    def load(cls, path: str) -> "SnapshotIndex":
+        header, matrix, norms, ids, metadatas = read_snapshot(path)
+        index = cls(header["dimension"], header.get("metadata"))
+        index._map(matrix, norms, ids, metadatas)
+        index.header = header
+        return index
+
+    def _map(self, matrix: np.ndarray, norms: np.ndarray, ids: List[str], metadatas: List[dict]) -> None:
+        self._matrix, self._norms, self._ids, self._metadatas = matrix, norms, ids, metadatas
+        self._rows = {tool_id: row for row, tool_id in enumerate(ids)}
+        self._alive = np.ones(len(ids), dtype=bool)
+        self._alive_count = len(ids)
+        # Rows are filtered by server through small integer codes rather than string compares
+        self._server_codes: Dict[str, int] = {}
+        self._row_servers = np.fromiter(
+            (self._server_codes.setdefault(metadata["server_id"], len(self._server_codes)) for metadata in metadatas),
+            dtype=np.int32, count=len(metadatas),
+        )
+
+    def _remove(self, tool_id: str) -> None:
+        row = self._rows.get(tool_id)
+        if row is not None and self._alive[row]:
+            self._alive[row] = False
+            self._alive_count -= 1
+        self._overlay.pop(tool_id, None)
+
+    def _changed(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        self.changes += len(ids)
+        self._overlay_arrays = None
+        if self._touched is not None:
+            self._touched.update(ids)
+
+    def _row_mask(self, servers: set) -> np.ndarray:
+        codes = [self._server_codes[server_id] for server_id in servers if server_id in self._server_codes]
+        return self._alive & np.isin(self._row_servers, codes)
+
+    def _overlay_view(self):
+        if self._overlay_arrays is None:
+            ids = list(self._overlay)
+            vectors = (np.stack([self._overlay[tool_id][0] for tool_id in ids]) if ids
+                       else np.empty((0, self.dimension), "<f4"))
+            self._overlay_arrays = (ids, vectors, np.einsum("ij,ij->i", vectors, vectors),
+                                    [self._overlay[tool_id][1] for tool_id in ids])
+        return self._overlay_arrays
+
+    def upsert(self, ids: List[str], embeddings, metadatas: List[dict], documents=None) -> None:
+        vectors = np.asarray(embeddings, dtype="<f4").reshape(len(ids), self.dimension)
+        with self._lock:
+            for tool_id, vector, metadata in zip(ids, vectors, metadatas):
+                self._remove(tool_id)
+                self._overlay[tool_id] = (vector, metadata)
+            self._changed(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None) -> None:
+        with self._lock:
+            ids = list(ids or []) + (self._ids_where(where) if where is not None else [])
+            for tool_id in ids:
+                self._remove(tool_id)
+            self._changed(ids)
+
+    def _ids_where(self, where: dict) -> List[str]:
+        servers = _filter_servers(where)
+        ids = [self._ids[row] for row in np.flatnonzero(self._row_mask(servers))]
+        return ids + [tool_id for tool_id, (_, metadata) in self._overlay.items() if metadata["server_id"] in servers]
+
+    def get(self, where: Optional[dict] = None, include=None) -> dict:
+        with self._lock:
+            if where is not None:
+                return {"ids": self._ids_where(where)}
+            return {"ids": [self._ids[row] for row in np.flatnonzero(self._alive)] + list(self._overlay)}
+
+    def count(self) -> int:
+        return self._alive_count + len(self._overlay)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def query(self, query_embeddings, n_results: int = 10, where: Optional[dict] = None, include=None) -> dict:
+        """Nearest tools per query, in Chroma's result shape ({"ids", "metadatas", "distances"}, one list per query)."""
+        queries = np.asarray(query_embeddings, dtype="<f4").reshape(-1, self.dimension)
+        servers = _filter_servers(where)
+        with self._lock:
+            # The mapped matrix is never written; everything else used below is copied or replaced on change
+            matrix, norms, ids, metadatas = self._matrix, self._norms, self._ids, self._metadatas
+            mask = self._row_mask(servers) if servers is not None else self._alive.copy()
+            overlay_ids, overlay_vectors, overlay_norms, overlay_metadatas = self._overlay_view()
+
+        query_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        best = None
+        blocks = [(start, matrix[start:start + BLOCK_ROWS], norms[start:start + BLOCK_ROWS],
+                   mask[start:start + BLOCK_ROWS]) for start in range(0, len(ids), BLOCK_ROWS)]
+        if overlay_ids:
+            overlay_mask = np.ones(len(overlay_ids), dtype=bool) if servers is None else np.fromiter(
+                (metadata["server_id"] in servers for metadata in overlay_metadatas), dtype=bool, count=len(overlay_ids))
+            blocks.append((len(ids), overlay_vectors, overlay_norms, overlay_mask))
+        for offset, block, block_norms, block_mask in blocks:
+            if not block_mask.any():
+                continue
+            distances = np.maximum(query_norms - 2 * (queries @ block.T) + block_norms, 0)
+            distances[:, ~block_mask] = np.inf
+            best = _merge_top_k(best, distances, offset, n_results)
+
+        result = {"ids": [], "metadatas": [], "distances": []}
+        for row in range(len(queries)):
+            row_ids, row_metadatas, row_distances = [], [], []
+            if best is not None:
+                for position in np.argsort(best[0][row], kind="stable"):
+                    distance = best[0][row][position]
+                    if not np.isfinite(distance):
+                        break
+                    hit = int(best[1][row][position])
+                    if hit < len(ids):
+                        row_ids.append(ids[hit])
+                        row_metadatas.append(metadatas[hit])
+                    else:
+                        row_ids.append(overlay_ids[hit - len(ids)])
+                        row_metadatas.append(overlay_metadatas[hit - len(ids)])
+                    row_distances.append(float(distance))
+            result["ids"].append(row_ids)
+            result["metadatas"].append(row_metadatas)
+            result["distances"].append(row_distances)
+        return result
+
+    def save(self, path: str, **state) -> dict:
+        """Write every live tool to a new snapshot at `path` (with `state` in its header), then map it in place
+        of the current one and empty the overlay. Searches and writes carry on while the file is written."""
+        with self._lock:
+            if self._touched is not None:
+                raise RuntimeError("A snapshot is already being saved")
+            matrix, ids, metadatas = self._matrix, self._ids, self._metadatas
+            rows = np.flatnonzero(self._alive)
+            overlay = dict(self._overlay)
+            self._touched = set()
+
+        def blocks():
+            for start in range(0, len(rows), BLOCK_ROWS):
+                yield matrix[rows[start:start + BLOCK_ROWS]]
+            if overlay:
+                yield np.stack([vector for vector, _ in overlay.values()])
+
+        try:
+            header = {
+                "dimension": self.dimension,
+                "metadata": self.metadata,
+                "created_at": format_timestamp(datetime.now(timezone.utc)),
+                **state,
+            }
+            write_snapshot(path, header, [ids[row] for row in rows] + list(overlay),
+                           [metadatas[row] for row in rows] + [metadata for _, metadata in overlay.values()], blocks())
+            header, matrix, norms, ids, metadatas = read_snapshot(path)
+        except Exception:
+            with self._lock:
+                self._touched = None
+            raise
+
+        with self._lock:
+            touched, self._touched = self._touched, None
+            # Tools written meanwhile keep their newer overlay entry (or stay deleted) over the snapshot's row
+            overlay = {tool_id: self._overlay[tool_id] for tool_id in touched if tool_id in self._overlay}
+            self._map(matrix, norms, ids, metadatas)
+            for tool_id in touched:
+                self._remove(tool_id)
+            self._overlay = overlay
+            self._overlay_arrays = None
+            self.header = header
+        return header
+
+    def sync_state(self) -> Optional[dict]:
+        """The mapped snapshot's sync watermark, shaped like sync.load_sync_state's result."""
+        if not self.header or "watermark" not in self.header:
+            return None
+        return {"watermark": self.header["watermark"],
+                "fingerprint": (self.header.get("metadata") or {}).get("embedding_fingerprint")}
+
+    def stats(self) -> dict:
+        return {
+            "mapped_rows": len(self._ids),
+            "deleted_rows": len(self._ids) - self._alive_count,
+            "overlay_tools": len(self._overlay),
+            "snapshot_created_at": (self.header or {}).get("created_at"),
+            "watermark": (self.header or {}).get("watermark"),
+        }
+
+
+def open_snapshot_index(path: str, backend) -> SnapshotIndex:
+    """Map the snapshot at `path` if there is one built by `backend`, otherwise start an empty index."""
+    if os.path.exists(path):
+        try:
+            index = SnapshotIndex.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable index snapshot {path}: {e}")
+        else:
+            built_with = index.metadata.get("embedding_fingerprint")
+            if built_with == backend.fingerprint:
+                print(f"💾 Mapped {len(index)} tools from snapshot {path}")
+                return index
+            print(f"⚠️ Ignoring index snapshot built with embeddings '{built_with}', rebuilding with '{backend.fingerprint}'")
+    return SnapshotIndex(backend.dimension, index_metadata(backend))
+
+
+class SnapshotWriter:
+    """Re-snapshots the index every `interval_seconds` it has changed, so the next boot maps recent vectors and
+    only catches up from the snapshot's watermark instead of re-embedding the registry."""
+
+    def __init__(self, index: SnapshotIndex, path: str, executor, interval_seconds: float = 900.0,
+                 watermark_skew_seconds: float = 60.0, applied_through: Optional[Callable[[], Optional[float]]] = None):
+        self.index = index
+        self.path = path
+        self.executor = executor
+        self.interval_seconds = interval_seconds
+        self.watermark_skew_seconds = watermark_skew_seconds
+        # Publish time of the oldest change from other replicas not in the index yet (see ChangeFeed.applied_through);
+        # the watermark is held back to it so the next boot re-applies that change
+        self.applied_through = applied_through
+        self._saved_changes: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self.saved = 0
+
+    def save(self, synced_at: Optional[datetime] = None) -> None:
+        """Blocking; `synced_at` is when the index last matched the table (defaults to now, or to the oldest
+        change not applied yet)."""
+        changes = self.index.changes
+        synced_at = synced_at or datetime.now(timezone.utc)
+        behind_since = self.applied_through() if self.applied_through else None
+        if behind_since is not None:
+            synced_at = min(synced_at, datetime.fromtimestamp(behind_since, timezone.utc))
+        header = self.index.save(self.path, watermark=format_timestamp(synced_at - timedelta(seconds=self.watermark_skew_seconds)))
+        self._saved_changes = changes
+        self.saved += 1
+        print(f"📸 Saved index snapshot of {header['count']} tools to {self.path}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            if self.index.changes == self._saved_changes:
+                continue
+            try:
+                await self.executor.run(self.save)
+            except Exception as e:
+                print(f"⚠️ Index snapshot failed: {e}")
+
+    def start(self) -> None:
+        if self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
@@ -0,0 +1,54 @@
+import time
+from typing import Dict, Optional
+
+
+class StartupTracker:
+    """Startup phase timings and readiness of the index warm-up.
+
+    Phases are recorded as checkpoints: each one lasts from the previous checkpoint (or `started_at`, a
+    time.perf_counter() reading taken before the heavy imports) until it is recorded.
+    """
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self._last = started_at
+        self.phases: Dict[str, float] = {}
+        # starting -> warming -> ready, or failed (and warming again on retry)
+        self.status = "starting"
+        # Live counters of the running index sync (see sync_index's `stats`)
+        self.progress: dict = {}
+        self.error: Optional[str] = None
+        self.ready_after_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def checkpoint(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases[phase] = round(now - self._last, 3)
+        self._last = now
+
+    def warming(self) -> None:
+        self.status = "warming"
+        self.error = None
+
+    def failed(self, error: Exception) -> None:
+        self.status = "failed"
+        self.error = str(error)
+
+    def set_ready(self) -> None:
+        self.status = "ready"
+        self.ready_after_seconds = round(time.perf_counter() - self.started_at, 3)
+        phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.phases.items())
+        print(f"⏱️ Ready after {self.ready_after_seconds:.2f}s ({phases})")
+
+    def report(self) -> dict:
+        return {
+            "status": self.status,
+            "phases": self.phases,
+            "progress": self.progress,
+            "ready_after_seconds": self.ready_after_seconds,
+            "uptime_seconds": round(time.perf_counter() - self.started_at, 3),
+            "error": self.error,
+        }
@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from models.server_meta_data import ServerMetadata
+from indexing import add_tools
+from sync import format_timestamp
+from metrics import SEARCH_STAGE_SECONDS
+from admission import check_deadline, unless_expired
+
+
+class ServerStore:
+    """Async access to the servers table. Every DynamoDB call runs on the DB executor."""
+
+    def __init__(self, servers_table, server_cache, executor):
+        self.servers_table = servers_table
+        self.server_cache = server_cache
+        self.executor = executor
+        # Called on the event loop with the new record after every change, whichever replica made it
+        self.listeners: List[Callable[[ServerMetadata], None]] = []
+        # Called only for writes made by this replica (e.g. to publish them to the change feed)
+        self.write_listeners: List[Callable[[ServerMetadata], None]] = []
+
+    def notify(self, server: ServerMetadata) -> None:
+        """Tell listeners about a record another replica changed (already re-read, and re-indexed)."""
+        self.server_cache.invalidate(server.id)
+        for listener in self.listeners:
+            listener(server)
+
+    def _written(self, server: ServerMetadata) -> None:
+        self.notify(server)
+        for listener in self.write_listeners:
+            listener(server)
+
+    async def put(self, server: ServerMetadata) -> None:
+        await self.executor.run(self.servers_table.put_item, Item=server.model_dump(mode="json"))
+        self._written(server)
+
+    async def put_many(self, servers: List[ServerMetadata]) -> None:
+        def write():
+            with self.servers_table.batch_writer(overwrite_by_pkeys=["id"]) as batch:
+                for server in servers:
+                    batch.put_item(Item=server.model_dump(mode="json"))
+
+        await self.executor.run(write)
+        for server in servers:
+            self._written(server)
+
+    async def touch_heartbeats(self, heartbeats: Dict[str, datetime]) -> None:
+        """Update only last_heartbeat for each server; records that no longer exist are skipped."""
+        def write():
+            for server_id, at in heartbeats.items():
+                try:
+                    self.servers_table.update_item(
+                        Key={"id": server_id},
+                        UpdateExpression="SET last_heartbeat = :heartbeat",
+                        ConditionExpression="attribute_exists(id)",
+                        ExpressionAttributeValues={":heartbeat": format_timestamp(at)},
+                    )
+                except Exception as e:
+                    print(f"⚠️ Heartbeat write for {server_id} skipped: {e}")
+
+        await self.executor.run(write)
+
+    async def get_many(self, server_ids: Iterable[str], fresh: bool = False) -> Dict[str, ServerMetadata]:
+        """Look servers up through the metadata cache; `fresh` bypasses it with a strongly consistent read
+        (e.g. before diffing a write, or when applying another replica's change)."""
+        return await self.executor.run(unless_expired(self.server_cache.get_many, "metadata fetch"), list(server_ids),
+                                       consistent=fresh)
+
+    async def get(self, server_id: str, fresh: bool = False) -> Optional[ServerMetadata]:
+        return (await self.get_many([server_id], fresh=fresh)).get(server_id)
+
+
+class ToolIndex:
+    """Async access to the Chroma tool collection. Queries and adds (which embed) run on the index executor.
+
+    Query texts are embedded through `query_embedder` (an EmbeddingScheduler), so concurrent searches share
+    batched embedding calls instead of Chroma embedding each query on its own.
+    """
+
+    def __init__(self, tools_collection, embedding_cache, executor, query_embedder, write_executor=None):
+        self.tools_collection = tools_collection
+        self.embedding_cache = embedding_cache
+        self.executor = executor
+        # Writes embed documents and can be slow; a separate pool keeps them from starving searches
+        self.write_executor = write_executor or executor
+        self.query_embedder = query_embedder
+        # Called on the event loop with the affected tool ids after every change to the index
+        self.listeners: List[Callable[[List[str]], None]] = []
+
+    async def query(self, query_embeddings: List[List[float]], n_results: int, where: Optional[dict] = None) -> dict:
+        with SEARCH_STAGE_SECONDS.time("vector_query"):
+            return await self.executor.run(unless_expired(self.tools_collection.query, "vector query"),
+                                           query_embeddings=query_embeddings, n_results=n_results, where=where)
+
+    async def search(self, query: str, n_results: int, where: Optional[dict] = None) -> dict:
+        check_deadline("embedding")
+        with SEARCH_STAGE_SECONDS.time("embed"):
+            embedding = await self.query_embedder.embed(query)
+        return await self.query([embedding], n_results, where=where)
+
+    async def search_many(self, queries: List[str], n_results: int, where: Optional[dict] = None) -> dict:
+        """Embed all queries in one batch and run them as a single multi-query against the collection."""
+        check_deadline("embedding")
+        with SEARCH_STAGE_SECONDS.time("embed"):
+            embeddings = await self.query_embedder.embed_many(queries)
+        return await self.query(embeddings, n_results, where=where)
+
+    async def ids_for_server(self, server_id: str) -> List[str]:
+        result = await self.executor.run(self.tools_collection.get, where={"server_id": server_id}, include=[])
+        return result["ids"]
+
+    async def add(self, ids: List[str], documents: List[str], metadatas: List[dict]) -> None:
+        await self.write_executor.run(add_tools, self.tools_collection, self.embedding_cache, ids, documents, metadatas)
+        for listener in self.listeners:
+            listener(ids)
+
+    async def delete(self, ids: List[str]) -> None:
+        await self.write_executor.run(self.tools_collection.delete, ids=ids)
+        for listener in self.listeners:
+            listener(ids)
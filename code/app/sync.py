@@ -0,0 +1,155 @@
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional
+
+from indexing import tool_document, tool_metadata, add_tools
+
+_DONE = object()
+
+
+def scan_segment(table, segment: int, total_segments: int, scan_kwargs: Optional[dict] = None) -> Iterator[List[dict]]:
+    """Yield one page of items at a time from a single scan segment, following LastEvaluatedKey."""
+    kwargs = {"Segment": segment, "TotalSegments": total_segments, **(scan_kwargs or {})}
+    while True:
+        response = table.scan(**kwargs)
+        yield response.get("Items", [])
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def parallel_scan(table, total_segments: int = 4, max_pending_pages: int = 8,
+                  scan_kwargs: Optional[dict] = None) -> Iterator[List[dict]]:
+    """Run a DynamoDB parallel scan and yield pages as soon as any segment produces them.
+
+    Pages are handed over through a bounded queue, so segment workers stall instead of
+    buffering the whole table when the consumer (embedding + indexing) is the slow side.
+    """
+    pages: queue.Queue = queue.Queue(maxsize=max_pending_pages)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(segment: int):
+        try:
+            for page in scan_segment(table, segment, total_segments, scan_kwargs):
+                if not put(page):
+                    return
+            put(_DONE)
+        except Exception as e:
+            put(e)
+
+    threads = [
+        threading.Thread(target=worker, args=(segment,), name=f"scan-segment-{segment}", daemon=True)
+        for segment in range(total_segments)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        remaining = total_segments
+        while remaining:
+            page = pages.get()
+            if page is _DONE:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        stop.set()
+
+
+def format_timestamp(value: datetime) -> str:
+    """Same shape pydantic gives datetimes in ServerMetadata.model_dump(mode="json"), so strings compare in order."""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def changed_at(server: dict) -> Optional[datetime]:
+    value = server.get("updated_at") or server.get("created_at")
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def sync_index(servers_table, tools_collection, embedding_cache, total_segments: int = 4, batch_size: int = 256,
+               since: Optional[datetime] = None, on_server: Optional[Callable[[dict], None]] = None,
+               stats: Optional[dict] = None) -> dict:
+    """Stream servers from the table into the vector index in batches of at most `batch_size` tools.
+
+    With `since`, only servers changed after that watermark are applied: their old vectors are deleted
+    and their current tools re-added, so an index loaded from disk catches up without a rebuild.
+    `on_server` is called with every server record scanned, changed or not. A `stats` dict passed in is
+    updated as the sync runs, so its progress can be reported meanwhile.
+    """
+    stats = stats if stats is not None else {}
+    stats.update({"servers": 0, "tools": 0, "pages": 0, "batches": 0})
+    ids, documents, metadatas = [], [], []
+
+    # Only servers changed since the watermark are re-embedded and re-indexed, but every page is still read
+    # (a DynamoDB FilterExpression would consume the same read capacity) so `on_server` sees every server
+    scan_kwargs = None
+    if since is not None and on_server is None:
+        scan_kwargs = {
+            "FilterExpression": "updated_at > :since OR created_at > :since",
+            "ExpressionAttributeValues": {":since": format_timestamp(since)},
+        }
+
+    def flush():
+        nonlocal ids, documents, metadatas
+        if ids:
+            add_tools(tools_collection, embedding_cache, ids, documents, metadatas)
+            stats["tools"] += len(ids)
+            stats["batches"] += 1
+            ids, documents, metadatas = [], [], []
+
+    for page in parallel_scan(servers_table, total_segments, scan_kwargs=scan_kwargs):
+        stats["pages"] += 1
+        if on_server:
+            for server in page:
+                on_server(server)
+        if since is not None:
+            page = [server for server in page if (changed_at(server) or since) > since]
+            if page:
+                tools_collection.delete(where={"server_id": {"$in": [server["id"] for server in page]}})
+
+        for server in page:
+            stats["servers"] += 1
+            for tool in server.get("tools", []):
+                ids.append(f"{server['id']}:{tool['name']}")
+                documents.append(tool_document(server["name"], server.get("description", ""), tool["name"], tool.get("description", "")))
+                metadatas.append(tool_metadata(server["id"], server["name"], tool["name"], tool.get("description", "")))
+                if len(ids) >= batch_size:
+                    flush()
+    flush()
+    return stats
+
+
+def load_sync_state(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_sync_state(path: str, watermark: datetime, fingerprint: str) -> None:
+    """Atomically record how far the on-disk index has been synced."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"watermark": format_timestamp(watermark), "fingerprint": fingerprint}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
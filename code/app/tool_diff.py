@@ -0,0 +1,59 @@
+import hashlib
+import json
+from decimal import Decimal
+from typing import Any, List, NamedTuple, Optional
+
+from mcp.types import Tool
+
+from models.server_meta_data import ServerMetadata
+
+# Fields of a server record that, when all unchanged, make re-registration a no-op
+RECORD_FIELDS = ("name", "description", "tags", "url", "tools", "resources", "prompts")
+
+
+def _canonical(value: Any) -> Any:
+    """Normalize values so a record read back from DynamoDB (numbers as Decimal) hashes like the original."""
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (Decimal, float)) and not isinstance(value, bool):
+        return int(value) if value == int(value) else float(value)
+    return value
+
+
+def tool_hash(server: ServerMetadata, tool: Tool) -> str:
+    """Hash of everything that feeds a tool's index entry: its name, description, schema and the server's text."""
+    payload = {
+        "server_name": server.name,
+        "server_description": server.description,
+        "name": tool.name,
+        "description": tool.description or "",
+        "input_schema": _canonical(tool.inputSchema),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ToolDiff(NamedTuple):
+    upserted: List[Tool]
+    removed: List[str]
+    record_changed: bool
+
+    @property
+    def unchanged(self) -> bool:
+        return not (self.upserted or self.removed or self.record_changed)
+
+
+def diff_server(existing: Optional[ServerMetadata], record: ServerMetadata) -> ToolDiff:
+    """Compare a freshly discovered server record with the stored one, tool by tool."""
+    if existing is None:
+        return ToolDiff(upserted=list(record.tools), removed=[], record_changed=True)
+
+    old_hashes = {tool.name: tool_hash(existing, tool) for tool in existing.tools}
+    new_names = {tool.name for tool in record.tools}
+    upserted = [tool for tool in record.tools if old_hashes.get(tool.name) != tool_hash(record, tool)]
+    removed = [name for name in old_hashes if name not in new_names]
+
+    record_changed = _canonical(existing.model_dump(include=set(RECORD_FIELDS))) != \
+        _canonical(record.model_dump(include=set(RECORD_FIELDS)))
+    return ToolDiff(upserted=upserted, removed=removed, record_changed=record_changed or bool(upserted or removed))
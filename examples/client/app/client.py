@@ -1,31 +1,37 @@
 import asyncio
 import os
-from typing import Optional
-from contextlib import AsyncExitStack
 import json
-from typing import Dict
-from mcp import ClientSession
-from mcp.client.sse import sse_client
 from mcp.types import TextContent
 from dotenv import load_dotenv
-from models.server_meta_data import ServerMetadata
+from models.server_meta_data import ServerSummary
+from registry_client import RegistryClient, ToolSchemaCache
+from session_pool import MCPSessionPool
 import openai
-import httpx
 from openai.types.chat import ChatCompletionMessageParam, ChatCompletionToolParam
 load_dotenv()  # Load environment variables from .env
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MCP_REGISTRY_URL = "http://McpReg-McpRe-ZMg9vwW4XWZI-1842878941.us-east-2.elb.amazonaws.com"
 MCP_LOCAL_URL = "http://host.docker.internal:8000"
 RUN_LOCAL = os.getenv("RUN_LOCAL", "False").lower() == "true"
+# Where tool schemas fetched from the registry are kept between runs (in memory only when unset)
+TOOL_SCHEMA_CACHE_PATH = os.getenv("TOOL_SCHEMA_CACHE_PATH")
+# Search results are reused for this long, and served past it when the registry is down or slow
+REGISTRY_CACHE_TTL_SECONDS = float(os.getenv("REGISTRY_CACHE_TTL_SECONDS", "300"))
+MCP_SESSION_POOL_SIZE = int(os.getenv("MCP_SESSION_POOL_SIZE", "8"))
+MCP_SESSION_IDLE_SECONDS = float(os.getenv("MCP_SESSION_IDLE_SECONDS", "300"))
+# An MCP server that hasn't completed the session handshake by then is given up on
+MCP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("MCP_CONNECT_TIMEOUT_SECONDS", "10"))
+# Sessions to the runners-up of each search are opened in the background (0 disables)
+PREWARM_TOP_K = int(os.getenv("PREWARM_TOP_K", "2"))
 
 class LLMClient:
     """Manages communication with the LLM provider."""
 
     def __init__(self, api_key: str) -> None:
         self.api_key: str = api_key
-        self.openai_client = openai.OpenAI(api_key=api_key)
+        self.openai_client = openai.AsyncOpenAI(api_key=api_key)
 
-    def get_ai_response(
+    async def get_ai_response(
         self,
         message_array: list[ChatCompletionMessageParam],
         available_tools: list[ChatCompletionToolParam],
@@ -33,7 +39,7 @@ class LLMClient:
     ):
         tool_use_setting = "auto" if use_tools else "none"
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4",
             messages=message_array,
             tools=available_tools,
@@ -46,12 +52,19 @@ class ChatSession:
     def __init__(self, api_key: str) -> None:
         self.llm_client = LLMClient(api_key)
         self.messages: list[ChatCompletionMessageParam] = []
-        self.mcp_clients_by_id: Dict[str, MCPClient] = {} 
+        self.registry = RegistryClient(
+            MCP_LOCAL_URL if RUN_LOCAL else MCP_REGISTRY_URL,
+            cache_ttl_seconds=REGISTRY_CACHE_TTL_SECONDS,
+            tool_schemas=ToolSchemaCache(TOOL_SCHEMA_CACHE_PATH),
+        )
+        self.sessions = MCPSessionPool(self.registry, max_sessions=MCP_SESSION_POOL_SIZE,
+                                       idle_timeout_seconds=MCP_SESSION_IDLE_SECONDS,
+                                       connect_timeout_seconds=MCP_CONNECT_TIMEOUT_SECONDS)
         
 
     async def close_all(self):
-        for mcp in self.mcp_clients_by_id.values():
-            await mcp.cleanup()
+        await self.sessions.close_all()
+        await self.registry.aclose()
     
     async def chat_loop(self):
         print("\nMCP SSE Client Started!")
@@ -59,7 +72,8 @@ class ChatSession:
 
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                # Read input off the event loop so pre-warming sessions keep connecting meanwhile
+                query = (await asyncio.to_thread(input, "\nQuery: ")).strip()
                 if query.lower() == 'quit':
                     break
 
@@ -73,109 +87,66 @@ class ChatSession:
         self.messages.append({"role": "user", "content": query})
         print(f"Searching for best-matching server for query: {query}")
         # 🔍 Step 1: Search for best-matching server
-        server: ServerMetadata = await find_best_server_for_query(query)
-
-        
-        # 🔄 Step 2: Check client cache
-        if server.id in self.mcp_clients_by_id:
-            print(f"Reusing existing MCPClient for server: {server.id}")
-            mcp = self.mcp_clients_by_id[server.id]
-        else:
-            print(f"Creating new MCPClient for server: {server.id}")
-            mcp = MCPClient(server.url, server.id)
-            await mcp.setup()
-            self.mcp_clients_by_id[server.id] = mcp  # Cache it
+        server, runners_up = await find_best_server_for_query(self.registry, query, top_k=1 + PREWARM_TOP_K)
+        self.sessions.prewarm(runners_up)
 
+        # 🔄 Step 2: Check out a pooled session (connects on first use)
+        mcp = await self.sessions.get(server.id, server.url)
 
-        # 🧠 Step 3: Let OpenAI decide if it wants to call a tool
-        ai_message = self.llm_client.get_ai_response(self.messages, mcp.available_tools, use_tools=True)
+        # 🧠 Step 3: Let OpenAI decide if it wants to call tools
+        ai_message = await self.llm_client.get_ai_response(self.messages, mcp.available_tools, use_tools=True)
 
         # 🛠 Step 4: Tool call handling
         if ai_message.tool_calls:
-            tool_call = ai_message.tool_calls[0]  # Assume one tool for now
-            tool_name = tool_call.function.name
-            tool_args = json.loads(tool_call.function.arguments)
-            print(f"Will Call Tool: {tool_name}")
+            print(f"Will Call Tools: {[tool_call.function.name for tool_call in ai_message.tool_calls]}")
 
-            # 🔧 Step 5: Actually call the tool via MCP
-            tool_result = await mcp.session.call_tool(tool_name, tool_args)
+            # 🔧 Step 5: Run every requested tool call concurrently via MCP
+            results = await asyncio.gather(*(self.run_tool_call(server, tool_call) for tool_call in ai_message.tool_calls))
 
-            if tool_result.content and isinstance(tool_result.content[0], TextContent):
-                tool_result_content = tool_result.content[0].text
-            else:
-                tool_result_content = json.dumps({"result": "unknown"})
-
-            # 🧾 Step 6: Add result to chat history
+            # 🧾 Step 6: Add results to chat history
             self.messages.append({
                 "role": "assistant",
-                "tool_calls": [tool_call.model_dump()]
-            })
-            self.messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": tool_result_content
+                "tool_calls": [tool_call.model_dump() for tool_call in ai_message.tool_calls]
             })
+            for tool_call, tool_result_content in zip(ai_message.tool_calls, results):
+                self.messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "content": tool_result_content
+                })
 
             # 💬 Step 7: Get final LLM response
-            final_response = self.llm_client.get_ai_response(self.messages, mcp.available_tools, use_tools=False)
+            final_response = await self.llm_client.get_ai_response(self.messages, mcp.available_tools, use_tools=False)
             
             return final_response.content
         
         # 💡 Step 8: No tool used
         return ai_message.content
-    
-class MCPClient:
-    def __init__(self, url: str, id: str):
-        self.url = url
-        self.id = id
-        self.session: Optional[ClientSession] = None
-        self.exit_stack = AsyncExitStack()
-        self.available_tools: list[ChatCompletionToolParam] = []
-
-    async def setup(self):
-        """Connect to MCP server and list tools."""
-        sse_url = self.url.rstrip("/") + "/sse"
-        read, write = await self.exit_stack.enter_async_context(sse_client(sse_url))
-        self.session = await self.exit_stack.enter_async_context(ClientSession(read, write))
-        await self.session.initialize()
-
-        response = await self.session.list_tools()
-        tools = response.tools
-        print(f"Connected to server {self.url} with tools:", [t.name for t in tools])
-        self.available_tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description or "",
-                    "parameters": {
-                        **tool.inputSchema,
-                        "additionalProperties": False
-                    },
-                },
-            }
-            for tool in tools
-        ] 
-
-    async def cleanup(self):
-        await self.exit_stack.aclose()
-
-    
-async def find_best_server_for_query(query: str) -> ServerMetadata:
-    """Query the MCP registry and return the best matching server metadata."""
-    registry_url = MCP_LOCAL_URL if RUN_LOCAL else MCP_REGISTRY_URL
-    search_url = f"{registry_url}/search_tools"
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        resp = await client.post(search_url, json={"query": query})
-        resp.raise_for_status()
-        matches = resp.json()
 
-        if not matches:
-            raise ValueError("No matching MCP servers found for query")
-
-        best_match = matches[0]
+    async def run_tool_call(self, server: ServerSummary, tool_call) -> str:
+        """Run one tool call; failures are reported to the model as the tool result instead of aborting the turn."""
+        try:
+            tool_args = json.loads(tool_call.function.arguments)
+            tool_result = await self.sessions.call_tool(server.id, server.url, tool_call.function.name, tool_args)
+        except Exception as e:
+            return json.dumps({"error": f"{type(e).__name__}: {e}"})
 
-        return ServerMetadata.model_validate(best_match)
+        if tool_result.content and isinstance(tool_result.content[0], TextContent):
+            return tool_result.content[0].text
+        return json.dumps({"result": "unknown"})
+    
+async def find_best_server_for_query(registry: RegistryClient, query: str,
+                                     top_k: int = 1) -> tuple[ServerSummary, list[ServerSummary]]:
+    """Query the MCP registry and return the best matching server, plus the runners-up."""
+    matches = [ServerSummary.model_validate(match) for match in await registry.search(query, top_k=top_k)]
+    if not matches:
+        raise ValueError("No matching MCP servers found for query")
+
+    # Results are ranked, best server first
+    best_match = matches[0]
+    print(f"Best server: {best_match.name} ({best_match.score_kind} score {best_match.score}, tools {best_match.matched_tools})")
+
+    return best_match, matches[1:]
     
 async def main():
     chat = ChatSession(OPENAI_API_KEY)
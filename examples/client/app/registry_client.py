@@ -0,0 +1,180 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+
+class RegistryUnavailable(Exception):
+    pass
+
+
+class ToolSchemaCache:
+    """Function-calling tool schemas per server id, with the registry ETag they were served under."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Ignoring unreadable tool schema cache {path}: {e}")
+
+    def get(self, server_id: str) -> Optional[dict]:
+        return self.entries.get(server_id)
+
+    def put(self, server_id: str, etag: Optional[str], tools: list) -> None:
+        self.entries[server_id] = {"etag": etag, "tools": tools}
+        if self.path:
+            tmp_path = f"{self.path}.tmp"
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+
+
+def _unavailable(error: Exception) -> bool:
+    """Errors that mean the registry is down or slow, as opposed to a bad request."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, httpx.TransportError)
+
+
+def _search_key(query: str, options: dict) -> Tuple:
+    return (" ".join(query.split()).casefold(),) + tuple(
+        (name, tuple(value) if isinstance(value, list) else value) for name, value in sorted(options.items())
+    )
+
+
+class RegistryClient:
+    """Long-lived client for the MCP registry.
+
+    One pooled keep-alive HTTP connection set is reused for every call. Search results are cached locally
+    for `cache_ttl_seconds`; when the registry errors or takes longer than `search_timeout` the last good
+    result for the same query is served instead, however old. Tool schemas are revalidated by ETag.
+    """
+
+    def __init__(self, base_url: str, cache_ttl_seconds: float = 300.0, max_cache_entries: int = 512,
+                 search_timeout: float = 2.0, timeout: float = 10.0, max_connections: int = 10,
+                 max_batch_queries: int = 32, tool_schemas: Optional[ToolSchemaCache] = None):
+        self.base_url = base_url.rstrip("/")
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.max_cache_entries = max_cache_entries
+        self.search_timeout = search_timeout
+        self.max_batch_queries = max_batch_queries
+        self.tool_schemas = tool_schemas or ToolSchemaCache()
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        # search key -> (fetched at, results); entries outlive the TTL as last-known-good fallbacks
+        self._results: "OrderedDict[Tuple, Tuple[float, List[dict]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    def _cached(self, key: Tuple, fresh_only: bool = True) -> Optional[List[dict]]:
+        entry = self._results.get(key)
+        if entry is None or (fresh_only and time.monotonic() - entry[0] > self.cache_ttl_seconds):
+            return None
+        self._results.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: Tuple, results: List[dict]) -> None:
+        self._results[key] = (time.monotonic(), results)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_cache_entries:
+            self._results.popitem(last=False)
+
+    def _fallback(self, key: Tuple, error: Exception) -> List[dict]:
+        stale = self._cached(key, fresh_only=False)
+        if not _unavailable(error):
+            raise error
+        if stale is None:
+            raise RegistryUnavailable(f"Registry search failed and nothing is cached: {error}") from error
+        self.fallbacks += 1
+        print(f"⚠️ Registry search failed ({type(error).__name__}), using last known results")
+        return stale
+
+    async def search(self, query: str, top_k: int = 5, **options) -> List[dict]:
+        """Ranked servers for a query (see the registry's ServerSearchRequest for `options`, e.g. view, tags)."""
+        options = {"top_k": top_k, **options}
+        key = _search_key(query, options)
+        cached = self._cached(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        try:
+            resp = await self._http.post("/search_servers", json={"query": query, **options},
+                                         timeout=self.search_timeout)
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            return self._fallback(key, e)
+        results = resp.json()
+        self._store(key, results)
+        return results
+
+    async def search_many(self, queries: List[str], top_k: int = 5, **options) -> List[List[dict]]:
+        """`search` for several queries; the ones not cached go to the registry in one batch request."""
+        options = {"top_k": top_k, **options}
+        keys = [_search_key(query, options) for query in queries]
+        results: List[Optional[List[dict]]] = [self._cached(key) for key in keys]
+        missing = list(dict.fromkeys(query for query, result in zip(queries, results) if result is None))
+        self.hits += len(queries) - sum(1 for result in results if result is None)
+        if not missing:
+            return results
+
+        self.misses += len(missing)
+        try:
+            for start in range(0, len(missing), self.max_batch_queries):
+                batch = missing[start:start + self.max_batch_queries]
+                resp = await self._http.post("/search_servers/batch", json={"queries": batch, **options},
+                                             timeout=self.search_timeout)
+                resp.raise_for_status()
+                for item in resp.json()["results"]:
+                    self._store(_search_key(item["query"], options), item["servers"])
+        except httpx.HTTPError as e:
+            return [result if result is not None else self._fallback(key, e) for key, result in zip(keys, results)]
+        return [result if result is not None else self._cached(key, fresh_only=False)
+                for key, result in zip(keys, results)]
+
+    async def server(self, server_id: str) -> dict:
+        resp = await self._http.get(f"/servers/{server_id}")
+        resp.raise_for_status()
+        return resp.json()
+
+    async def tools(self, server_id: str) -> List[dict]:
+        """The server's tools in function-calling format, revalidating a cached copy with If-None-Match."""
+        cached = self.tool_schemas.get(server_id)
+        headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+        try:
+            resp = await self._http.get(f"/servers/{server_id}/tools", headers=headers)
+        except httpx.TransportError:
+            if cached:
+                return cached["tools"]
+            raise
+        if resp.status_code == 304 and cached:
+            return cached["tools"]
+        resp.raise_for_status()
+        tools = resp.json()
+        self.tool_schemas.put(server_id, resp.headers.get("ETag"), tools)
+        return tools
+
+    def stats(self) -> dict:
+        return {"entries": len(self._results), "hits": self.hits, "misses": self.misses, "fallbacks": self.fallbacks}
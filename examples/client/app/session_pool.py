@@ -0,0 +1,225 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import anyio
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from openai.types.chat import ChatCompletionToolParam
+
+from registry_client import RegistryClient
+
+# Raised when a request is written to a session whose stream has already closed, i.e. before it was sent,
+# so retrying on a new session cannot run the tool twice
+_NOT_SENT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+
+class MCPClient:
+    def __init__(self, url: str, id: str, registry: Optional[RegistryClient] = None,
+                 connect_timeout_seconds: float = 10.0):
+        self.url = url
+        self.id = id
+        self.registry = registry
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self.session: Optional[ClientSession] = None
+        self.available_tools: list[ChatCompletionToolParam] = []
+        self._task: Optional[asyncio.Task] = None
+        self._closed = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def setup(self):
+        """Load the server's tools from the registry; falls back to listing them over MCP."""
+        if self.registry is not None:
+            try:
+                self.available_tools = await self.registry.tools(self.id)
+                print(f"Loaded tools for server {self.url} from the registry:",
+                      [tool["function"]["name"] for tool in self.available_tools])
+                return
+            except Exception as e:
+                print(f"⚠️ Registry tool schemas unavailable ({e}), listing tools from the server")
+
+        await self.connect()
+        response = await self.session.list_tools()
+        tools = response.tools
+        print(f"Connected to server {self.url} with tools:", [t.name for t in tools])
+        self.available_tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description or "",
+                    "parameters": {
+                        **tool.inputSchema,
+                        "additionalProperties": False
+                    },
+                },
+            }
+            for tool in tools
+        ]
+
+    async def _run_session(self, ready: asyncio.Future):
+        # The SSE/session context managers must be entered and exited by the same task, so one task owns them
+        try:
+            async with sse_client(self.url.rstrip("/") + "/sse") as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.session = session
+                    ready.set_result(None)
+                    await self._closed.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"⚠️ Session to {self.url} dropped: {e}")
+        finally:
+            self.session = None
+
+    async def connect(self, stale: Optional[ClientSession] = None) -> ClientSession:
+        """Open the SSE session, or reopen it if it has dropped or is still the `stale` one, and return it.
+
+        Serialized, so concurrent callers that found the same session dead reconnect it once.
+        """
+        async with self._lock:
+            if self.connected and self.session is not stale:
+                return self.session
+            await self._stop()
+            self._closed = asyncio.Event()
+            ready = asyncio.get_running_loop().create_future()
+            self._task = asyncio.create_task(self._run_session(ready))
+            try:
+                await asyncio.wait_for(ready, self.connect_timeout_seconds)
+            except asyncio.TimeoutError:
+                # The owner task may be stuck opening the stream; cancelling it unwinds its context managers
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+                self._task = None
+                raise TimeoutError(f"Connecting to {self.url} timed out after {self.connect_timeout_seconds}s")
+            return self.session
+
+    async def call_tool(self, name: str, arguments: dict):
+        session = await self.connect()
+        try:
+            return await session.call_tool(name, arguments)
+        except _NOT_SENT_ERRORS as e:
+            # A pooled session may have gone stale while idle; the request never left, so retry it once.
+            # Tool errors and timeouts are raised as they are: the tool may already have run
+            print(f"🔁 Session to {self.url} was closed ({e!r}), reconnecting")
+            session = await self.connect(stale=session)
+            return await session.call_tool(name, arguments)
+
+    async def _stop(self):
+        if self._task is not None:
+            self._closed.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def cleanup(self):
+        async with self._lock:
+            await self._stop()
+
+
+class MCPSessionPool:
+    """Connected MCPClients by server id, capped at `max_sessions`.
+
+    The least recently used session is closed when the cap is reached, and sessions idle for longer than
+    `idle_timeout_seconds` are closed on the next checkout. Dropped sessions reconnect on use.
+    """
+
+    def __init__(self, registry: Optional[RegistryClient] = None, max_sessions: int = 8,
+                 idle_timeout_seconds: float = 300.0, connect_timeout_seconds: float = 10.0):
+        self.registry = registry
+        self.max_sessions = max_sessions
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.connect_timeout_seconds = connect_timeout_seconds
+        # server id -> (client, last used)
+        self._clients: "OrderedDict[str, tuple[MCPClient, float]]" = OrderedDict()
+        self._opening: dict[str, asyncio.Task] = {}
+        self._prewarming: set[asyncio.Task] = set()
+        self.opened = 0
+        self.evicted = 0
+
+    async def _open(self, server_id: str, url: str) -> MCPClient:
+        mcp = MCPClient(url, server_id, self.registry, connect_timeout_seconds=self.connect_timeout_seconds)
+        await mcp.setup()
+        await mcp.connect()
+        self.opened += 1
+        return mcp
+
+    async def get(self, server_id: str, url: str) -> MCPClient:
+        await self.evict_idle()
+        entry = self._clients.get(server_id)
+        if entry is not None:
+            self._clients[server_id] = (entry[0], time.monotonic())
+            self._clients.move_to_end(server_id)
+            return entry[0]
+
+        mcp = await asyncio.shield(self._opening_task(server_id, url))
+
+        if server_id not in self._clients:
+            while len(self._clients) >= self.max_sessions:
+                _, (oldest, _) = self._clients.popitem(last=False)
+                await self._close(oldest)
+            self._clients[server_id] = (mcp, time.monotonic())
+        return self._clients[server_id][0]
+
+    def _opening_task(self, server_id: str, url: str) -> asyncio.Task:
+        # Concurrent checkouts of the same server (e.g. a pre-warm in flight) share one connection attempt
+        task = self._opening.get(server_id)
+        if task is None:
+            task = asyncio.ensure_future(self._open(server_id, url))
+            self._opening[server_id] = task
+            task.add_done_callback(lambda _: self._opening.pop(server_id, None))
+        return task
+
+    async def call_tool(self, server_id: str, url: str, name: str, arguments: dict):
+        mcp = await self.get(server_id, url)
+        return await mcp.call_tool(name, arguments)
+
+    def prewarm(self, servers: Iterable) -> None:
+        """Open sessions to likely next servers (e.g. the runners-up of a search) in the background."""
+        for server in servers:
+            if server.id in self._clients or server.id in self._opening:
+                continue
+            if len(self._clients) + len(self._opening) >= self.max_sessions:
+                return
+            # Counted in _opening right away, so the cap holds for the rest of this loop
+            self._opening_task(server.id, server.url)
+            task = asyncio.create_task(self._prewarm(server.id, server.url))
+            self._prewarming.add(task)
+            task.add_done_callback(self._prewarming.discard)
+
+    async def _prewarm(self, server_id: str, url: str) -> None:
+        try:
+            await self.get(server_id, url)
+        except Exception as e:
+            print(f"⚠️ Pre-warming {url} failed: {e}")
+
+    async def evict_idle(self) -> None:
+        now = time.monotonic()
+        for server_id, (mcp, last_used) in list(self._clients.items()):
+            if now - last_used > self.idle_timeout_seconds:
+                del self._clients[server_id]
+                await self._close(mcp)
+
+    async def _close(self, mcp: MCPClient) -> None:
+        self.evicted += 1
+        print(f"🔌 Closing idle MCP session to {mcp.url}")
+        await mcp.cleanup()
+
+    async def close_all(self) -> None:
+        opening = list(self._prewarming) + list(self._opening.values())
+        for task in opening:
+            task.cancel()
+        await asyncio.gather(*opening, return_exceptions=True)
+        clients = [mcp for mcp, _ in self._clients.values()]
+        self._clients.clear()
+        for mcp in clients:
+            await mcp.cleanup()
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._clients), "opened": self.opened, "evicted": self.evicted}
@@ -35,6 +35,32 @@ class McpRegistryStack(Stack):
             removal_policy=RemovalPolicy.DESTROY  # NOTE: DESTROY for dev; change for prod
         )
 
+        # --- DynamoDB Table for cached tool embeddings (keyed by content hash)
+        embedding_cache_table = dynamodb.Table(
+            self,
+            "McpEmbeddingCacheTable",
+            partition_key=dynamodb.Attribute(
+                name="hash", type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY  # NOTE: DESTROY for dev; change for prod
+        )
+
+        # --- DynamoDB Table for the registry change feed (version-ordered; every replica tails it)
+        change_feed_table = dynamodb.Table(
+            self,
+            "McpChangeFeedTable",
+            partition_key=dynamodb.Attribute(
+                name="feed", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="version", type=dynamodb.AttributeType.NUMBER
+            ),
+            time_to_live_attribute="expires_at",
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY  # NOTE: DESTROY for dev; change for prod
+        )
+
         # --- ECS Cluster
         cluster = ecs.Cluster(self, "McpRegistryCluster", vpc=vpc)
 
@@ -54,6 +80,8 @@ class McpRegistryStack(Stack):
                 container_port=80,
                 environment={
                     "DYNAMODB_TABLE_NAME": servers_table.table_name,
+                    "EMBEDDING_CACHE_TABLE_NAME": embedding_cache_table.table_name,
+                    "CHANGE_FEED_TABLE_NAME": change_feed_table.table_name,
                     "AWS_REGION": Stack.of(self).region,
                     "RUN_LOCAL": "False"
                 },
@@ -64,6 +92,9 @@ class McpRegistryStack(Stack):
             ),
             public_load_balancer=True,
             assign_public_ip=True,
+            # Tasks serve while the index warms in the background; give the warm-up time before ECS
+            # replaces a task whose /ready check hasn't passed yet
+            health_check_grace_period=Duration.minutes(5),
             runtime_platform=ecs.RuntimePlatform(
                 operating_system_family=ecs.OperatingSystemFamily.LINUX,
                 cpu_architecture=ecs.CpuArchitecture.ARM64
@@ -71,7 +102,14 @@ class McpRegistryStack(Stack):
         )
         # Grant ECS Service permissions to DDB + S3
         servers_table.grant_read_write_data(mcp_registry_service.task_definition.task_role)
-        mcp_registry_service.target_group.configure_health_check(path='/health')
+        embedding_cache_table.grant_read_write_data(mcp_registry_service.task_definition.task_role)
+        change_feed_table.grant_read_write_data(mcp_registry_service.task_definition.task_role)
+        # Traffic only goes to tasks whose index is warm; a short interval brings new tasks in within seconds
+        mcp_registry_service.target_group.configure_health_check(
+            path='/ready',
+            interval=Duration.seconds(10),
+            healthy_threshold_count=2,
+        )
 
         
 
@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 from pydantic import BaseModel, Field
 from datetime import datetime
 from mcp.types import Tool
@@ -24,4 +24,27 @@ class ServerMetadata(BaseModel):
     prompts: List[PromptMetadata] = Field(default_factory=list, description="List of prompts provided by this server")
     
     created_at: Optional[datetime] = Field(None, description="Timestamp when server was registered")
-    last_heartbeat: Optional[datetime] = Field(None, description="Last time server sent a heartbeat")
\ No newline at end of file
+    updated_at: Optional[datetime] = Field(None, description="Timestamp of the last change to this record's indexed content")
+    last_heartbeat: Optional[datetime] = Field(None, description="Last time server sent a heartbeat")
+
+ScoreKind = Literal["similarity", "similarity_sum", "rrf", "bm25"]
+SCORE_KIND_DESCRIPTION = ("What `score` measures, which depends on how the query was ranked: similarity (vector "
+                          "search, best tool, in (0, 1]), similarity_sum (vector search, summed over tools), rrf "
+                          "(reciprocal rank fusion: hybrid search, or fusion=rrf) or bm25 (keyword match, unbounded). "
+                          "Scores are only comparable, or worth a threshold, between results of the same kind")
+
+class ServerMatch(ServerMetadata):
+    score: float = Field(..., description="Relevance of this server to the query (higher is better)")
+    score_kind: ScoreKind = Field("similarity", description=SCORE_KIND_DESCRIPTION)
+    best_distance: Optional[float] = Field(None, description="Vector distance of the server's closest matching tool (None for keyword-only matches)")
+    hit_count: int = Field(..., description="Number of this server's tools among the query's nearest tools")
+    matched_tools: List[str] = Field(default_factory=list, description="Names of the matching tools, closest first")
+
+class ServerSummary(BaseModel):
+    """Compact search result; the full record, tools included, is at GET /servers/{id}."""
+    id: str = Field(..., description="Unique server ID")
+    name: str = Field(..., description="Human-readable server name")
+    url: str = Field(..., description="Base URL of the MCP server")
+    score: float = Field(..., description="Relevance of this server to the query (higher is better)")
+    score_kind: ScoreKind = Field("similarity", description=SCORE_KIND_DESCRIPTION)
+    matched_tools: List[str] = Field(default_factory=list, description="Names of the matching tools, closest first")
@@ -0,0 +1,13 @@
+import os
+import sys
+
+# The registry service runs with code/app on PYTHONPATH (see code/Dockerfile) and models at the project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "code", "app")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# The example client's modules (registry_client, session_pool) are tested too
+EXAMPLE_CLIENT = os.path.join(ROOT, "examples", "client", "app")
+if EXAMPLE_CLIENT not in sys.path:
+    sys.path.append(EXAMPLE_CLIENT)
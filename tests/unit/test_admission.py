@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+
+from admission import AdmissionController, DeadlineExceeded, Overloaded, current_deadline, set_deadline
+from embedding_scheduler import EmbeddingScheduler
+
+
+def test_requests_beyond_the_queue_are_rejected_and_queued_ones_admitted_in_order():
+    async def run():
+        controller = AdmissionController("search", max_concurrency=1, max_queue=1, max_wait_seconds=1.0)
+        release, order = asyncio.Event(), []
+
+        async def request(name):
+            async with controller.admit():
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(request("second"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as rejected:
+            await request("third")
+        release.set()
+        await asyncio.gather(first, second)
+        return controller, order, rejected.value
+
+    controller, order, rejected = asyncio.run(run())
+    assert order == ["first", "second"]
+    assert rejected.status_code == 429 and rejected.retry_after >= 1
+    assert controller.stats()["active"] == 0 and controller.rejected == 1
+
+
+def test_queued_request_is_dropped_at_its_deadline():
+    async def run():
+        controller = AdmissionController("search", max_concurrency=1, max_queue=4, max_wait_seconds=10.0)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        set_deadline(time.monotonic(), 0.05)
+        started = time.monotonic()
+        with pytest.raises(Overloaded) as expired:
+            async with controller.admit():
+                pass
+        waited = time.monotonic() - started
+        release.set()
+        await holder
+        return controller, expired.value, waited
+
+    controller, expired, waited = asyncio.run(run())
+    assert expired.status_code == 503
+    assert waited < 1.0
+    assert controller.expired == 1 and controller.stats()["queued"] == 0
+
+
+def test_expired_queries_are_left_out_of_the_embedding_batch():
+    async def run():
+        batches = []
+
+        async def embed_batch(texts):
+            batches.append(texts)
+            return [[float(len(text))] for text in texts]
+
+        scheduler = EmbeddingScheduler(embed_batch, max_batch_size=8, max_wait_ms=20)
+
+        async def expired():
+            current_deadline.set(time.monotonic())
+            return await scheduler.embed("late")
+
+        return await asyncio.gather(expired(), scheduler.embed("on time"), return_exceptions=True), batches
+
+    (late, on_time), batches = asyncio.run(run())
+    assert isinstance(late, DeadlineExceeded)
+    assert on_time == [7.0]
+    assert batches == [["on time"]]
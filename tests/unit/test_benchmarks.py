@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("mcp")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_registry_app_imports_and_seeds_the_catalog():
+    # In a fresh process, as uvicorn loads it, so module-level setup in main runs exactly as in a benchmark
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([os.path.join(ROOT, "benchmarks"), os.path.join(ROOT, "code", "app"), ROOT]),
+        "BENCHMARK_TOOLS": "20",
+        "BENCHMARK_TOOLS_PER_SERVER": "5",
+    }
+    script = "import registry_app, main; print(len(main.servers_table.scan()['Items']))"
+    completed = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=120)
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip().splitlines()[-1] == "4"
@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from change_feed import Change, ChangeFeed, InMemoryChangeLog
+
+
+class InlineExecutor:
+    async def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+def replica(change_log, name, applied, **kwargs):
+    async def apply_change(server_id):
+        applied.append((name, server_id))
+
+    return ChangeFeed(change_log, InlineExecutor(), apply_change, replica_id=name, **kwargs)
+
+
+def test_replicas_apply_each_others_changes_but_not_their_own():
+    async def run():
+        change_log, applied = InMemoryChangeLog(), []
+        a, b = replica(change_log, "a", applied), replica(change_log, "b", applied)
+        a.record(SimpleNamespace(id="s1"))
+        a.record(SimpleNamespace(id="s1"))
+        await a.publish()
+        b.record(SimpleNamespace(id="s2"))
+        await b.publish()
+
+        await a.poll()
+        await b.poll()
+        return a, b, applied
+
+    a, b, applied = asyncio.run(run())
+    assert applied == [("a", "s2"), ("b", "s1")]  # duplicate writes coalesced into one change
+    assert a.applied_version == b.applied_version == 2
+    assert a.stats()["versions_behind"] == 0
+
+
+class GappyLog(InMemoryChangeLog):
+    """Version 1 was reserved by a writer that never wrote it."""
+
+    def read_after(self, version, limit):
+        return [change for change in [Change(2, "s2", "other", 0.0)] if change.version > version][:limit]
+
+    def head(self):
+        return 2
+
+
+def test_missing_versions_are_waited_for_then_skipped():
+    async def run():
+        applied = []
+        feed = replica(GappyLog(), "a", applied, gap_grace_seconds=0.05)
+        await feed.poll()
+        waited = (list(applied), feed.applied_version)
+        await asyncio.sleep(0.06)
+        await feed.poll()
+        return waited, applied, feed
+
+    waited, applied, feed = asyncio.run(run())
+    assert waited == ([], 0)
+    assert applied == [("a", "s2")]
+    assert feed.applied_version == 2 and feed.skipped_versions == 1
+
+
+def test_failed_publish_is_retried():
+    class FlakyLog(InMemoryChangeLog):
+        failures = 1
+
+        def append(self, server_ids, replica):
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("throttled")
+            return super().append(server_ids, replica)
+
+    async def run():
+        change_log = FlakyLog()
+        feed = replica(change_log, "a", [])
+        feed.record(SimpleNamespace(id="s1"))
+        try:
+            await feed.publish()
+        except RuntimeError:
+            pass
+        await feed.publish()
+        return change_log
+
+    assert asyncio.run(run()).head() == 1
+
+
+def test_change_that_keeps_failing_is_skipped_after_bounded_retries():
+    async def run():
+        change_log, attempts = InMemoryChangeLog(), []
+        change_log.append(["bad", "good"], "other")
+
+        async def apply_change(server_id):
+            attempts.append(server_id)
+            if server_id == "bad":
+                raise ValueError("malformed record")
+
+        feed = ChangeFeed(change_log, InlineExecutor(), apply_change, replica_id="a", max_apply_attempts=3)
+        for _ in range(3):
+            try:
+                await feed.poll()
+            except ValueError:
+                pass
+        return feed, attempts
+
+    feed, attempts = asyncio.run(run())
+    assert attempts == ["bad", "bad", "bad", "good"]
+    assert feed.applied_version == 2
+    assert feed.stats()["failed"] == 1 and feed.applied == 1
+    # Still owed to the index until a later change to the server applies
+    assert feed.applied_through() == feed.change_log.read_after(0, 1)[0].at
+
+
+def test_applied_through_follows_pending_and_given_up_changes():
+    async def run():
+        change_log, fail = InMemoryChangeLog(), {"bad"}
+        change_log.append(["bad"], "other")
+
+        async def apply_change(server_id):
+            if server_id in fail:
+                raise ValueError("malformed record")
+
+        feed = ChangeFeed(change_log, InlineExecutor(), apply_change, replica_id="a", max_apply_attempts=2)
+        with pytest.raises(ValueError):
+            await feed.poll()
+        pending = feed.applied_through()
+        await feed.poll()
+        given_up = feed.applied_through()
+
+        fail.clear()
+        change_log.append(["bad"], "other")
+        await feed.poll()
+        return change_log, pending, given_up, feed.applied_through()
+
+    change_log, pending, given_up, recovered = asyncio.run(run())
+    first = change_log.read_after(0, 1)[0].at
+    assert pending == given_up == first
+    assert recovered is None
@@ -0,0 +1,37 @@
+from dynamo import batch_get_items
+
+
+class FlakyDynamoDB:
+    """Leaves every key but the first unprocessed on the first call, and records each request."""
+
+    def __init__(self, items):
+        self.items = items
+        self.requests = []
+
+    def batch_get_item(self, RequestItems):
+        self.requests.append(RequestItems)
+        (table_name, request), = RequestItems.items()
+        keys = request["Keys"]
+        if len(self.requests) == 1:
+            processed, unprocessed = keys[:1], keys[1:]
+        else:
+            processed, unprocessed = keys, []
+        response = {"Responses": {table_name: [self.items[key["id"]] for key in processed]}}
+        if unprocessed:
+            response["UnprocessedKeys"] = {table_name: {"Keys": unprocessed}}
+        return response
+
+
+def test_consistent_reads_are_requested_on_every_attempt():
+    dynamodb = FlakyDynamoDB({"a": {"id": "a"}, "b": {"id": "b"}, "c": {"id": "c"}})
+    items = list(batch_get_items(dynamodb, "servers", [{"id": "a"}, {"id": "b"}, {"id": "c"}], consistent=True))
+
+    assert sorted(item["id"] for item in items) == ["a", "b", "c"]
+    assert len(dynamodb.requests) == 2
+    assert all(request["servers"]["ConsistentRead"] is True for request in dynamodb.requests)
+
+
+def test_reads_are_eventually_consistent_by_default():
+    dynamodb = FlakyDynamoDB({"a": {"id": "a"}})
+    list(batch_get_items(dynamodb, "servers", [{"id": "a"}]))
+    assert "ConsistentRead" not in dynamodb.requests[0]["servers"]
@@ -0,0 +1,45 @@
+from embedding_cache import DynamoEmbeddingStore, EmbeddingCache, InMemoryEmbeddingStore
+from local_dynamo import InMemoryDynamoDB
+
+
+class CountingBackend:
+    remote = True
+    dimension = 2
+
+    def __init__(self, model, offset=0.0):
+        self.fingerprint = f"test:{model}:2"
+        self.offset = offset
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded += texts
+        return [[float(len(text)), self.offset] for text in texts]
+
+
+def test_only_texts_not_seen_before_are_embedded():
+    backend = CountingBackend("a")
+    cache = EmbeddingCache(InMemoryEmbeddingStore(), backend)
+
+    assert cache.embed(["add", "subtract"]) == [[3.0, 0.0], [8.0, 0.0]]
+    assert cache.embed(["add", "multiply", "add"]) == [[3.0, 0.0], [8.0, 0.0], [3.0, 0.0]]
+    assert backend.embedded == ["add", "subtract", "multiply"]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_vectors_from_another_backend_are_not_reused():
+    store = InMemoryEmbeddingStore()
+    EmbeddingCache(store, CountingBackend("a")).embed(["add"])
+
+    other = CountingBackend("b", offset=1.0)
+    assert EmbeddingCache(store, other).embed(["add"]) == [[3.0, 1.0]]
+    assert other.embedded == ["add"]
+
+
+def test_dynamo_store_round_trips_packed_float32():
+    dynamodb = InMemoryDynamoDB()
+    dynamodb.Table("embeddings", key_name="hash")
+    store = DynamoEmbeddingStore(dynamodb, "embeddings")
+
+    store.put_many({"k": [0.5, -1.25, 3.0]})
+    assert isinstance(dynamodb.Table("embeddings").get_item(Key={"hash": "k"})["Item"]["vector"], bytes)
+    assert store.get_many(["k", "missing"]) == {"k": [0.5, -1.25, 3.0]}
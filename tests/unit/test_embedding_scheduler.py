@@ -0,0 +1,66 @@
+import asyncio
+
+from embedding_scheduler import EmbeddingScheduler
+
+
+class FakeEmbeddingBackend:
+    """Deterministic stand-in for the embeddings endpoint that records each batch it receives."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0.001)
+        if self.fail:
+            raise RuntimeError("embeddings unavailable")
+        return [[float(len(text)), float(sum(map(ord, text)))] for text in texts]
+
+
+def test_concurrent_queries_are_sent_as_one_batch():
+    backend = FakeEmbeddingBackend()
+
+    async def run():
+        scheduler = EmbeddingScheduler(backend, max_batch_size=100, max_wait_ms=20)
+        queries = [f"query {i}" for i in range(30)] + ["query 0"]
+        vectors = await asyncio.gather(*(scheduler.embed(query) for query in queries))
+        return queries, vectors
+
+    queries, vectors = asyncio.run(run())
+    assert len(backend.batches) == 1
+    assert len(backend.batches[0]) == 30  # duplicate text embedded once
+    for query, vector in zip(queries, vectors):
+        assert vector == [float(len(query)), float(sum(map(ord, query)))]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    backend = FakeEmbeddingBackend()
+
+    async def run():
+        scheduler = EmbeddingScheduler(backend, max_batch_size=8, max_wait_ms=50)
+        await scheduler.embed_many([f"q{i}" for i in range(20)])
+
+    asyncio.run(run())
+    assert [len(batch) for batch in backend.batches] == [8, 8, 4]
+
+
+def test_backend_errors_reach_every_waiter():
+    async def run():
+        scheduler = EmbeddingScheduler(FakeEmbeddingBackend(fail=True), max_wait_ms=1)
+        return await asyncio.gather(scheduler.embed("a"), scheduler.embed("b"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_embed_many_does_not_wait_for_the_batching_window():
+    backend = FakeEmbeddingBackend()
+
+    async def run():
+        scheduler = EmbeddingScheduler(backend, max_batch_size=64, max_wait_ms=10_000)
+        return await asyncio.wait_for(scheduler.embed_many(["a", "bb", "a"]), timeout=1)
+
+    vectors = asyncio.run(run())
+    assert backend.batches == [["a", "bb"]]
+    assert vectors[0] == vectors[2]
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from embeddings import EmbeddingBackend, LocalEmbeddingBackend, create_embedding_backend
+
+
+def test_local_backend_is_deterministic_and_normalized():
+    backend = LocalEmbeddingBackend(dimension=256)
+    first = backend.embed(["Add two numbers together", "Multiply a list of numbers"])
+    second = LocalEmbeddingBackend(dimension=256).embed(["Add two numbers together", "Multiply a list of numbers"])
+
+    assert first == second
+    assert all(len(vector) == 256 for vector in first)
+    assert np.allclose(np.linalg.norm(np.asarray(first), axis=1), 1.0, atol=1e-5)
+
+
+def test_local_backend_ranks_lexically_similar_text_closer():
+    backend = LocalEmbeddingBackend()
+    query, near, far = np.asarray(backend.embed(["calculate sum", "calculate_sum: add two numbers", "fetch weather forecast"]))
+
+    assert query @ near > query @ far
+
+
+def test_fingerprint_includes_dimension():
+    assert LocalEmbeddingBackend(128).fingerprint != LocalEmbeddingBackend(256).fingerprint
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_embedding_backend("word2vec")
+
+
+def test_backend_without_async_embedding_cannot_be_constructed():
+    class SyncOnly(EmbeddingBackend):
+        name, model, dimension = "sync", "v1", 2
+
+        def embed(self, texts):
+            return [[0.0, 0.0] for _ in texts]
+
+    with pytest.raises(TypeError):
+        SyncOnly()
+
+
+def test_local_async_embedding_runs_off_the_event_loop_thread():
+    backend = LocalEmbeddingBackend(dimension=64)
+    threads = []
+    embed = backend.embed
+
+    def recording_embed(texts):
+        threads.append(threading.get_ident())
+        return embed(texts)
+
+    backend.embed = recording_embed
+    vectors = asyncio.run(backend.aembed(["add numbers"]))
+
+    assert vectors == embed(["add numbers"])
+    assert threads and threads[0] != threading.get_ident()
@@ -0,0 +1,54 @@
+from lexical_index import LexicalIndex, tokenize
+
+
+def build_index():
+    index = LexicalIndex()
+    index.upsert("calc", "Example Calculator MCP Server", "MCP server with some math tools",
+                 ["sum", "math"], ["calculate_sum", "multiply"])
+    index.upsert("weather", "Weather Server", "Forecasts and current conditions",
+                 ["weather"], ["get_forecast", "getCurrentConditions"])
+    index.upsert("files", "File Server", "Read and write files", ["storage"], ["read_file", "write_file"])
+    return index
+
+
+def test_tokenize_splits_snake_and_camel_case():
+    assert tokenize("getCurrentConditions") == ["get", "current", "conditions"]
+    assert tokenize("calculate_sum the numbers") == ["calculate", "sum", "numbers"]
+
+
+def test_keyword_query_ranks_matching_server_first():
+    results = build_index().search("multiply numbers")
+    assert results[0].server_id == "calc"
+    assert results[0].matched_tools == ["multiply"]
+    assert results[0].score_kind == "bm25"
+
+
+def test_tag_filter_is_applied_before_scoring():
+    index = build_index()
+    allowed = index.servers_with_tags(["storage"])
+    assert allowed == {"files"}
+    assert all(result.server_id in allowed for result in index.search("read weather math", allowed=allowed))
+
+
+def test_exact_tool_name_match():
+    index = build_index()
+    assert index.exact_matches("get forecast") == {"weather"}
+    assert index.exact_matches("Calculate_Sum") == {"calc"}
+
+
+def test_upsert_replaces_and_remove_forgets():
+    index = build_index()
+    index.upsert("calc", "Calculator", "arithmetic", ["math"], ["divide"])
+    assert index.exact_matches("multiply") == set()
+    assert index.search("divide")[0].server_id == "calc"
+
+    index.remove("calc")
+    assert index.search("divide") == []
+    assert index.servers_with_tags(["math"]) == set()
+    assert len(index) == 2
+
+
+def test_covers_query():
+    index = build_index()
+    assert index.covers_query("weather forecast", "weather")
+    assert not index.covers_query("weather forecast", "calc")
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+from liveness import HeartbeatWriter, LivenessProber, LivenessTable
+
+
+def test_server_goes_stale_after_repeated_failures_and_recovers_on_heartbeat():
+    table = LivenessTable(failure_threshold=2)
+    changes = []
+    table.listeners.append(changes.append)
+    table.track("s1", "http://s1")
+    assert table.status("s1") == "unknown" and not table.is_stale("s1")
+
+    table.record_probe("s1", ok=False)
+    assert table.status("s1") == "alive"
+    table.record_probe("s1", ok=False)
+    assert table.status("s1") == "stale"
+    table.record_heartbeat("s1")
+    assert table.status("s1") == "alive"
+    assert changes == ["s1", "s1"]
+    assert table.stats() == {"alive": 1, "stale": 0, "unknown": 0}
+
+
+def test_heartbeats_are_coalesced_into_one_write_per_server():
+    class Store:
+        def __init__(self):
+            self.writes = []
+
+        async def touch_heartbeats(self, heartbeats):
+            self.writes.append(sorted(heartbeats))
+
+    store = Store()
+    writer = HeartbeatWriter(store)
+    for server_id in ("s1", "s2", "s1", "s1"):
+        writer.record(server_id)
+
+    async def run():
+        await writer.flush()
+        await writer.flush()
+
+    asyncio.run(run())
+    assert store.writes == [["s1", "s2"]]
+    assert (writer.received, writer.written) == (4, 2)
+
+
+def test_only_successful_health_responses_count_as_alive():
+    class Client:
+        async def get(self, url):
+            if "down" in url:
+                raise ConnectionError("refused")
+            return SimpleNamespace(status_code=int(url.split("/")[2]))
+
+    table = LivenessTable(failure_threshold=1)
+    for status in ("200", "301", "404", "503", "down"):
+        table.track(status, f"http://{status}")
+    prober = LivenessProber(table)
+    prober._client = Client()
+
+    asyncio.run(prober.probe_all())
+    assert {server_id: table.status(server_id) for server_id in table.targets} == {
+        "200": "alive", "301": "alive", "404": "stale", "503": "stale", "down": "stale",
+    }
@@ -0,0 +1,98 @@
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("mcp")
+pytest.importorskip("numpy")
+
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def main(monkeypatch, tmp_path):
+    """A fresh import of the app, run locally against an in-memory table and a snapshot index."""
+    monkeypatch.setenv("RUN_LOCAL", "True")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "local")
+    monkeypatch.setenv("LIVENESS_PROBE_INTERVAL_SECONDS", "0")
+    monkeypatch.setenv("INDEX_SNAPSHOT_PATH", str(tmp_path / "tools.idx"))
+    monkeypatch.setenv("INDEX_WARMUP_RETRY_SECONDS", "0.05")
+    monkeypatch.delitem(sys.modules, "main", raising=False)
+    import main
+
+    return main
+
+
+def server(server_id, tools=()):
+    return {"id": server_id, "name": server_id, "description": "", "tags": [], "url": f"http://{server_id}",
+            "tools": [{"name": name, "description": f"{name} two numbers", "inputSchema": {"type": "object"}}
+                      for name in tools]}
+
+
+def wait_until_ready(main, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not main.startup.ready:
+        assert time.monotonic() < deadline, main.startup.report()
+        time.sleep(0.01)
+
+
+def test_requests_are_turned_away_until_the_index_is_warm(main, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    sync = main.sync_chroma_from_dynamodb
+
+    def slow_sync():
+        main.startup.progress["servers"] = 0
+        started.set()
+        release.wait(10)
+        sync()
+
+    monkeypatch.setattr(main, "sync_chroma_from_dynamodb", slow_sync)
+    with TestClient(main.app) as client:
+        assert started.wait(10)
+        warming = client.get("/ready")
+        search = client.post("/search_servers", json={"query": "add numbers"})
+        bulk = client.post("/register_servers", json={"servers": [server("a")]})
+        release.set()
+        wait_until_ready(main)
+        ready = client.get("/ready")
+
+    assert warming.status_code == 503
+    assert warming.json()["status"] == "warming" and warming.json()["progress"] == {"servers": 0}
+    assert search.status_code == bulk.status_code == 503
+    assert "Retry-After" in search.headers and "Retry-After" in bulk.headers
+    assert ready.status_code == 200 and ready.json()["status"] == "ready"
+
+
+def test_warm_up_is_retried_after_a_failed_sync(main, monkeypatch):
+    attempts = []
+    sync = main.sync_chroma_from_dynamodb
+
+    def flaky_sync():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("table unavailable")
+        sync()
+
+    monkeypatch.setattr(main, "sync_chroma_from_dynamodb", flaky_sync)
+    with TestClient(main.app):
+        wait_until_ready(main)
+    assert len(attempts) == 2 and main.startup.error is None
+
+
+def test_stored_servers_are_searchable_once_ready(main):
+    main.open_storage()
+    main.servers_table.put_item(Item=server("calculator", tools=["add"]))
+    with TestClient(main.app) as client:
+        wait_until_ready(main)
+        response = client.post("/search_servers", json={"query": "add two numbers"})
+
+    assert response.status_code == 200
+    assert [match["id"] for match in response.json()] == ["calculator"]
+
+
+def test_bulk_registration_rejects_duplicate_ids(main):
+    response = TestClient(main.app).post("/register_servers", json={"servers": [server("a"), server("b"), server("a")]})
+    assert response.status_code == 422
+    assert "Duplicate server ids: a" in response.text
@@ -0,0 +1,37 @@
+from metrics import Histogram, RequestProfiler, render_counter, render_gauge
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("search_seconds", "Search latency.", buckets=(0.01, 0.1))
+    histogram.observe("embed", 0.005)
+    histogram.observe("embed", 0.05)
+    histogram.observe("embed", 5.0)
+
+    lines = histogram.render()
+    assert 'search_seconds_bucket{stage="embed",le="0.01"} 1' in lines
+    assert 'search_seconds_bucket{stage="embed",le="0.1"} 2' in lines
+    assert 'search_seconds_bucket{stage="embed",le="+Inf"} 3' in lines
+    assert 'search_seconds_count{stage="embed"} 3' in lines
+
+
+def test_gauge_with_labels():
+    lines = render_gauge("hit_ratio", "Hit ratio.", {(("cache", "search"),): 0.5})
+    assert lines[-1] == 'hit_ratio{cache="search"} 0.5'
+
+
+def test_counter_is_typed_as_counter():
+    lines = render_counter("shed_total", "Requests shed.", {(("reason", "queue_full"),): 3})
+    assert lines == ["# HELP shed_total Requests shed.", "# TYPE shed_total counter", 'shed_total{reason="queue_full"} 3']
+
+
+def test_profiler_samples_only_when_enabled():
+    disabled = RequestProfiler(sample_rate=0)
+    with disabled.maybe_profile("POST /search_servers"):
+        sum(range(1000))
+    assert disabled.latest() == []
+
+    enabled = RequestProfiler(sample_rate=1)
+    with enabled.maybe_profile("POST /search_servers"):
+        sum(range(1000))
+    [profile] = enabled.latest("POST /search_servers")
+    assert "function calls" in profile["profile"]
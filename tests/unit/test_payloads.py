@@ -0,0 +1,81 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from mcp.types import Tool
+
+from models.server_meta_data import ServerMatch, ServerMetadata, ServerSummary
+from payloads import ServerPayloads, etag_matches
+from ranking import ServerScore
+
+
+def server(**overrides):
+    fields = {"id": "s1", "name": "Calculator", "description": "math tools", "tags": ["math"], "url": "http://calc",
+              "tools": [Tool(name="calculate_sum", description="Add", inputSchema={"type": "object"})]}
+    fields.update(overrides)
+    return ServerMetadata(**fields)
+
+
+SCORE = ServerScore(server_id="s1", score=0.5, best_distance=0.25, hit_count=1, matched_tools=["calculate_sum"])
+
+
+def test_views_match_the_response_models():
+    payloads = ServerPayloads()
+    record = server()
+
+    summary = json.loads(payloads.matches([(SCORE, record)], "summary"))
+    assert ServerSummary.model_validate(summary[0]).matched_tools == ["calculate_sum"]
+    assert summary[0]["score_kind"] == "similarity"
+    assert "tools" not in summary[0]
+
+    full = json.loads(payloads.matches([(SCORE, record)], "full"))
+    assert ServerMatch.model_validate(full[0]).tools[0].name == "calculate_sum"
+
+
+def test_serialized_once_per_record_object():
+    payloads = ServerPayloads()
+    record = server()
+    payloads.match(SCORE, record)
+    payloads.match(SCORE, record, "full")
+    assert (payloads.hits, payloads.misses) == (1, 1)
+
+    updated = server(name="Calculator v2")
+    assert json.loads(payloads.match(SCORE, updated))["name"] == "Calculator v2"
+    payloads.invalidate(updated)
+    assert payloads.stats()["entries"] == 0
+
+
+def test_batch_response():
+    body = json.loads(ServerPayloads().batch(["add", "none"], [[(SCORE, server())], []]))
+    assert [result["query"] for result in body["results"]] == ["add", "none"]
+    assert body["results"][0]["servers"][0]["id"] == "s1"
+    assert body["results"][1]["servers"] == []
+
+
+def test_tool_schemas_are_versioned_by_etag():
+    payloads = ServerPayloads()
+    body, tools_etag = payloads.tools(server())
+    assert json.loads(body)[0]["function"]["parameters"] == {"type": "object", "additionalProperties": False}
+    assert etag_matches(tools_etag, tools_etag)
+    assert etag_matches(f'"other", W/{tools_etag}', tools_etag)
+
+    _, changed_etag = payloads.tools(server(tools=[Tool(name="multiply", inputSchema={"type": "object"})]))
+    assert not etag_matches(tools_etag, changed_etag)
+
+
+def test_decimal_schema_numbers_from_dynamodb_stay_numbers():
+    schema = {"type": "object", "properties": {"count": {"type": "integer", "minimum": Decimal("0"),
+                                                         "default": Decimal("1.5")}}}
+    record = server(tools=[Tool(name="calculate_sum", description="Add", inputSchema=schema)])
+
+    full = json.loads(ServerPayloads().full(record))
+    assert full["tools"][0]["inputSchema"]["properties"]["count"] == {"type": "integer", "minimum": 0, "default": 1.5}
+
+
+def test_function_calling_parameters_keep_decimal_numbers_as_numbers():
+    schema = {"type": "object", "properties": {"count": {"type": "integer", "minimum": Decimal("0")}}}
+    body, _ = ServerPayloads().tools(server(tools=[Tool(name="calculate_sum", inputSchema=schema)]))
+    assert json.loads(body)[0]["function"]["parameters"]["properties"]["count"]["minimum"] == 0
@@ -0,0 +1,47 @@
+import pytest
+
+from ranking import fuse_rankings, rank_servers
+
+
+def hits(*pairs):
+    return [{"server_id": server_id, "tool_name": tool_name} for server_id, tool_name in pairs]
+
+
+def test_max_fusion_orders_servers_by_best_tool():
+    metadatas = hits(("b", "b1"), ("a", "a1"), ("a", "a2"), ("c", "c1"))
+    ranked = rank_servers(metadatas, [0.1, 0.2, 0.3, 0.9], fusion="max")
+
+    assert [entry.server_id for entry in ranked] == ["b", "a", "c"]
+    assert ranked[1].hit_count == 2
+    assert ranked[1].matched_tools == ["a1", "a2"]
+    assert ranked[1].best_distance == 0.2
+
+
+def test_sum_fusion_rewards_servers_with_many_hits():
+    metadatas = hits(("b", "b1"), ("a", "a1"), ("a", "a2"), ("a", "a3"))
+    ranked = rank_servers(metadatas, [0.1, 0.2, 0.3, 0.4], fusion="sum")
+
+    assert [entry.server_id for entry in ranked] == ["a", "b"]
+    assert ranked[0].score > ranked[1].score
+
+
+def test_rrf_fusion_ignores_distance_scale():
+    metadatas = hits(("a", "a1"), ("b", "b1"))
+    far = rank_servers(metadatas, [5.0, 500.0], fusion="rrf")
+    near = rank_servers(metadatas, [0.1, 0.2], fusion="rrf")
+    assert [(entry.server_id, entry.score) for entry in far] == [(entry.server_id, entry.score) for entry in near]
+
+
+def test_unknown_fusion_is_rejected():
+    with pytest.raises(ValueError):
+        rank_servers([], [], fusion="median")
+
+
+def test_every_score_says_what_it_measures():
+    metadatas = hits(("a", "a1"), ("b", "b1"))
+    kinds = {fusion: {entry.score_kind for entry in rank_servers(metadatas, [0.1, 0.2], fusion=fusion)}
+             for fusion in ("max", "sum", "rrf")}
+    assert kinds == {"max": {"similarity"}, "sum": {"similarity_sum"}, "rrf": {"rrf"}}
+
+    lexical = [entry._replace(score=5.9, score_kind="bm25") for entry in rank_servers(metadatas[:1], [0.0])]
+    assert {entry.score_kind for entry in fuse_rankings(rank_servers(metadatas, [0.1, 0.2]), lexical)} == {"rrf"}
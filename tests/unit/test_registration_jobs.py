@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from models.server_meta_data import ServerMetadata
+from registration_jobs import RegistrationQueue, RegistrationQueueFull
+
+
+def server(name):
+    return ServerMetadata(id=name, name=name, description="", tags=[], url=f"http://{name}", tools=[])
+
+
+def test_jobs_move_from_queued_through_running_to_their_outcome():
+    async def run():
+        release = asyncio.Event()
+        stages = []
+
+        async def handler(server, on_stage):
+            on_stage("embed")
+            stages.append(server.name)
+            await release.wait()
+            if server.name == "broken":
+                raise ValueError("no tools")
+            return {"server_id": f"{server.name}-id"}
+
+        queue = RegistrationQueue(handler, concurrency=2)
+        ok, broken = queue.submit(server("ok")), queue.submit(server("broken"))
+        assert (ok.status, broken.status) == ("queued", "queued")
+
+        queue.start()
+        while len(stages) < 2:
+            await asyncio.sleep(0)
+        assert (ok.status, ok.stage) == ("running", "embed")
+
+        release.set()
+        await queue._queue.join()
+        await queue.stop()
+        return queue, ok, broken
+
+    queue, ok, broken = asyncio.run(run())
+    assert ok.status == "succeeded" and ok.server_id == "ok-id" and ok.finished_at is not None
+    assert broken.status == "failed" and broken.error == "ValueError: no tools" and broken.stage == "embed"
+    assert queue.get(ok.job_id) is ok
+    assert queue.stats()["succeeded"] == 1 and queue.stats()["failed"] == 1
+
+
+def test_submissions_beyond_the_backlog_are_refused():
+    async def run():
+        async def handler(server, on_stage):
+            return {}
+
+        queue = RegistrationQueue(handler, max_pending=1)
+        queue.submit(server("first"))
+        with pytest.raises(RegistrationQueueFull):
+            queue.submit(server("second"))
+        return queue
+
+    queue = asyncio.run(run())
+    assert queue.stats()["queued"] == 1
+
+
+def test_full_backlog_is_answered_with_503(monkeypatch):
+    pytest.importorskip("fastapi")
+    monkeypatch.setenv("EMBEDDING_BACKEND", "local")
+    from fastapi.testclient import TestClient
+
+    import main
+
+    async def handler(server, on_stage):
+        return {}
+
+    queue = RegistrationQueue(handler, max_pending=1)
+    queue.submit(server("first"))
+    monkeypatch.setattr(main, "registration_queue", queue)
+
+    response = TestClient(main.app).post("/register_server", json=server("second").model_dump(mode="json"))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from registry_client import RegistryClient, RegistryUnavailable, ToolSchemaCache
+
+
+def make_client(handler, **options):
+    client = RegistryClient("http://registry", **options)
+    client._http = httpx.AsyncClient(base_url="http://registry", transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_tool_schemas_are_revalidated_by_etag(tmp_path):
+    requests = []
+    tools = [{"type": "function", "function": {"name": "ping"}}]
+
+    def handler(request):
+        requests.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=tools, headers={"ETag": '"v1"'})
+
+    path = str(tmp_path / "tools.json")
+
+    async def run():
+        async with make_client(handler, tool_schemas=ToolSchemaCache(path)) as client:
+            first = await client.tools("s1")
+        # A new process picks the schemas and their ETag up from disk
+        async with make_client(handler, tool_schemas=ToolSchemaCache(path)) as client:
+            return first, await client.tools("s1")
+
+    first, second = asyncio.run(run())
+    assert first == second == tools
+    assert requests == [None, '"v1"']
+
+
+def test_last_known_results_are_served_while_the_registry_is_down():
+    responses = iter([httpx.Response(200, json=[{"id": "s1"}]), httpx.Response(503), httpx.Response(503)])
+
+    async def run():
+        async with make_client(lambda request: next(responses), cache_ttl_seconds=0) as client:
+            fresh = await client.search("add numbers")
+            stale = await client.search("Add  numbers")
+            with pytest.raises(RegistryUnavailable):
+                await client.search("never seen")
+            return fresh, stale, client.stats()
+
+    fresh, stale, stats = asyncio.run(run())
+    assert fresh == stale == [{"id": "s1"}]
+    assert stats["fallbacks"] == 1
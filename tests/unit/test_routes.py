@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from mcp.types import Tool
+
+import routes
+from models.server_meta_data import ServerMetadata
+
+
+class Store:
+    def __init__(self):
+        self.written = []
+        self.records = {}
+
+    async def get(self, server_id, fresh=False):
+        return self.records.get(server_id)
+
+    async def get_many(self, server_ids, fresh=False):
+        return {server_id: self.records[server_id] for server_id in server_ids if server_id in self.records}
+
+    async def put(self, record):
+        await self.put_many([record])
+
+    async def put_many(self, records):
+        self.written += [record.id for record in records]
+        self.records.update((record.id, record) for record in records)
+
+
+class Index:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.added = []
+
+    async def add(self, ids, documents, metadatas):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("index unavailable")
+        self.added += ids
+
+    async def delete(self, ids):
+        pass
+
+
+def server(name):
+    return ServerMetadata(id=name, name=name, description="", tags=[], url=f"http://{name}", tools=[])
+
+
+@pytest.fixture
+def discovery(monkeypatch):
+    async def discover_tools(server_url_sse, timeouts, on_stage=None):
+        if "down" in server_url_sse:
+            raise ConnectionError("refused")
+        return [Tool(name="ping", description="", inputSchema={"type": "object"})]
+
+    monkeypatch.setattr(routes, "discover_tools", discover_tools)
+
+
+def test_servers_that_fail_discovery_are_reported_and_the_rest_registered(discovery):
+    store, index = Store(), Index()
+    results = asyncio.run(routes.register_servers([server("up"), server("down"), server("also-up")], store, index))
+
+    assert [(result["name"], result["status"]) for result in results] == [
+        ("up", "registered"), ("down", "failed"), ("also-up", "registered"),
+    ]
+    assert results[1]["error"] == "ConnectionError: refused"
+    assert store.written == ["up", "also-up"]
+    assert index.added == ["up:ping", "also-up:ping"]
+
+
+def test_a_failed_batch_write_fails_every_server_in_it(discovery):
+    results = asyncio.run(routes.register_servers([server("up"), server("down")], Store(), Index(failures=1)))
+
+    assert [result["status"] for result in results] == ["failed", "failed"]
+    assert results[0]["error"] == "RuntimeError: index unavailable"
+
+
+def test_registration_that_failed_to_index_is_indexed_on_retry(discovery):
+    store, index = Store(), Index(failures=1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await routes.register_server(server("up"), store, index)
+        return await routes.register_server(server("up"), store, index)
+
+    result = asyncio.run(run())
+    assert result["status"] == "registered"
+    assert index.added == ["up:ping"]
+    assert store.written == ["up"]
+
+
+def test_bulk_registration_that_failed_to_index_is_indexed_on_retry(discovery):
+    store, index = Store(), Index(failures=1)
+
+    async def run():
+        failed = await routes.register_servers([server("up")], store, index)
+        return failed, await routes.register_servers([server("up")], store, index)
+
+    failed, retried = asyncio.run(run())
+    assert failed[0]["status"] == "failed" and retried[0]["status"] == "registered"
+    assert index.added == ["up:ping"]
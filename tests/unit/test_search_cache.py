@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+from admission import DeadlineExceeded, check_deadline, current_deadline
+from embedding_scheduler import EmbeddingScheduler
+from search_cache import SearchCache, search_key
+
+
+def test_concurrent_identical_queries_share_one_computation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["server"]
+
+    async def run():
+        cache = SearchCache()
+        key = search_key("  Add  Numbers ", top_k=5)
+        results = await asyncio.gather(*(cache.get_or_compute(key, compute) for _ in range(50)))
+        assert all(result == ["server"] for result in results)
+        assert await cache.get_or_compute(search_key("add numbers", top_k=5), compute) == ["server"]
+        return cache
+
+    cache = asyncio.run(run())
+    assert len(calls) == 1
+    assert cache.coalesced == 49
+    assert cache.hits == 1
+
+
+def test_invalidate_discards_results_computed_against_old_index():
+    async def run():
+        cache = SearchCache()
+        release = asyncio.Event()
+        versions = iter(["old", "new"])
+
+        async def compute():
+            value = next(versions)
+            if value == "old":
+                await release.wait()
+            return value
+
+        pending = asyncio.ensure_future(cache.get_or_compute("q", compute))
+        await asyncio.sleep(0)
+        cache.invalidate()
+        release.set()
+        assert await pending == "old"
+        assert await cache.get_or_compute("q", compute) == "new"
+
+    asyncio.run(run())
+
+
+def test_failures_are_not_cached():
+    attempts = []
+
+    async def compute():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("embedding timeout")
+        return "ok"
+
+    async def run():
+        cache = SearchCache()
+        try:
+            await cache.get_or_compute("q", compute)
+        except RuntimeError:
+            pass
+        assert await cache.get_or_compute("q", compute) == "ok"
+
+    asyncio.run(run())
+
+
+def test_coalesced_callers_each_wait_until_their_own_deadline():
+    seen_deadlines = []
+
+    async def compute():
+        seen_deadlines.append(current_deadline.get())
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def impatient(cache):
+        current_deadline.set(time.monotonic() + 0.02)
+        return await cache.get_or_compute("q", compute)
+
+    async def run():
+        cache = SearchCache()
+        return await asyncio.gather(impatient(cache), cache.get_or_compute("q", compute), return_exceptions=True)
+
+    late, on_time = asyncio.run(run())
+    assert isinstance(late, DeadlineExceeded)
+    assert on_time == "ok"
+    # The caller without a deadline is still waiting, so the shared computation has none either
+    assert seen_deadlines == [None]
+
+
+def test_shared_computation_runs_until_the_latest_waiting_deadline():
+    seen_deadlines = []
+
+    async def compute():
+        await asyncio.sleep(0)
+        seen_deadlines.append(current_deadline.get())
+        return "ok"
+
+    async def caller(cache, deadline):
+        current_deadline.set(deadline)
+        return await cache.get_or_compute("q", compute)
+
+    async def run():
+        cache = SearchCache()
+        now = time.monotonic()
+        return await asyncio.gather(caller(cache, now + 5), caller(cache, now + 10)), now
+
+    results, now = asyncio.run(run())
+    assert results == ["ok", "ok"]
+    assert seen_deadlines == [pytest.approx(now + 10)]
+
+
+def test_expired_lone_request_never_reaches_the_embedder():
+    async def run():
+        batches = []
+
+        async def embed_batch(texts):
+            batches.append(texts)
+            return [[0.0] for _ in texts]
+
+        scheduler = EmbeddingScheduler(embed_batch, max_batch_size=8, max_wait_ms=1)
+        cache = SearchCache()
+
+        async def search():
+            check_deadline("embedding")
+            return await scheduler.embed("add numbers")
+
+        current_deadline.set(time.monotonic())
+        with pytest.raises(DeadlineExceeded):
+            await cache.get_or_compute("q", search)
+        await asyncio.sleep(0.05)
+        return batches, cache
+
+    batches, cache = asyncio.run(run())
+    assert batches == []
+    assert cache.stats()["entries"] == 0 and cache.stats()["inflight"] == 0
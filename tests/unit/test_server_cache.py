@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp")
+
+import server_cache as server_cache_module
+from executors import BoundedExecutor
+from local_dynamo import InMemoryDynamoDB
+from models.server_meta_data import ServerMetadata
+from server_cache import ServerMetadataCache
+from storage import ServerStore
+
+
+def server(server_id, description=""):
+    return ServerMetadata(id=server_id, name=server_id, description=description, tags=[], url=f"http://{server_id}",
+                          tools=[])
+
+
+def make_cache(ids, **options):
+    dynamodb = InMemoryDynamoDB()
+    table = dynamodb.Table("servers")
+    for server_id in ids:
+        table.put_item(Item=server(server_id).model_dump(mode="json"))
+    return table, ServerMetadataCache(dynamodb, "servers", **options)
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(server_cache_module.time, "monotonic", lambda: clock[0])
+    table, cache = make_cache(["a"], ttl_seconds=10)
+
+    cache.get_many(["a"])
+    table.put_item(Item=server("a", description="changed").model_dump(mode="json"))
+    assert cache.get_many(["a"])["a"].description == ""
+    clock[0] += 11
+    assert cache.get_many(["a"])["a"].description == "changed"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    _, cache = make_cache(["a", "b", "c"], max_entries=2)
+    cache.get_many(["a", "b"])
+    cache.get_many(["a"])
+    cache.get_many(["c"])
+
+    assert list(cache._entries) == ["a", "c"]
+    assert cache.get_many(["b", "missing"]).keys() == {"b"}
+
+
+def test_writes_through_the_store_invalidate_the_cached_record():
+    table, cache = make_cache(["a"])
+    executor = BoundedExecutor("test", 2)
+    store = ServerStore(table, cache, executor)
+
+    async def run():
+        await store.get_many(["a"])
+        await store.put(server("a", description="changed"))
+        return await store.get_many(["a"])
+
+    try:
+        assert asyncio.run(run())["a"].description == "changed"
+    finally:
+        executor.shutdown()
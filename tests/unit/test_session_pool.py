@@ -0,0 +1,156 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+anyio = pytest.importorskip("anyio")
+pytest.importorskip("mcp")
+pytest.importorskip("openai")
+
+import session_pool
+from session_pool import MCPClient, MCPSessionPool
+
+
+class FakeMCP:
+    """Stands in for sse_client and ClientSession; `on_call(session_number, tool)` decides each tool call."""
+
+    def __init__(self, on_call=None, hang=False):
+        self.on_call = on_call or (lambda session, tool: f"{tool} on session {session}")
+        self.hang = hang
+        self.sessions = []
+        self.closed = []
+
+    @asynccontextmanager
+    async def sse_client(self, url):
+        if self.hang:
+            await asyncio.sleep(3600)
+        yield url, None
+
+    def session(self, read, write):
+        fake = self
+
+        class Session:
+            number = len(fake.sessions) + 1
+
+            async def __aenter__(self):
+                fake.sessions.append(read)
+                return self
+
+            async def __aexit__(self, *exc):
+                fake.closed.append(self.number)
+
+            async def initialize(self):
+                pass
+
+            async def list_tools(self):
+                return SimpleNamespace(tools=[])
+
+            async def call_tool(self, name, arguments):
+                await asyncio.sleep(0)
+                return fake.on_call(self.number, name)
+
+        return Session()
+
+
+@pytest.fixture
+def fake_mcp(monkeypatch):
+    def install(**options):
+        fake = FakeMCP(**options)
+        monkeypatch.setattr(session_pool, "sse_client", fake.sse_client)
+        monkeypatch.setattr(session_pool, "ClientSession", fake.session)
+        return fake
+
+    return install
+
+
+def test_call_on_a_closed_session_is_retried_once_on_a_new_one(fake_mcp):
+    fake = fake_mcp(on_call=lambda session, tool: (_ for _ in ()).throw(anyio.ClosedResourceError())
+                    if session == 1 else "ok")
+
+    async def run():
+        client = MCPClient("http://s1", "s1")
+        # Both callers find the first session dead; only one of them replaces it
+        results = await asyncio.gather(client.call_tool("ping", {}), client.call_tool("ping", {}))
+        await client.cleanup()
+        return results
+
+    assert asyncio.run(run()) == ["ok", "ok"]
+    assert len(fake.sessions) == 2
+
+
+def test_tool_errors_are_not_retried(fake_mcp):
+    fake = fake_mcp(on_call=lambda session, tool: (_ for _ in ()).throw(TimeoutError("tool timed out")))
+
+    async def run():
+        client = MCPClient("http://s1", "s1")
+        try:
+            with pytest.raises(TimeoutError):
+                await client.call_tool("ping", {})
+        finally:
+            await client.cleanup()
+
+    asyncio.run(run())
+    assert len(fake.sessions) == 1
+
+
+def test_connect_gives_up_after_the_timeout(fake_mcp):
+    fake_mcp(hang=True)
+
+    async def run():
+        client = MCPClient("http://s1", "s1", connect_timeout_seconds=0.05)
+        with pytest.raises(TimeoutError):
+            await client.connect()
+        return client
+
+    client = asyncio.run(run())
+    assert client._task is None and not client.connected
+
+
+def test_pool_shares_openings_and_evicts_least_recently_used(fake_mcp):
+    fake = fake_mcp()
+
+    async def run():
+        pool = MCPSessionPool(max_sessions=2)
+        first, again = await asyncio.gather(pool.get("a", "http://a"), pool.get("a", "http://a"))
+        await pool.get("b", "http://b")
+        await pool.get("a", "http://a")
+        await pool.get("c", "http://c")
+        sessions = sorted(pool._clients)
+        await pool.close_all()
+        return pool, first is again, sessions
+
+    pool, shared, sessions = asyncio.run(run())
+    assert shared and pool.opened == 3
+    assert sessions == ["a", "c"] and pool.evicted == 1
+    assert fake.sessions == ["http://a/sse", "http://b/sse", "http://c/sse"]
+
+
+def test_idle_sessions_are_closed_on_the_next_checkout(fake_mcp):
+    fake_mcp()
+
+    async def run():
+        pool = MCPSessionPool(idle_timeout_seconds=0.01)
+        idle = await pool.get("a", "http://a")
+        await asyncio.sleep(0.02)
+        await pool.get("b", "http://b")
+        result = sorted(pool._clients), idle.connected
+        await pool.close_all()
+        return result
+
+    assert asyncio.run(run()) == (["b"], False)
+
+
+def test_prewarm_stops_at_the_pool_size(fake_mcp):
+    fake = fake_mcp()
+
+    async def run():
+        pool = MCPSessionPool(max_sessions=2)
+        pool.prewarm([SimpleNamespace(id=name, url=f"http://{name}") for name in ("a", "b", "c")])
+        await asyncio.gather(*pool._prewarming)
+        sessions = sorted(pool._clients)
+        await pool.close_all()
+        return sessions
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert len(fake.sessions) == 2
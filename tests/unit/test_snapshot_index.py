@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from snapshot_index import SnapshotIndex, SnapshotWriter
+
+
+def metadata(server_id, tool):
+    return {"server_id": server_id, "server_name": server_id, "tool_name": tool, "tool_description": ""}
+
+
+def make_index(vectors):
+    index = SnapshotIndex(dimension=3, metadata={"embedding_fingerprint": "test"})
+    ids = [f"s{i % 3}:t{i}" for i in range(len(vectors))]
+    index.upsert(ids, vectors, [metadata(f"s{i % 3}", f"t{i}") for i in range(len(vectors))])
+    return index
+
+
+def test_query_matches_exact_squared_l2_and_filters_by_server():
+    vectors = np.random.default_rng(0).normal(size=(40, 3)).astype("float32")
+    index = make_index(vectors)
+    query = np.array([[0.5, -0.2, 1.0]], dtype="float32")
+
+    result = index.query(query.tolist(), n_results=5)
+    expected = ((vectors - query) ** 2).sum(axis=1)
+    assert result["ids"][0] == [f"s{i % 3}:t{i}" for i in np.argsort(expected)[:5]]
+    assert np.allclose(result["distances"][0], np.sort(expected)[:5], atol=1e-5)
+
+    filtered = index.query(query.tolist(), n_results=50, where={"server_id": {"$in": ["s1"]}})
+    assert len(filtered["ids"][0]) == len([i for i in range(40) if i % 3 == 1])
+    assert {meta["server_id"] for meta in filtered["metadatas"][0]} == {"s1"}
+
+
+def test_saved_snapshot_is_mapped_and_later_changes_overlay_it(tmp_path):
+    path = str(tmp_path / "tools.idx")
+    vectors = np.eye(3, dtype="float32").tolist() * 2
+    index = make_index(vectors)
+    index.save(path, watermark="2025-01-01T00:00:00.000000Z")
+
+    loaded = SnapshotIndex.load(path)
+    assert isinstance(loaded._matrix, np.memmap)
+    assert loaded.count() == 6
+    assert loaded.sync_state() == {"watermark": "2025-01-01T00:00:00.000000Z", "fingerprint": "test"}
+
+    loaded.upsert(["s0:t0"], [[0.0, 0.0, 5.0]], [metadata("s0", "t0")])
+    loaded.delete(where={"server_id": "s1"})
+    assert loaded.count() == 4
+    assert loaded.get(where={"server_id": "s0"})["ids"] == ["s0:t3", "s0:t0"]
+    assert loaded.query([[0.0, 0.0, 5.0]], n_results=1)["ids"] == [["s0:t0"]]
+
+    loaded.save(path, watermark="2025-01-02T00:00:00.000000Z")
+    assert loaded.stats()["overlay_tools"] == 0
+    reloaded = SnapshotIndex.load(path)
+    assert sorted(reloaded.get()["ids"]) == ["s0:t0", "s0:t3", "s2:t2", "s2:t5"]
+    assert reloaded.query([[0.0, 0.0, 5.0]], n_results=1)["distances"] == [[0.0]]
+
+
+def test_snapshot_watermark_is_held_back_to_the_oldest_unapplied_change(tmp_path):
+    path = str(tmp_path / "tools.idx")
+    synced_at = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    behind_since = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+    writer = SnapshotWriter(make_index(np.eye(3, dtype="float32").tolist()), path, executor=None,
+                            watermark_skew_seconds=60, applied_through=lambda: behind_since)
+
+    writer.save(synced_at=synced_at)
+    assert SnapshotIndex.load(path).sync_state()["watermark"] == "2024-12-31T23:59:00.000000Z"
+
+    writer.applied_through = lambda: None
+    writer.save(synced_at=synced_at)
+    assert SnapshotIndex.load(path).sync_state()["watermark"] == "2025-01-01T23:59:00.000000Z"
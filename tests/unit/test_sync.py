@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+from local_dynamo import InMemoryTable
+from sync import format_timestamp, load_sync_state, parallel_scan, save_sync_state, sync_index
+
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+        self.deleted = []
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self.batches.append(ids)
+
+    def delete(self, where):
+        self.deleted.extend(where["server_id"]["$in"])
+
+
+class FakeEmbeddingCache:
+    dimension = 1
+
+    def embed(self, texts):
+        return [[float(len(text))] for text in texts]
+
+
+def make_table(server_count, tools_per_server, page_size=7):
+    table = InMemoryTable("servers", page_size=page_size)
+    for i in range(server_count):
+        table.put_item(Item={
+            "id": f"server-{i}",
+            "name": f"Server {i}",
+            "description": "test server",
+            "tools": [{"name": f"tool_{j}", "description": f"tool {j}"} for j in range(tools_per_server)],
+        })
+    return table
+
+
+def test_parallel_scan_follows_pagination_across_segments():
+    table = make_table(50, 1)
+    pages = list(parallel_scan(table, total_segments=3))
+    ids = [item["id"] for page in pages for item in page]
+    assert sorted(ids) == sorted(f"server-{i}" for i in range(50))
+    assert len(pages) > 3
+
+
+def test_sync_index_adds_every_tool_in_bounded_batches():
+    table = make_table(40, 3)
+    collection = FakeCollection()
+    stats = sync_index(table, collection, FakeEmbeddingCache(), total_segments=4, batch_size=16)
+
+    indexed = [tool_id for batch in collection.batches for tool_id in batch]
+    assert stats["servers"] == 40
+    assert stats["tools"] == len(indexed) == 120
+    assert len(set(indexed)) == 120
+    assert all(len(batch) <= 16 for batch in collection.batches)
+
+
+def test_parallel_scan_surfaces_segment_errors():
+    class BrokenTable(InMemoryTable):
+        def scan(self, **kwargs):
+            raise RuntimeError("throttled")
+
+    try:
+        list(parallel_scan(BrokenTable(), total_segments=2))
+    except RuntimeError as e:
+        assert "throttled" in str(e)
+    else:
+        assert False, "expected scan error to propagate"
+
+
+def test_sync_since_watermark_only_reapplies_changed_servers():
+    table = make_table(10, 2)
+    watermark = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(10):
+        item = table.get_item(Key={"id": f"server-{i}"})["Item"]
+        changed = watermark + timedelta(minutes=1) if i < 3 else watermark - timedelta(days=1)
+        item["created_at"] = format_timestamp(watermark - timedelta(days=2))
+        item["updated_at"] = format_timestamp(changed)
+        table.put_item(Item=item)
+
+    collection = FakeCollection()
+    stats = sync_index(table, collection, FakeEmbeddingCache(), total_segments=2, since=watermark)
+
+    assert stats["servers"] == 3
+    assert stats["tools"] == 6
+    assert sorted(collection.deleted) == ["server-0", "server-1", "server-2"]
+
+
+def test_sync_state_round_trips(tmp_path):
+    path = str(tmp_path / "sync_state.json")
+    assert load_sync_state(path) is None
+    save_sync_state(path, datetime(2025, 5, 1, 12, tzinfo=timezone.utc), "local:hashing-v1:512")
+    assert load_sync_state(path) == {"watermark": "2025-05-01T12:00:00.000000Z", "fingerprint": "local:hashing-v1:512"}
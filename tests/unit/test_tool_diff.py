@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from mcp.types import Tool
+
+from models.server_meta_data import ServerMetadata
+from tool_diff import diff_server
+
+
+def server(tools, **overrides):
+    fields = {"id": "s1", "name": "Calculator", "description": "math tools", "tags": ["math"],
+              "url": "http://calc", "tools": tools}
+    fields.update(overrides)
+    return ServerMetadata(**fields)
+
+
+def tool(name, description="", maximum=10):
+    return Tool(name=name, description=description,
+                inputSchema={"type": "object", "properties": {"a": {"type": "number", "maximum": maximum}}})
+
+
+def test_identical_record_read_back_from_dynamodb_is_unchanged():
+    # boto3 returns every number as Decimal
+    stored = server([tool("add", maximum=Decimal("10"))])
+    diff = diff_server(stored, server([tool("add", maximum=10)]))
+    assert diff.unchanged
+
+
+def test_only_changed_and_removed_tools_are_reported():
+    stored = server([tool("add"), tool("multiply"), tool("divide")])
+    diff = diff_server(stored, server([tool("add"), tool("multiply", "now with lists"), tool("sqrt")]))
+
+    assert sorted(t.name for t in diff.upserted) == ["multiply", "sqrt"]
+    assert diff.removed == ["divide"]
+    assert not diff.unchanged
+
+
+def test_server_description_change_reindexes_every_tool():
+    stored = server([tool("add"), tool("multiply")])
+    diff = diff_server(stored, server([tool("add"), tool("multiply")], description="arithmetic"))
+    assert len(diff.upserted) == 2
+
+
+def test_tag_change_rewrites_record_without_reindexing():
+    stored = server([tool("add")])
+    diff = diff_server(stored, server([tool("add")], tags=["math", "sum"]))
+    assert diff.record_changed and not diff.upserted and not diff.removed
+
+
+def test_new_server_upserts_everything():
+    diff = diff_server(None, server([tool("add"), tool("multiply")]))
+    assert len(diff.upserted) == 2 and diff.record_changed